@@ -2,6 +2,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from .src.api.router import api_v001
+from .src.api.responses import FastJSONResponse
 from .src.constants import COMMON
 import uvicorn
 import os
@@ -9,15 +10,36 @@ from .src.utils.logger import setup_logging
 from fastapi import Request
 from mcp.server.fastmcp import FastMCP
 from typing import Dict, List, Any
-import httpx
 import asyncio
+import multiprocessing
 import threading
 from .src.utils.env import load_common_from_env
 from pathlib import Path
 from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from contextlib import asynccontextmanager
+from .src.utils.httppool import aclose_http_pool
+from .src.utils.persist import close_backend
+from .src.services.orchestratorClient import createOrchestrator
+from .src.services.retention import startRetention, stopRetention
 
 logger = setup_logging()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # With WORKERS > 1 uvicorn spawns worker processes that import this module
+    # afresh; apply the environment overrides main() applied in the parent
+    if multiprocessing.parent_process() is not None:
+        load_common_from_env()
+        setup_logging()
+    startRetention()
+    yield
+    stopRetention()
+    # Release pooled downstream connections and storage handles on shutdown
+    await aclose_http_pool()
+    close_backend()
+
+
 # Create the ASGI app at module scope so Uvicorn can import it via string path
 app = FastAPI(
     title="Rest API Orchestrator",
@@ -25,6 +47,8 @@ app = FastAPI(
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # CORS: allow requests from any origin (any IP/host and any port) for all routes.
@@ -70,6 +94,15 @@ def startAppServer():
     # Enable via UVICORN_RELOAD=1 if needed for local dev
     reload_flag = os.getenv("UVICORN_RELOAD", "0").lower() in ("1", "true", "yes", "on")
 
+    # WORKERS > 1 runs the API in that many processes sharing STORAGE; the MCP
+    # and UI servers keep running once, in this (supervisor) process
+    workers = max(1, int(COMMON.WORKERS))
+    if reload_flag and workers > 1:
+        logger.warning("UVICORN_RELOAD is set; ignoring WORKERS=%d", workers)
+        workers = 1
+    elif workers > 1:
+        logger.info("Starting %d API worker processes", workers)
+
     uvicorn.run(
         import_string,
         host=host,
@@ -78,7 +111,7 @@ def startAppServer():
         reload=reload_flag,
         reload_dirs=["."] if reload_flag else None,
         proxy_headers=False,
-        workers=1,
+        workers=workers,
     )
 
 
@@ -138,21 +171,20 @@ def createMCPServerWithTools():
     # Allow overriding the orchestrator base URL (default stays local for dev)
     # Set env var RESTAPI_ORCHESTRATOR_BASE (or ORCHESTRATOR_BASE) to target a remote host
     API_BASE: str = os.getenv("RESTAPI_ORCHESTRATOR_BASE") or f"http://127.0.0.1:{COMMON.API_PORT}"
-    logger.info(f"[MCP] Orchestrator base: {API_BASE}")
+    # Same process as the API unless the base URL points at a remote host
+    orchestrator = createOrchestrator(API_BASE)
+    logger.info(f"[MCP] Orchestrator base: {API_BASE} ({orchestrator.mode})")
     mcp = FastMCP("restapi_orchestrator_tools", host=mcp_host, port=mcp_port)
 
     @mcp.tool()
-    def createSession() -> Dict[str, Any]:
+    async def createSession() -> Dict[str, Any]:
         """Create a new session id.
         Returns: { "session": string }
         """
-        with httpx.Client(timeout=30.0) as client:
-            r = client.post(f"{API_BASE}/api/v001/session/createSession")
-            r.raise_for_status()
-            return r.json()
+        return await orchestrator.createSession()
 
     @mcp.tool()
-    def createEnvironmentVariables(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def createEnvironmentVariables(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Upsert environment variables via REST API.
         
         Endpoint: PUT /api/v001/variables/upsertEnvironmentVariable
@@ -160,15 +192,12 @@ def createMCPServerWithTools():
         Returns: list of upserted items (echoed from API)
         """
         results: List[Dict[str, Any]] = []
-        with httpx.Client(timeout=30.0) as client:
-            for it in items:
-                r = client.put(f"{API_BASE}/api/v001/variables/upsertEnvironmentVariable", json=it)
-                r.raise_for_status()
-                results.append(r.json())
+        for it in items:
+            results.append(await orchestrator.upsertEnvironmentVariable(it))
         return results
 
     @mcp.tool()
-    def upsertEnvironmentVariable(environment: str, variable: str, value: Any) -> Dict[str, Any]:
+    async def upsertEnvironmentVariable(environment: str, variable: str, value: Any) -> Dict[str, Any]:
         """Upsert a single environment variable via REST API.
         
         Endpoint: PUT /api/v001/variables/upsertEnvironmentVariable
@@ -183,68 +212,42 @@ def createMCPServerWithTools():
             "variable": variable,
             "value": value,
         }
-        with httpx.Client(timeout=30.0) as client:
-            r = client.put(
-                f"{API_BASE}/api/v001/variables/upsertEnvironmentVariable",
-                json=payload,
-            )
-            r.raise_for_status()
-            return r.json()
+        return await orchestrator.upsertEnvironmentVariable(payload)
 
     @mcp.tool()
-    def listAllEnvironmentVariables(environment: str) -> List[Dict[str, Any]]:
+    async def listAllEnvironmentVariables(environment: str) -> List[Dict[str, Any]]:
         """List all variables for the given environment.
         Returns: array of { environment, variable, value }
         """
-        with httpx.Client(timeout=30.0) as client:
-            r = client.get(
-                f"{API_BASE}/api/v001/variables/listAllEnvironmentVariables", params={"environment": environment}
-            )
-            r.raise_for_status()
-            return r.json()
+        return await orchestrator.listAllEnvironmentVariables(environment)
 
     @mcp.tool()
-    def listSpecificEnvironmentVariable(environment: str, variable: str) -> List[Dict[str, Any]]:
+    async def listSpecificEnvironmentVariable(environment: str, variable: str) -> List[Dict[str, Any]]:
         """Get a specific environment variable.
         Returns: { environment, variable, value }
         """
-        with httpx.Client(timeout=30.0) as client:
-            r = client.get(
-                f"{API_BASE}/api/v001/variables/listSpecificVariableByEnvironment",
-                params={"environment": environment, "variable": variable},
-            )
-            r.raise_for_status()
-            return r.json()
+        return await orchestrator.listSpecificEnvironmentVariable(environment, variable)
 
     @mcp.tool()
-    def deleteAllByEnvironment(environment: str) -> Dict[str, Any]:
+    async def deleteAllByEnvironment(environment: str) -> Dict[str, Any]:
         """Delete all variables for the given environment via REST API.
 
         Endpoint: DELETE /api/v001/variables/deleteAllByEnvironment
         Returns: { environment, deletedCount }
         """
-        with httpx.Client(timeout=30.0) as client:
-            r = client.delete(
-                f"{API_BASE}/api/v001/variables/deleteAllByEnvironment",
-                params={"environment": environment},
-            )
-            r.raise_for_status()
-            return r.json()
+        return await orchestrator.deleteAllByEnvironment(environment)
 
     @mcp.tool()
-    def health() -> Dict[str, Any]:
+    async def health() -> Dict[str, Any]:
         """Check API health.
         
         Endpoint: GET /api/v001/health
-        Returns: {"status": "ok"} on healthy server.
+        Returns: {"status": "ok", "circuits": {origin: state}} on healthy server.
         """
-        with httpx.Client(timeout=10.0) as client:
-            r = client.get(f"{API_BASE}/api/v001/health")
-            r.raise_for_status()
-            return r.json()
+        return await orchestrator.health()
 
     @mcp.tool()
-    def createRestAPICall(
+    async def createRestAPICall(
         method: str,
         url: str,
         action: str,
@@ -257,6 +260,9 @@ def createMCPServerWithTools():
         pre_script: Any | None = None,
         post_script: Any | None = None,
         debug: bool | None = None,
+        cache: str | None = None,
+        timeout: Dict[str, Any] | None = None,
+        deadline_seconds: float | None = None,
     ) -> Dict[str, Any]:
         """Call the RestAPI Orchestrator HTTP endpoint.
         
@@ -275,6 +281,10 @@ def createMCPServerWithTools():
         - pre_script: Reserved (not used currently)
         - post_script: Optional dict of {"{{VARIABLE_NAME}}": "expression"}; evaluated on 2xx/3xx status
         - debug: Optional flag
+        - cache: Optional HTTP cache mode for GET calls (off, default, no-cache, force-cache)
+        - timeout: Optional downstream timeouts in seconds: {connect?, read?, write?, pool?, deadline?}
+        - deadline_seconds: Optional time budget for the whole call (default MCP_CALL_TIMEOUT);
+          the server stops interpolation, retries and downstream I/O when it runs out
         
         Returns: { response_status, response_headers, response_body }
         """
@@ -299,11 +309,12 @@ def createMCPServerWithTools():
             payload["post_script"] = post_script
         if debug is not None:
             payload["debug"] = bool(debug)
+        if cache is not None:
+            payload["cache"] = cache
+        if timeout is not None:
+            payload["timeout"] = timeout
 
-        with httpx.Client(timeout=60.0) as client:
-            r = client.post(f"{API_BASE}/api/v001/restapi/call", json=payload)
-            r.raise_for_status()
-            return r.json()
+        return await orchestrator.restapiCall(payload, timeout=deadline_seconds)
 
     def _run_mcp_in_thread():
         try:
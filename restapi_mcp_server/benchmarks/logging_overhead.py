@@ -0,0 +1,88 @@
+"""
+Per-call logging overhead on the request hot path.
+
+Runs the logging-heavy part of a call (template resolution of a large request
+plus the outgoing-request debug records) under several logging modes and
+compares each with a run where the logger is disabled outright:
+
+    python -m restapi_mcp_server.benchmarks.logging_overhead [--calls N] [--rounds N] [--items N]
+
+The background log writer sends emitted records to os.devnull, so "debug"
+measures formatting and queueing cost, not terminal speed.
+"""
+from __future__ import annotations
+import argparse
+import logging
+import os
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from restapi_mcp_server.src.constants import COMMON
+from restapi_mcp_server.src.utils import logger as logmod
+from restapi_mcp_server.src.utils.restapi import _log_request
+from restapi_mcp_server.src.utils.template import TemplateScope, resolve_interpolations
+
+
+def _payload(items: int) -> Dict[str, Any]:
+    return {
+        "customer": "{{CUSTOMER_ID}}",
+        "lines": [{"sku": f"SKU-{i:05d}", "qty": i % 7, "note": "x" * 64, "token": "{{TOKEN}}"} for i in range(items)],
+    }
+
+
+def _configure(mode: str) -> None:
+    COMMON.DEBUG = mode.startswith("debug")
+    COMMON.LOG_SAMPLE_RATE = 0.01 if mode == "debug-sampled-1%" else 1.0
+    log = logmod.setup_logging()
+    sink = open(os.devnull, "w")
+    for handler in logmod.output_handlers():
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(sink)
+    log.disabled = mode == "disabled"
+
+
+def _one_call(body: Dict[str, Any], scope: TemplateScope) -> None:
+    with logmod.sample_call():
+        url = resolve_interpolations("https://api.example.com/customers/{{CUSTOMER_ID}}/orders", scope)
+        headers = resolve_interpolations({"Authorization": "Bearer {{TOKEN}}", "Accept": "application/json"}, scope)
+        resolved = resolve_interpolations(body, scope)
+        _log_request("POST", url, headers, resolved, None, None)
+
+
+def _time(fn: Callable[[], None], calls: int) -> float:
+    for _ in range(min(calls, 50)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--items", type=int, default=200, help="line items in the request body")
+    args = parser.parse_args()
+
+    scope = TemplateScope([{"variable": "CUSTOMER_ID", "value": "C-42"}, {"variable": "TOKEN", "value": "secret"}])
+    body = _payload(args.items)
+
+    # Interleave the modes over several rounds and report each mode's median round
+    modes = ("disabled", "info", "debug-sampled-1%", "debug")
+    rounds: Dict[str, List[float]] = {mode: [] for mode in modes}
+    for _ in range(args.rounds):
+        for mode in modes:
+            _configure(mode)
+            rounds[mode].append(_time(lambda: _one_call(body, scope), args.calls))
+    results: List[Tuple[str, float]] = [(mode, statistics.median(rounds[mode])) for mode in modes]
+
+    baseline = results[0][1]
+    print(f"{args.calls} calls x {args.rounds} rounds, {args.items} body items")
+    print(f"{'mode':<18}{'us/call':>10}{'overhead':>12}")
+    for mode, us in results:
+        print(f"{mode:<18}{us:>10.1f}{(us - baseline) / baseline:>+12.1%}")
+
+
+if __name__ == "__main__":
+    main()
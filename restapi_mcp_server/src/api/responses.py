@@ -0,0 +1,10 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from ..utils import fastjson
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the fast JSON codec (orjson when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        return fastjson.dumpb(content, default=str)
@@ -1,7 +1,35 @@
 from fastapi import APIRouter
+from ....utils.httppool import get_http_pool
+from ....utils.ratelimit import admission_stats
+from ....utils.httpcache import get_http_cache
+from ....utils.singleflight import get_single_flight
+from ....utils.circuitbreaker import circuit_states, circuit_stats
 
 router = APIRouter(tags=["Health"])
 
 @router.get("/health")
 def health_env():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok", "circuits": circuit_states()}
+
+@router.get("/health/httpPool")
+def health_http_pool():
+    """Return downstream connection pool limits and per-origin occupancy."""
+    pool = get_http_pool()
+    return {"limits": pool.limits(), "origins": pool.stats()}
+
+@router.get("/health/outbound")
+def health_outbound():
+    """Return per-origin admission limits, in-flight/queued requests, queue wait times and coalescing counters."""
+    return {"origins": admission_stats(), "single_flight": get_single_flight().stats()}
+
+
+@router.get("/health/httpCache")
+def health_http_cache():
+    """Return HTTP cache size and hit/revalidation/miss counters."""
+    return get_http_cache().stats()
+
+
+@router.get("/health/circuits")
+def health_circuits():
+    """Return per-origin circuit breaker state and sliding-window failure/slow-call rates."""
+    return {"origins": circuit_stats()}
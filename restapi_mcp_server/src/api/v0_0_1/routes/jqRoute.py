@@ -4,10 +4,12 @@ JQ expression evaluation routes.
 Endpoints:
 - POST /jq/eval
     Evaluate a JQ expression against supplied JSON input.
+- GET /jq/cacheStats
+    Report compiled jq program cache counters.
 """
 from fastapi import APIRouter, HTTPException
 from ....utils import jqinterpolation
-from ....models.jqSchema import JQExpressionIn, JQExpressionOut
+from ....models.jqSchema import JQCacheStatsOut, JQExpressionIn, JQExpressionOut
 
 router = APIRouter(prefix="/jq", tags=["JQ"])
 
@@ -27,3 +29,10 @@ def jq_expression_evaluation(payload: JQExpressionIn):
         return JQExpressionOut(result=jqinterpolation.jqinterpolate(expression=payload.expression,json_input=payload.data))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/cacheStats", response_model=JQCacheStatsOut)
+def jq_cache_stats():
+    """
+    Return size, capacity and hit/miss/eviction counters of the compiled jq program cache.
+    """
+    return JQCacheStatsOut(**jqinterpolation.jq_cache_info())
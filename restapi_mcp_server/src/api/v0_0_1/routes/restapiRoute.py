@@ -5,13 +5,24 @@ Endpoints:
 - POST /restapi/call
     Execute an HTTP call after interpolating variables, creating a transaction
     before the call, and updating it after the call completes.
+- POST /restapi/batch
+    Execute an ordered list of calls (sequential or parallel) in one round trip;
+    returns aggregated results, or NDJSON lines as items complete with ?stream=true.
+- GET /restapi/responseFile
+    Download a streamed response body that was spooled to disk.
 """
 from fastapi import APIRouter, HTTPException
 from fastapi import Request
-from ....models.restapiSchema import RestAPIIn, RestAPIOut, RestAPIFileIn
-from ....services.restapi import restapiCall
+from fastapi.responses import FileResponse, StreamingResponse
+from ....models.restapiSchema import RestAPIBatchIn, RestAPIBatchOut, RestAPIIn, RestAPIOut, RestAPIFileIn
+from ....services.restapi import restapiBatch, restapiBatchStream, restapiCall
+from ....utils.circuitbreaker import CircuitOpenError
+from ....utils.deadline import DeadlineExceeded, deadline_scope, parse_timeout_header
+from ....utils.responsebody import spool_path
+from ....constants import COMMON
 from typing import Any, Dict
 import json
+import math
 from starlette.datastructures import UploadFile
 
 # Router for REST API orchestration
@@ -53,6 +64,10 @@ async def _build_payload_from_multipart(request: Request) -> RestAPIIn:
         "request_body",
         "request_form_data",
         "post_script",
+        "retry",
+        "cache",
+        "timeout",
+        "stream_response",
     }
 
     payload: Dict[str, Any] = {}
@@ -78,7 +93,7 @@ async def _build_payload_from_multipart(request: Request) -> RestAPIIn:
         else:
             _add_form_value(inferred_form_data, key, value)
 
-    for json_key in ("request_headers", "request_form_data", "post_script"):
+    for json_key in ("request_headers", "request_form_data", "post_script", "retry", "timeout"):
         if json_key in payload:
             payload[json_key] = _parse_json_text(payload[json_key])
 
@@ -236,6 +251,8 @@ async def restapi_call(request: Request) -> RestAPIOut:
     - Creates a transaction (PENDING) prior to the HTTP call
     - Performs the HTTP call
     - Updates the transaction with response and final status (SUCCESS/FAILED/ERROR)
+    - Gives up with 504 once the caller's deadline passes (DEADLINE_HEADER
+      request header, in seconds, or the payload's timeout.deadline)
 
     Returns:
         RestAPIOut: status, response headers, and response body from downstream.
@@ -247,6 +264,65 @@ async def restapi_call(request: Request) -> RestAPIOut:
         else:
             body = await request.json()
             payload = RestAPIIn.model_validate(body)
-        return restapiCall(payload)
+        with deadline_scope(parse_timeout_header(request.headers.get(COMMON.DEADLINE_HEADER))):
+            return await restapiCall(payload)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except CircuitOpenError as e:
+        # Downstream origin is failing; tell the caller when to try again
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/batch", response_model=RestAPIBatchOut)
+async def restapi_batch(payload: RestAPIBatchIn, request: Request, stream: bool = False):
+    """
+    Execute many calls in one round trip.
+
+    Behavior:
+    - sequential: items run in order; post_script variables set by an item are
+      visible to the following items
+    - parallel: up to `concurrency` items run at once
+    - Variables are loaded once per environment and transactions are written
+      in one bulk insert when the batch finishes
+    - The DEADLINE_HEADER request header (seconds) bounds the whole batch;
+      items still running when it passes fail with a deadline error
+
+    Returns:
+        RestAPIBatchOut with per-item results in request order, or with
+        `stream=true` an application/x-ndjson stream of RestAPIBatchItemOut
+        lines in completion order; if the batch fails mid-stream, a last
+        {"error": ...} line is sent before the stream closes.
+    """
+    timeout = parse_timeout_header(request.headers.get(COMMON.DEADLINE_HEADER))
+    if stream:
+        async def lines():
+            try:
+                async for out in restapiBatchStream(payload, timeout):
+                    yield out.model_dump_json() + "\n"
+            except Exception as e:
+                # The status line is already sent: report the failure as the last line
+                yield json.dumps({"error": str(e)}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    try:
+        return RestAPIBatchOut(results=await restapiBatch(payload, timeout))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/responseFile")
+def restapi_response_file(name: str):
+    """
+    Download a response body spooled to disk by a streamed call.
+
+    `name` is the `file` field of the body descriptor returned by the call.
+    """
+    try:
+        path = spool_path(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail=f"Response file not found: {name}")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
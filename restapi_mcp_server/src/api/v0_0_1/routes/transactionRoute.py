@@ -7,10 +7,36 @@ Endpoints:
 
 - GET /transactions/listSpecificTransaction
     Return a single transaction by transactionId (404 if not found).
+
+- GET /transactions/listTransactions
+    Return one page of transactions (cursor pagination, filters, field projection).
+
+- GET /transactions/export
+    Stream every matching transaction as NDJSON or CSV, optionally gzipped.
+
+- POST /transactions/purge
+    Apply the retention policies now (archive and delete expired rows).
+
+- GET /transactions/listArchiveSegments
+    List the compressed archive segments (one per creation date).
+
+- GET /transactions/queryArchive
+    Return archived transactions by date range and column filters.
 """
 from fastapi import APIRouter, HTTPException
-from ....models.transacationSchema import TransactionItem, GetAllTransactionsOut
-from ....services.transactions import listSpecificTransaction, listAllTransactions
+from fastapi.responses import StreamingResponse
+from datetime import date, datetime
+from typing import List, Literal, Optional
+from ....models.transacationSchema import (
+    TransactionItem,
+    GetAllTransactionsOut,
+    PurgeTransactionsOut,
+    ArchiveSegmentItem,
+    TransactionPageOut,
+)
+from ....services.transactions import exportTransactions, listSpecificTransaction, listAllTransactions, listTransactions
+from ...responses import FastJSONResponse
+from ....services.retention import listArchiveSegments, purgeTransactions, queryArchivedTransactions
 
 # Router for transaction operations
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
@@ -44,3 +70,146 @@ def list_specific_transaction(transactionId: str):
         raise HTTPException(status_code=404, detail="Transaction not found")
     # Ensure a single object is returned to match response_model
     return rows[0]
+
+@router.get("/listTransactions", response_model=TransactionPageOut)
+def list_transactions(
+    session: Optional[str] = None,
+    action: Optional[str] = None,
+    status: Optional[str] = None,
+    http_method: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    order: Literal["asc", "desc"] = "desc",
+    fields: Optional[str] = None,
+):
+    """
+    Return one page of transactions, newest first by default.
+
+    - Filters: session, action, status, http_method (exact match) and
+      created_from (inclusive) / created_to (exclusive) ISO timestamps.
+    - cursor: `next_cursor` of the previous page; limit: page size (max 1000).
+    - fields: comma-separated columns to return, e.g. `status,creation_dt`.
+      Request/response bodies are only read and decoded when listed.
+
+    Example (last 5 calls of a session): `?session=<id>&limit=5&fields=action,status,creation_dt`
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        page = listTransactions(
+            session=session,
+            action=action,
+            status=status,
+            http_method=http_method,
+            created_from=created_from,
+            created_to=created_to,
+            cursor=cursor,
+            limit=limit,
+            order=order,
+            fields=field_list,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Rows are already plain JSON values; skip response-model validation
+    return FastJSONResponse(page)
+
+_EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+@router.get("/export")
+def export_transactions(
+    session: Optional[str] = None,
+    action: Optional[str] = None,
+    status: Optional[str] = None,
+    http_method: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    order: Literal["asc", "desc"] = "asc",
+    fields: Optional[str] = None,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+):
+    """
+    Stream every transaction matching the filters as a file download, oldest
+    first by default.
+
+    - Filters, order and fields: as for listTransactions.
+    - format=ndjson: one JSON object per line, request/response decoded.
+    - format=csv: header row, request/response as stored JSON text.
+    - gzip=true: gzip-compressed file (`.gz` name, application/gzip).
+
+    Rows are read from storage in batches while the response is sent, so the
+    export does not hold the whole table in memory (SQLite storage) and does
+    not block other requests.
+
+    Example: `curl -o txns.ndjson.gz '.../transactions/export?session=<id>&gzip=true'`
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        chunks = exportTransactions(
+            session=session,
+            action=action,
+            status=status,
+            http_method=http_method,
+            created_from=created_from,
+            created_to=created_to,
+            order=order,
+            fields=field_list,
+            fmt=format,
+            compress=gzip,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = f"transactions.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if gzip else _EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.post("/purge", response_model=PurgeTransactionsOut)
+def purge_transactions():
+    """
+    Apply TRANSACTION_RETENTION_DAYS / TRANSACTION_MAX_ROWS now instead of
+    waiting for the background purge. Expired rows are archived (unless
+    TRANSACTION_ARCHIVE is off) and removed from the transaction store.
+    """
+    try:
+        return purgeTransactions()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/listArchiveSegments", response_model=List[ArchiveSegmentItem])
+def list_archive_segments():
+    """
+    Return the archive segments in date order.
+    """
+    try:
+        return listArchiveSegments()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/queryArchive", response_model=GetAllTransactionsOut)
+def query_archive(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    transactionId: Optional[str] = None,
+    session: Optional[str] = None,
+    action: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 1000,
+):
+    """
+    Return archived transactions created between date_from and date_to
+    (inclusive, UTC dates; both optional) matching the given columns, oldest
+    first, at most `limit`. Only the segments in the date range are read.
+    """
+    equals = {
+        k: v
+        for k, v in {"transactionId": transactionId, "session": session, "action": action, "status": status}.items()
+        if v is not None
+    }
+    try:
+        return queryArchivedTransactions(date_from, date_to, limit=max(1, limit), **equals)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
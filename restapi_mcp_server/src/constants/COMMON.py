@@ -4,10 +4,124 @@ from enum import Enum, auto
 class FileType(Enum):
     ENVIRONMENT = auto()
     TRANSACTION = auto()   
+    SESSION = auto()
 
 DEBUG = True
 STORAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'storage') 
+# Storage backend: "sqlite" (indexed, default) or "csv" (legacy pandas CSV files)
+STORAGE_BACKEND: str = "sqlite"
+SQLITE_DB_FILE: str = "restapi.db"
+SQLITE_BUSY_TIMEOUT_MS: int = 5000
+# Transactions only: "" (use STORAGE_BACKEND) or "journal" (append-only JSON Lines)
+TRANSACTION_BACKEND: str = ""
+JOURNAL_FILE: str = "transaction.jsonl"
+JOURNAL_FSYNC: bool = False
+JOURNAL_COMPACT_MIN_BYTES: int = 8 * 1024 * 1024
+JOURNAL_COMPACT_RATIO: float = 2.0
+JOURNAL_COMPACT_INTERVAL: float = 60.0
 DEFAULT_HTTP_TIMEOUT: float = 30.0
+# Request header carrying the caller's remaining budget in seconds (utils/deadline.py)
+DEADLINE_HEADER: str = "X-Request-Timeout"
+# Deadline the MCP tools give a REST API call / batch unless the tool call sets one
+MCP_CALL_TIMEOUT: float = 60.0
+
+# Downstream response bodies (utils/responsebody.py)
+# Streamed bodies larger than this are spooled to STORAGE/RESPONSE_SPOOL_DIR
+RESPONSE_STREAMING: bool = False
+RESPONSE_MEMORY_MAX_BYTES: int = 8 * 1024 * 1024
+RESPONSE_SPOOL_DIR: str = "responses"
+RESPONSE_SPOOL_TTL: float = 3600.0
+# Body previews in logs; transaction bodies larger than this are stored truncated (0 = keep whole)
+BODY_PREVIEW_BYTES: int = 2048
+TRANSACTION_BODY_MAX_BYTES: int = 0
+
+# Transaction retention (services/retention.py); 0 disables a policy. Purged rows go to
+# gzip'd JSON Lines segments per creation date under STORAGE/ARCHIVE_DIR unless TRANSACTION_ARCHIVE is off
+TRANSACTION_RETENTION_DAYS: float = 0
+TRANSACTION_MAX_ROWS: int = 0
+TRANSACTION_PURGE_INTERVAL: float = 300.0
+TRANSACTION_ARCHIVE: bool = True
+ARCHIVE_DIR: str = "archive"
+ARCHIVE_COMPRESS_LEVEL: int = 6
+
+# JSON codec (utils/fastjson.py): "auto" uses orjson when installed, "json" forces the stdlib
+JSON_CODEC: str = "auto"
+
+# Logging (utils/logger.py): logged values are previewed up to LOG_PREVIEW_BYTES characters;
+# LOG_SAMPLE_RATE is the share of calls (0..1) whose DEBUG records are kept
+LOG_PREVIEW_BYTES: int = 2000
+LOG_SAMPLE_RATE: float = 1.0
+# Log records are written by a background thread: to stderr and, when LOG_DIR is set, to
+# LOG_DIR/LOG_FILE_NAME, rotated at LOG_MAX_BYTES or by time when LOG_ROTATE_WHEN is set
+# ("midnight", "H", ...). LOG_FORMAT: "text" or "json" (one JSON object per line)
+LOG_FORMAT: str = "text"
+LOG_DIR: str = ""
+LOG_FILE_NAME: str = "restapi_mcp_server.log"
+LOG_MAX_BYTES: int = 10 * 1024 * 1024
+LOG_ROTATE_WHEN: str = ""
+LOG_BACKUP_COUNT: int = 5
+
+# Environment variable cache (services/variablesInterpolation.py)
+ENV_CACHE_ENABLED: bool = True
+ENV_CACHE_CHECK_INTERVAL: float = 1.0
+
+# Downstream HTTP connection pool (one keep-alive pool per origin)
+HTTP_POOL_MAX_CONNECTIONS: int = 100
+HTTP_POOL_MAX_KEEPALIVE: int = 20
+HTTP_POOL_KEEPALIVE_EXPIRY: float = 30.0
+
+# Compiled payload templates (utils/template.py)
+TEMPLATE_CACHE_SIZE: int = 512
+TEMPLATE_CACHE_MAX_KEY_CHARS: int = 65536
+
+# Compiled jq programs (utils/jqinterpolation.py)
+JQ_CACHE_SIZE: int = 256
+
+# Per-session execution context ($RESPONSE_BODY, ...) kept between calls
+SESSION_CONTEXT_TTL: float = 3600.0
+SESSION_CONTEXT_MAX: int = 10000
+# With WORKERS > 1 the context is kept in storage; seconds between evictions of stale sessions there.
+# Large bodies of those contexts are kept in files under STORAGE/SESSION_BODY_DIR
+SESSION_EVICT_INTERVAL: float = 60.0
+SESSION_BODY_DIR: str = "sessions"
+
+# Downstream retry defaults (utils/retry.py); 1 attempt = no retries
+RETRY_MAX_ATTEMPTS: int = 1
+RETRY_BACKOFF_INITIAL: float = 0.5
+RETRY_BACKOFF_MAX: float = 30.0
+RETRY_TOTAL_TIMEOUT: float = 0.0
+# Environment variable holding a per-environment retry policy (JSON object)
+RETRY_ENV_VARIABLE: str = "RESTAPI_RETRY"
+
+# Outbound admission per downstream origin (utils/ratelimit.py); 0 = unlimited
+OUTBOUND_MAX_IN_FLIGHT: int = 0
+OUTBOUND_RPS: float = 0.0
+OUTBOUND_BURST: float = 0.0
+# Environment variable holding per-environment limits (JSON object)
+RATE_LIMIT_ENV_VARIABLE: str = "RESTAPI_RATE_LIMIT"
+
+# HTTP cache for downstream GETs (utils/httpcache.py); mode used when a call sets no `cache`
+HTTP_CACHE_MODE: str = "off"
+HTTP_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+HTTP_CACHE_DISK: bool = False
+HTTP_CACHE_DIR: str = "http_cache"
+HTTP_CACHE_DISK_MAX_BYTES: int = 256 * 1024 * 1024
+
+# Identical concurrent GET/HEAD/OPTIONS share one downstream call (utils/singleflight.py)
+SINGLE_FLIGHT_ENABLED: bool = True
+# Headers left out of the coalescing key (comma separated, case-insensitive)
+SINGLE_FLIGHT_IGNORE_HEADERS: str = "x-request-id,x-correlation-id,request-id,traceparent,tracestate"
+
+# Circuit breaker per downstream origin (utils/circuitbreaker.py)
+CIRCUIT_BREAKER_ENABLED: bool = True
+CIRCUIT_WINDOW_SECONDS: float = 60.0
+CIRCUIT_MIN_CALLS: int = 10
+CIRCUIT_FAILURE_RATE: float = 0.5
+# 0 disables the latency threshold
+CIRCUIT_SLOW_CALL_SECONDS: float = 10.0
+CIRCUIT_SLOW_CALL_RATE: float = 0.8
+CIRCUIT_OPEN_SECONDS: float = 30.0
+CIRCUIT_HALF_OPEN_CALLS: int = 1
 
 # Regular Expressions
 INTERPOLATION_REGEX = r"\{\{(.*?)\}\}"
@@ -22,4 +136,6 @@ HOST: str="0.0.0.0"
 API_PORT: int=9090
 RESTAPI_ORCHESTRATOR_BASE: str = f"http://127.0.0.1:{API_PORT}"
 MCP_API_PORT: int=8765
+# API worker processes (uvicorn --workers); the MCP and UI servers always run once
+WORKERS: int=1
 log_level: str= "debug" if DEBUG else "info"
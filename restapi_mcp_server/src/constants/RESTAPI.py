@@ -1,3 +1,5 @@
+# Names available to payloads as $NAME and their values outside a call.
+# Per-call values live in utils/executioncontext.py (one context per call/session).
 REQUEST_BODY = None
 REQUEST_HEADERS = None
 RESPONSE_BODY = None
@@ -23,3 +23,20 @@ class JQExpressionOut(BaseModel):
         result: Result produced by evaluating the jq expression.
     """
     result: Any = Field(..., description="Result produced by evaluating the jq expression")
+
+
+class JQCacheStatsOut(BaseModel):
+    """Counters of the compiled jq program cache.
+
+    Attributes:
+        size: Number of compiled programs currently cached.
+        maxsize: Cache capacity (JQ_CACHE_SIZE).
+        hits: Lookups served from the cache.
+        misses: Lookups that compiled the expression.
+        evictions: Programs dropped to stay within capacity.
+    """
+    size: int = Field(..., description="Number of compiled programs currently cached")
+    maxsize: int = Field(..., description="Cache capacity")
+    hits: int = Field(..., description="Lookups served from the cache")
+    misses: int = Field(..., description="Lookups that compiled the expression")
+    evictions: int = Field(..., description="Programs dropped to stay within capacity")
@@ -1,5 +1,5 @@
 from collections.abc import Mapping
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Literal, Optional
 from pydantic import BaseModel, Field, field_validator, model_validator
 import base64
 
@@ -37,6 +37,34 @@ class RestAPIFileIn(BaseModel):
                 raise ValueError("request_files[].content must be valid base64 string") from exc
         raise ValueError("request_files[].content must be base64 string or bytes")
 
+class RestAPIRetryIn(BaseModel):
+    """Retry settings; unset fields fall back to the environment's RESTAPI_RETRY, then server defaults."""
+    max_attempts: Optional[int] = Field(None, ge=1, description="Total attempts including the first one")
+    backoff_initial: Optional[float] = Field(None, ge=0, description="Delay before the first retry, in seconds")
+    backoff_max: Optional[float] = Field(None, ge=0, description="Upper bound of a single backoff delay, in seconds")
+    backoff_multiplier: Optional[float] = Field(None, ge=1, description="Exponential growth factor of the backoff")
+    jitter: Optional[bool] = Field(None, description="Randomize each delay between 0 and the backoff (full jitter)")
+    retry_on_status: Optional[list[int]] = Field(None, description="Response statuses that are retried")
+    retry_on_errors: Optional[bool] = Field(None, description="Retry connection errors and timeouts")
+    retry_non_idempotent: Optional[bool] = Field(
+        None,
+        description="Also retry POST/PATCH without an Idempotency-Key header",
+    )
+    respect_retry_after: Optional[bool] = Field(None, description="Wait at least the Retry-After header's delay")
+    total_timeout: Optional[float] = Field(None, gt=0, description="Time budget for all attempts, in seconds")
+
+class RestAPITimeoutIn(BaseModel):
+    """Per-call timeouts in seconds; unset phases use DEFAULT_HTTP_TIMEOUT."""
+    connect: Optional[float] = Field(None, gt=0, description="Time to establish a downstream connection")
+    read: Optional[float] = Field(None, gt=0, description="Max wait between received chunks of the response")
+    write: Optional[float] = Field(None, gt=0, description="Max wait between sent chunks of the request")
+    pool: Optional[float] = Field(None, gt=0, description="Time to get a connection from the pool")
+    deadline: Optional[float] = Field(
+        None,
+        gt=0,
+        description="Overall budget for the call (interpolation, retries and I/O); tightened by the caller's deadline header",
+    )
+
 class RestAPIIn(BaseModel):
     method: str = Field(..., description="HTTP method: GET, POST, PUT, PATCH, DELETE")
     url: str = Field(..., description="Target URL")
@@ -63,6 +91,29 @@ class RestAPIIn(BaseModel):
         None,
         description="Template object evaluated after the HTTP call; can read response fields and update env/envstore",
     )
+    retry: Optional[RestAPIRetryIn] = Field(
+        None,
+        description="Optional retry policy for the downstream call (overrides the environment's RESTAPI_RETRY)",
+    )
+    timeout: Optional[RestAPITimeoutIn] = Field(
+        None,
+        description="Optional connect/read/write/pool timeouts and overall deadline for the call",
+    )
+    stream_response: Optional[bool] = Field(
+        None,
+        description=(
+            "Read the downstream body in chunks; bodies over RESPONSE_MEMORY_MAX_BYTES are spooled to disk and "
+            "returned as {file, size, sha256, content_type, preview} (unset uses the server's RESPONSE_STREAMING)"
+        ),
+    )
+    cache: Optional[Literal["off", "default", "no-cache", "force-cache"]] = Field(
+        None,
+        description=(
+            "HTTP cache mode for GET calls: off, default (serve fresh, revalidate stale), "
+            "no-cache (always revalidate) or force-cache (serve any stored response); "
+            "unset uses the server's HTTP_CACHE_MODE"
+        ),
+    )
 
     @model_validator(mode="before")
     @classmethod
@@ -99,3 +150,28 @@ class RestAPIOut(BaseModel):
     response_status: int = Field(..., description="HTTP status code from the downstream request")
     response_headers: Dict[str, Any] = Field(..., description="Headers returned by the downstream service")
     response_body: Any = Field(..., description="Parsed JSON body if available; otherwise raw text")
+
+
+class RestAPIBatchIn(BaseModel):
+    mode: Literal["sequential", "parallel"] = Field(
+        "sequential",
+        description="sequential: run items in order (later items see earlier post_script variables); parallel: run concurrently",
+    )
+    concurrency: int = Field(4, ge=1, description="Max items in flight when mode is parallel")
+    stop_on_error: bool = Field(
+        False,
+        description=(
+            "sequential mode only: skip the remaining items after an item raises an error "
+            "or gets a downstream status outside 200-399"
+        ),
+    )
+    items: list[RestAPIIn] = Field(..., min_length=1, description="Ordered list of REST API calls")
+
+class RestAPIBatchItemOut(BaseModel):
+    index: int = Field(..., description="Position of the item in the request")
+    ok: bool = Field(..., description="False if the item raised an error or was skipped")
+    result: Optional[RestAPIOut] = Field(None, description="Downstream response when ok")
+    error: Optional[str] = Field(None, description="Error message when not ok")
+
+class RestAPIBatchOut(BaseModel):
+    results: list[RestAPIBatchItemOut] = Field(..., description="Per-item results in request order")
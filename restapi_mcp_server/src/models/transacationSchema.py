@@ -11,6 +11,16 @@ class TransactionItem(BaseModel):
     status: Optional[str] = Field(default=None, description="Current status of the transaction")
     creation_dt: str = Field(..., description="Creation timestamp in ISO format")
     last_updation_dt: str = Field(..., description="Last update timestamp in ISO format")
+    total_ms: Optional[float] = Field(default=None, description="Latency of the whole call in milliseconds")
+    interpolation_ms: Optional[float] = Field(default=None, description="Time spent resolving templates")
+    storage_ms: Optional[float] = Field(default=None, description="Time spent loading variables and creating the transaction")
+    downstream_ms: Optional[float] = Field(default=None, description="Time spent on the downstream call, including retries and backoff")
+    connect_ms: Optional[float] = Field(default=None, description="TCP connect (DNS lookup included) of the final attempt; null on a reused connection")
+    tls_ms: Optional[float] = Field(default=None, description="TLS handshake of the final attempt; null for plain HTTP or a reused connection")
+    ttfb_ms: Optional[float] = Field(default=None, description="Final attempt start until its response headers arrived")
+    request_bytes: Optional[int] = Field(default=None, description="Request body bytes sent by the final attempt")
+    response_bytes: Optional[int] = Field(default=None, description="Response body bytes received by the final attempt, before decoding")
+    retry_count: Optional[int] = Field(default=None, description="Attempts after the first")
 
 class GetAllTransactionsOut(RootModel[List[TransactionItem]]):
     model_config = ConfigDict(json_schema_extra={
@@ -40,3 +50,17 @@ class GetAllTransactionsOut(RootModel[List[TransactionItem]]):
         ]
     })
     root: List[TransactionItem]
+
+class PurgeTransactionsOut(BaseModel):
+    examined: int = Field(..., description="Rows in the transaction store when the purge ran")
+    archived: int = Field(..., description="Rows written to archive segments")
+    deleted: int = Field(..., description="Rows removed from the transaction store")
+
+class ArchiveSegmentItem(BaseModel):
+    date: str = Field(..., description="Creation date (UTC, YYYY-MM-DD) of the rows in the segment, or 'undated'")
+    file: str = Field(..., description="Segment file name under STORAGE/archive/transaction")
+    bytes: int = Field(..., description="Compressed size of the segment")
+
+class TransactionPageOut(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., description="Transactions of this page; only the requested fields when `fields` is set")
+    next_cursor: Optional[str] = Field(default=None, description="Pass as `cursor` to get the next page; null on the last page")
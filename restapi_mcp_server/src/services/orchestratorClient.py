@@ -0,0 +1,142 @@
+"""Dispatch targets for the MCP tools.
+
+When the MCP server runs in the same process as the API (the default
+`RESTAPI_ORCHESTRATOR_BASE` on a loopback host), tools call the service layer
+directly: no serialization, TCP connect or second request validation per tool
+call. When the base URL points at a remote host, tools keep calling the
+orchestrator's HTTP API over one pooled keep-alive client.
+
+Both dispatchers return the same JSON shapes as the HTTP endpoints. A REST API
+call gets a deadline (COMMON.MCP_CALL_TIMEOUT unless the tool call sets one):
+in-process it scopes the service call, over HTTP it is sent in the
+COMMON.DEADLINE_HEADER header so the server stops working once the tool gives up.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+import asyncio
+import httpx
+from ..models.restapiSchema import RestAPIIn
+from ..models.sessionSchema import SessionOut
+from ..models.variablesSchema import DeleteVarsOut, EnvVarItem, GetAllEnvOut
+from ..constants import COMMON
+from ..utils import idgen
+from ..utils.deadline import deadline_scope
+from ..utils.circuitbreaker import circuit_states
+from ..utils.logger import setup_logging
+from .restapi import restapiCall
+from .variablesInterpolation import (
+    deleteAllVariablesByEnvironment,
+    listAllVariableByEnvironmentAsync,
+    listSpecificVariableByEnvironment,
+    upsertEnvironmentVariableAsync,
+)
+
+logger = setup_logging()
+
+__all__ = ["InProcessOrchestrator", "HttpOrchestrator", "isLocalOrchestrator", "createOrchestrator"]
+
+_LOOPBACK_HOSTS = {"127.0.0.1", "localhost", "::1", "0.0.0.0"}
+# Extra client-side wait so the server's deadline error arrives before the client times out
+_DEADLINE_GRACE = 5.0
+
+
+def isLocalOrchestrator(base_url: str) -> bool:
+    """True if `base_url` points at this machine (so the API shares our process)."""
+    try:
+        host = httpx.URL(base_url).host
+    except Exception:
+        return False
+    return host.lower() in _LOOPBACK_HOSTS
+
+
+class InProcessOrchestrator:
+    """Calls the service layer directly."""
+
+    mode = "in-process"
+
+    async def createSession(self) -> Dict[str, Any]:
+        return SessionOut(session=idgen.generateUUID()).model_dump(mode="json")
+
+    async def upsertEnvironmentVariable(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        payload = EnvVarItem.model_validate(item)
+        result = await upsertEnvironmentVariableAsync(payload.environment, payload.variable, payload.value)
+        return EnvVarItem(**result).model_dump(mode="json")
+
+    async def listAllEnvironmentVariables(self, environment: str) -> List[Dict[str, Any]]:
+        rows = await listAllVariableByEnvironmentAsync(environment)
+        return GetAllEnvOut.model_validate(rows).model_dump(mode="json")
+
+    async def listSpecificEnvironmentVariable(self, environment: str, variable: str) -> List[Dict[str, Any]]:
+        rows = await asyncio.to_thread(listSpecificVariableByEnvironment, environment, variable)
+        return GetAllEnvOut.model_validate(rows).model_dump(mode="json")
+
+    async def deleteAllByEnvironment(self, environment: str) -> Dict[str, Any]:
+        count = await asyncio.to_thread(deleteAllVariablesByEnvironment, environment)
+        return DeleteVarsOut(environment=environment, deletedCount=count).model_dump(mode="json")
+
+    async def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "circuits": circuit_states()}
+
+    async def restapiCall(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        with deadline_scope(timeout or COMMON.MCP_CALL_TIMEOUT):
+            result = await restapiCall(RestAPIIn.model_validate(payload))
+        return result.model_dump(mode="json")
+
+
+class HttpOrchestrator:
+    """Calls a remote orchestrator's HTTP API over one keep-alive client."""
+
+    mode = "http"
+
+    def __init__(self, base_url: str) -> None:
+        self.base_url = base_url
+        self._client = httpx.AsyncClient(base_url=base_url, timeout=30.0)
+
+    async def _json(self, method: str, path: str, timeout: float = 30.0, **kwargs: Any) -> Any:
+        r = await self._client.request(method, f"/api/v001{path}", timeout=timeout, **kwargs)
+        r.raise_for_status()
+        return r.json()
+
+    async def createSession(self) -> Dict[str, Any]:
+        return await self._json("POST", "/session/createSession")
+
+    async def upsertEnvironmentVariable(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._json("PUT", "/variables/upsertEnvironmentVariable", json=item)
+
+    async def listAllEnvironmentVariables(self, environment: str) -> List[Dict[str, Any]]:
+        return await self._json("GET", "/variables/listAllEnvironmentVariables", params={"environment": environment})
+
+    async def listSpecificEnvironmentVariable(self, environment: str, variable: str) -> List[Dict[str, Any]]:
+        return await self._json(
+            "GET",
+            "/variables/listSpecificVariableByEnvironment",
+            params={"environment": environment, "variable": variable},
+        )
+
+    async def deleteAllByEnvironment(self, environment: str) -> Dict[str, Any]:
+        return await self._json("DELETE", "/variables/deleteAllByEnvironment", params={"environment": environment})
+
+    async def health(self) -> Dict[str, Any]:
+        return await self._json("GET", "/health", timeout=10.0)
+
+    async def restapiCall(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        timeout = timeout or COMMON.MCP_CALL_TIMEOUT
+        # The server gives up at the deadline; the client waits a little longer for its answer
+        return await self._json(
+            "POST",
+            "/restapi/call",
+            timeout=timeout + _DEADLINE_GRACE,
+            json=payload,
+            headers={COMMON.DEADLINE_HEADER: f"{timeout:g}"},
+        )
+
+
+def createOrchestrator(base_url: str) -> InProcessOrchestrator | HttpOrchestrator:
+    """
+    In-process dispatch for a loopback base URL, HTTP otherwise. With
+    WORKERS > 1 the tools always go through HTTP, so their calls are spread
+    over the API worker processes instead of running in the MCP process.
+    """
+    if isLocalOrchestrator(base_url) and COMMON.WORKERS <= 1:
+        return InProcessOrchestrator()
+    return HttpOrchestrator(base_url)
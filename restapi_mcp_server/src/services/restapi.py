@@ -1,221 +1,27 @@
-from ..utils.logger import setup_logging
-from ..models.restapiSchema import RestAPIIn, RestAPIOut
-from ..constants import COMMON, RESTAPI
-from .variablesInterpolation import listAllVariableByEnvironment, eval as interpolate_vars, upsertEnvironmentVariable
-from ..utils.restapi import http_request
-from .transactions import createTransaction, updateTransaction
-from ..utils.jsoncodec import decode_value_if_json
-from ..utils.bas64interpolation import encode_base64, decode_base64
-from ..utils import jqinterpolation
-from typing import Any, Dict, Optional, cast
-
-import json, re
+from ..utils.logger import debug_enabled, preview, sample_call, setup_logging
+from ..models.restapiSchema import RestAPIBatchIn, RestAPIBatchItemOut, RestAPIIn, RestAPIOut, RestAPIRetryIn
+from ..constants import COMMON
+from .variablesInterpolation import listAllVariableByEnvironmentAsync, upsertEnvironmentVariableAsync
+from ..utils.restapi import http_request_async
+from ..utils.retry import RetryPolicy, send_with_retry
+from ..utils.ratelimit import admit, limits_from_config
+from ..utils.circuitbreaker import circuit
+from ..utils.responsebody import truncate_for_storage
+from ..utils.deadline import check_deadline, current_deadline, deadline_scope, run_within_deadline
+from ..utils.httpcache import CACHE_MODES, fetch_with_cache
+from ..utils.singleflight import flight_key, get_single_flight
+from ..utils.calltiming import CallTiming
+from .transactions import TransactionBatch, createTransactionAsync, updateTransactionAsync
+from ..utils.jsoncodec import decode_value_if_json, encode_value_for_storage
+from ..utils.template import TemplateScope, resolve_interpolations
+from ..utils.executioncontext import ExecutionContext, get_session_store, use_context
+from typing import Any, AsyncIterator, Dict, List, Optional, cast
+
+import asyncio, httpx, json, re
 
 logger = setup_logging()
 
 
-def _lookup_native_variable_value(env_rows: Any, var_name: str) -> tuple[bool, Any]:
-    """
-    Lookup a variable in environment rows and return its native (non-stringified) value.
-
-    Supported row shapes:
-    - {"variable": "NAME", "value": ...}
-    - {"NAME": ...}
-    """
-    for row in (env_rows or []):
-        if not isinstance(row, dict):
-            continue
-
-        if row.get("variable") == var_name:
-            return True, row.get("value")
-
-        if var_name in row:
-            return True, row.get(var_name)
-
-    return False, None
-
-def _preview(value: Any, limit: int = 2000) -> str:
-    try:
-        text = json.dumps(value, default=str)
-    except Exception:
-        try:
-            text = repr(value)
-        except Exception:
-            text = "<unrepresentable>"
-    if len(text) > limit:
-        return text[:limit] + "...[truncated]"
-    return text
-
-def _interpolate_obj(obj, env_rows):
-    """
-    Recursively interpolate strings in obj using environment variables.
-
-    - If obj is a string, interpolate with interpolate_vars(expression=obj, data=env_rows)
-    - If obj is a dict, recursively interpolate keys' values
-    - If obj is a list, recursively interpolate items
-    - Otherwise return obj as-is
-    """
-    if isinstance(obj, str):
-        # Preserve native type when the entire string is a single placeholder.
-        # Example: "{{FILE_ID}}" -> ["id1", "id2", ...] (not stringified list)
-        mvar = re.fullmatch(COMMON.BRACED_VARIABLE_REGEX, obj.strip())
-        if mvar and (mvar.lastindex or 0) >= 1:
-            var_name = mvar.group(1)
-            found, native_val = _lookup_native_variable_value(env_rows, var_name)
-            if found:
-                logger.debug(
-                    "Variable interpolation (native): %s -> %s",
-                    _preview(obj),
-                    _preview(native_val),
-                )
-                return native_val
-
-        out = interpolate_vars(expression=obj, data=env_rows)
-        if out != obj:
-            logger.debug("Variable interpolation: %s -> %s", _preview(obj), _preview(out))
-        return out
-    if isinstance(obj, dict):
-        return {k: _interpolate_obj(v, env_rows) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_interpolate_obj(v, env_rows) for v in obj]
-    return obj
-
-def _apply_transform(obj, transformer):
-    """
-    Recursively apply a transformer(str -> Any) to all string leaves in obj.
-    """
-    if isinstance(obj, str):
-        return transformer(obj)
-    if isinstance(obj, dict):
-        return {k: _apply_transform(v, transformer) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_apply_transform(v, transformer) for v in obj]
-    return obj
-
-def apply_restapi_constants(obj):
-    """
-    Replace any string equal to a RESTAPI constant reference like "$RESPONSE_BODY"
-    with the corresponding value from constants.RESTAPI. Traverses dicts/lists.
-    """
-    if isinstance(obj, str):
-        s_strip = obj.strip()
-        if s_strip.startswith("$") and len(s_strip) > 1:
-            name = s_strip[1:]
-            val = getattr(RESTAPI, name, obj)
-            logger.debug("RESTAPI constant: %s -> %s", obj, _preview(val))
-            return val
-        return obj
-    if isinstance(obj, dict):
-        return {k: apply_restapi_constants(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [apply_restapi_constants(v) for v in obj]
-    return obj
-
-def apply_base64_transforms(obj):
-    """
-    Apply base64 encode/decode transforms across all string leaves.
-    """
-    return _apply_transform(obj, _transform_base64_string)
-
-def apply_jq_transforms(obj):
-    """
-    Apply jq_expression('<filter>', <json-literal | $RESTAPI_CONST>) across all string leaves.
-    """
-    return _apply_transform(obj, _transform_jq_string)
-
-def _transform_base64_string(s: str) -> Any:
-    """
-    Apply base64 encode/decode transforms if s matches the unified regex patterns.
-    Assumes variable interpolation already occurred earlier in the pipeline.
-    """
-    s_strip = s.strip()
-
-    # Base64 encode
-    m = re.fullmatch(COMMON.BASE64_ENCODE_REGEX, s_strip)
-    if m:
-        groups = m.groups()
-        content = next((g for g in groups if g is not None), "")
-        content = content.strip()
-        res = encode_base64(content)
-        logger.debug("Base64 encode: %s -> %s", _preview(content), _preview(res))
-        return res
-
-    # Base64 decode
-    m = re.fullmatch(COMMON.BASE64_DECODE_REGEX, s_strip)
-    if m:
-        groups = m.groups()
-        b64_text = next((g for g in groups if g is not None), "")
-        b64_text = b64_text.strip()
-        res = decode_base64(b64_text)
-        logger.debug("Base64 decode: %s -> %s", _preview(b64_text), _preview(res))
-        return res
-
-    return s
-
-def _transform_jq_string(s: str) -> Any:
-    """
-    Apply jq_expression('<filter>', <json-literal | $RESTAPI_CONST>) if present.
-    """
-    s_strip = s.strip()
-    m = re.fullmatch(COMMON.JQ_EXPRESSION_REGEX, s_strip)
-    if not m:
-        return s
-
-    groups = m.groups()
-    try:
-        jq_filter = groups[1]
-        data_src = groups[2].strip()
-    except IndexError:
-        # Fallback for older regex with 2 groups (filter, data)
-        jq_filter = groups[0] if len(groups) > 0 else ""
-        data_src = groups[1].strip() if len(groups) > 1 else ""
-
-    # Resolve RESTAPI constants (e.g., $RESPONSE_BODY) in the data argument
-    data_val = apply_restapi_constants(data_src)
-    logger.debug("JQ before: filter=%r, data=%s", jq_filter, _preview(data_val))
-
-    # If still a string, try to parse JSON literal or strip outer quotes
-    if isinstance(data_val, str):
-        try:
-            if data_val and (data_val[0] in "{[\"'"):
-                if (data_val[0] in "\"'" and data_val[-1] == data_val[0]):
-                    data_val = data_val[1:-1]
-                else:
-                    data_val = json.loads(data_val)
-        except Exception:
-            pass
-
-    _res = jqinterpolation.jqinterpolate(expression=jq_filter, json_input=data_val)
-    logger.debug("JQ after: result=%s", _preview(_res))
-    if isinstance(_res, list) and len(_res) == 1:
-        return _res[0]
-    return _res
-
-
-def resolve_interpolations(obj, env_rows):
-    """
-    Iteratively resolve interpolations in the order:
-      1) Variable interpolation ({{VAR}})
-      2) RESTAPI constant references ($RESPONSE_BODY, etc.)
-      3) Base64 transforms (encode/decode)
-      4) JQ expression transforms
-    """
-    logger.debug("Resolve start: %s", _preview(obj))
-    # 1) Variables
-    var_pass = _interpolate_obj(obj, env_rows)
-    logger.debug("After variables: %s", _preview(var_pass))
-    # 2) RESTAPI constants (bare $NAME)
-    const_pass = apply_restapi_constants(var_pass)
-    logger.debug("After RESTAPI constants: %s", _preview(const_pass))
-    # 3) Base64
-    b64_pass = apply_base64_transforms(const_pass)
-    logger.debug("After base64: %s", _preview(b64_pass))
-    # 4) JQ
-    jq_pass = apply_jq_transforms(b64_pass)
-    logger.debug("After jq: %s", _preview(jq_pass))
-    return jq_pass
-
-
 def _to_httpx_form_data(form_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Convert dict-based form data into an httpx-compatible mapping.
@@ -262,27 +68,10 @@ def _to_httpx_files(files_in: list[Any]) -> list[tuple[str, tuple[Any, ...]]]:
             files.append((field_name, (filename, bytes(content))))
     return files
 
-def restapiCall(request: RestAPIIn):
-
-    logger.info("Invoking RestAPI")
-    logger.debug(f"method: {request.method}")
-    logger.debug(f"url: {request.url}")
-    logger.debug(f"session: {request.session}")
-    logger.debug(f"environment: {request.environment}")
-    logger.debug(f"action: {request.action}")
-    logger.debug(f"request_headers: {request.request_headers}")
-    logger.debug(f"request_body: {request.request_body}")
-    logger.debug(f"request_form_data: {request.request_form_data}")
-    logger.debug(f"request_files count: {len(request.request_files or [])}")
-    logger.debug(f"post_script: {request.post_script}")
-
-    # Loading environment variables
-    # NOTE: We resolve interpolations for `session` and `environment` as well.
-    # For `environment`, we must first load its variables using the raw value,
-    # then re-resolve against those variables (so env name can reference its own vars).
-    environment_raw = request.environment
-    environment_details = listAllVariableByEnvironment(environment_raw)
-
+def _resolve_session(request: RestAPIIn, environment_details: TemplateScope) -> None:
+    """
+    Resolve session/environment in place; the session keys the execution context.
+    """
     # Resolve session/environment using the loaded environment variables
     try:
         # session
@@ -291,7 +80,7 @@ def restapiCall(request: RestAPIIn):
             session_resolved = str(session_resolved)
         if session_resolved is not None:
             request.session = session_resolved
-        logger.debug(f"resolved session: {request.session}")
+        logger.debug("resolved session: %s", request.session)
 
         # environment
         env_resolved = resolve_interpolations(request.environment, environment_details)
@@ -299,11 +88,17 @@ def restapiCall(request: RestAPIIn):
             env_resolved = str(env_resolved)
         if env_resolved is not None:
             request.environment = env_resolved
-        logger.debug(f"resolved environment: {request.environment}")
+        logger.debug("resolved environment: %s", request.environment)
     except Exception as e:
         logger.error("Failed to interpolate session/environment: %s", e)
         raise
 
+def _resolve_request(request: RestAPIIn, environment_details: TemplateScope) -> None:
+    """
+    Resolve interpolations for every other request component in place.
+
+    CPU-bound (regex, base64, jq); restapiCall runs it in a worker thread.
+    """
     # Interpolate URL, headers, body, and form data using environment variables (safe; no Python eval)
     try:
         # Resolve interpolations iteratively: variables -> RESTAPI constants -> base64 -> jq
@@ -311,14 +106,16 @@ def restapiCall(request: RestAPIIn):
         if not isinstance(url_resolved, str):
             url_resolved = str(url_resolved)
         request.url = url_resolved
-        logger.debug(f"interpolated url: {request.url}")
+        logger.debug("interpolated url: %s", preview(request.url))
+        check_deadline("interpolation")
 
         headers_resolved = resolve_interpolations(request.request_headers or {}, environment_details)
         if not isinstance(headers_resolved, dict):
             logger.info("Resolved headers not a dict; defaulting to empty dict")
             headers_resolved = {}
         request.request_headers = cast(Dict[str, Any], headers_resolved)
-        logger.debug(f"resolved request_headers: {request.request_headers}")
+        logger.debug("resolved request_headers: %s", preview(request.request_headers))
+        check_deadline("interpolation")
 
         raw_body = getattr(request, "request_body", None)
 
@@ -328,7 +125,7 @@ def restapiCall(request: RestAPIIn):
             mvar = re.fullmatch(COMMON.BRACED_VARIABLE_REGEX, raw_body.strip())
             if mvar and (mvar.lastindex or 0) >= 1:
                 var_name = mvar.group(1)
-                var_row = next((r for r in (environment_details or []) if isinstance(r, dict) and r.get("variable") == var_name), None)
+                var_row = next((r for r in environment_details.env_rows if isinstance(r, dict) and r.get("variable") == var_name), None)
                 if var_row is not None:
                     val = var_row.get("value")
                     # Keep dict/list as-is; decode strings that look like JSON/scalars
@@ -347,14 +144,15 @@ def restapiCall(request: RestAPIIn):
             parsed = str(parsed)
 
         request.request_body = parsed
-        logger.debug(f"resolved request_body: {request.request_body}")
+        logger.debug("resolved request_body: %s", preview(request.request_body))
+        check_deadline("interpolation")
 
         form_data_resolved = resolve_interpolations(request.request_form_data or {}, environment_details)
         if not isinstance(form_data_resolved, dict):
             logger.info("Resolved form data not a dict; defaulting to empty form data")
             form_data_resolved = {}
         request.request_form_data = cast(Dict[str, Any], form_data_resolved)
-        logger.debug(f"resolved request_form_data: {request.request_form_data}")
+        logger.debug("resolved request_form_data: %s", preview(request.request_form_data))
 
         # Interpolate file metadata (field name, file name, content type). File bytes are not interpolated.
         for f in (request.request_files or []):
@@ -371,6 +169,204 @@ def restapiCall(request: RestAPIIn):
         logger.error("Failed to interpolate request components: %s", e)
         raise
 
+def _evaluate_post_script(post_script: Dict[str, Any], environment_details: TemplateScope) -> Dict[str, Any]:
+    """
+    Evaluate post_script expressions and return {variable_name: value}.
+    """
+    outputs: Dict[str, Any] = {}
+    for key, expr in post_script.items():
+        try:
+            # Evaluate expression with iterative interpolation (vars -> RESTAPI consts -> base64 -> jq)
+            value = resolve_interpolations(expr, environment_details)
+            # Extract variable name from {{NEW_VARIABLE}} or use key as-is (robust to missing capture groups)
+            mvar = re.fullmatch(COMMON.BRACED_VARIABLE_REGEX, str(key))
+            if mvar and (mvar.lastindex or 0) >= 1:
+                var_name = mvar.group(1)
+            else:
+                var_name = str(key)
+            outputs[var_name] = value
+        except Exception as exc:
+            logger.error("post_script evaluation failed for key %r: %s", key, exc)
+    return outputs
+
+def _retry_policy(request: RestAPIIn, environment_details: TemplateScope) -> RetryPolicy:
+    """Server defaults, then the environment's RESTAPI_RETRY variable, then the call's `retry` block."""
+    policy = RetryPolicy.defaults()
+    env_value = decode_value_if_json(environment_details.merged.get(COMMON.RETRY_ENV_VARIABLE))
+    if isinstance(env_value, dict):
+        try:
+            policy = policy.merged(RestAPIRetryIn.model_validate(env_value).model_dump(exclude_none=True))
+        except Exception as exc:
+            logger.error("Ignoring invalid %s variable: %s", COMMON.RETRY_ENV_VARIABLE, exc)
+    if request.retry is not None:
+        policy = policy.merged(request.retry.model_dump(exclude_none=True))
+    return policy
+
+
+def _with_attempts(
+    snapshot: Dict[str, Any],
+    attempts: List[Dict[str, Any]],
+    cache_status: Optional[str] = None,
+    coalesced: bool = False,
+) -> Dict[str, Any]:
+    # Large bodies are stored as a preview (TRANSACTION_BODY_MAX_BYTES)
+    if "body" in snapshot:
+        snapshot = {**snapshot, "body": truncate_for_storage(snapshot["body"])}
+    # Retried calls keep every attempt in the transaction's response snapshot
+    if len(attempts) > 1:
+        snapshot = {**snapshot, "attempts": attempts}
+    # Responses served from the HTTP cache are marked as such
+    if cache_status in ("HIT", "REVALIDATED"):
+        snapshot = {**snapshot, "cache": cache_status}
+    # ...and so are responses shared with an identical concurrent call
+    if coalesced:
+        snapshot = {**snapshot, "coalesced": True}
+    return snapshot
+
+
+def _cache_mode(request: RestAPIIn, has_form: bool) -> str:
+    """The call's cache mode; only plain GETs are cached."""
+    if request.method.upper() != "GET" or has_form:
+        return "off"
+    mode = request.cache or COMMON.HTTP_CACHE_MODE or "off"
+    return mode if mode in CACHE_MODES else "off"
+
+
+def _http_timeout(request: RestAPIIn) -> httpx.Timeout:
+    """The call's connect/read/write/pool timeouts; unset phases use DEFAULT_HTTP_TIMEOUT."""
+    t = request.timeout
+    default = COMMON.DEFAULT_HTTP_TIMEOUT
+    if t is None:
+        return httpx.Timeout(default)
+    return httpx.Timeout(
+        default,
+        connect=t.connect or default,
+        read=t.read or default,
+        write=t.write or default,
+        pool=t.pool or default,
+    )
+
+
+def _cap_timeout(timeout: httpx.Timeout, budget: float) -> httpx.Timeout:
+    """No phase of an attempt may outlast the attempt's remaining time budget."""
+    def cap(value: Optional[float]) -> float:
+        return budget if value is None else min(value, budget)
+    return httpx.Timeout(
+        connect=cap(timeout.connect),
+        read=cap(timeout.read),
+        write=cap(timeout.write),
+        pool=cap(timeout.pool),
+    )
+
+
+async def _complete_transaction(
+    transactions: Optional[TransactionBatch], txn_id: str, response_snapshot: Any, status: str, timing: CallTiming
+) -> None:
+    columns = timing.columns()
+    if transactions is not None:
+        transactions.update(txn_id, response_snapshot, status, columns)
+    else:
+        await updateTransactionAsync(transactionId=txn_id, response_snapshot=response_snapshot, status=status, timing=columns)
+
+
+def _set_snapshot_variable(rows: List[Dict[str, Any]], environment: str, variable: str, value: Any) -> None:
+    """Write a post_script output into a batch's variable snapshot, as it reads back from storage."""
+    value = decode_value_if_json(encode_value_for_storage(value))
+    for r in rows:
+        if r.get("variable") == variable:
+            r["value"] = value
+            return
+    rows.append({"environment": environment, "variable": variable, "value": value})
+
+
+async def restapiCall(
+    request: RestAPIIn,
+    variables: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    transactions: Optional[TransactionBatch] = None,
+) -> RestAPIOut:
+    """
+    Execute one REST API call.
+
+    `variables` (environment -> rows) is a variable snapshot shared by the
+    calls of a batch: environments are loaded into it once and post_script
+    outputs are written back to it. `transactions` buffers the transaction
+    rows for one bulk write instead of writing each row as it changes.
+
+    The call runs within the caller's deadline (see utils/deadline), tightened
+    by its own `timeout.deadline`; interpolation, admission, retries and the
+    downstream I/O are cancelled with DeadlineExceeded once it passes.
+    Whether the call's DEBUG records are logged is sampled once here
+    (LOG_SAMPLE_RATE). The transaction records the call's latency breakdown
+    (see utils/calltiming).
+    """
+    timing = CallTiming()
+    with sample_call(), deadline_scope(request.timeout.deadline if request.timeout else None):
+        return await _restapiCall(request, variables, transactions, timing)
+
+
+async def _restapiCall(
+    request: RestAPIIn,
+    variables: Optional[Dict[str, List[Dict[str, Any]]]],
+    transactions: Optional[TransactionBatch],
+    timing: CallTiming,
+) -> RestAPIOut:
+    check_deadline("environment loading")
+
+    logger.info("Invoking RestAPI")
+    if debug_enabled():
+        logger.debug("method: %s", request.method)
+        logger.debug("url: %s", preview(request.url))
+        logger.debug("session: %s", request.session)
+        logger.debug("environment: %s", request.environment)
+        logger.debug("action: %s", request.action)
+        logger.debug("request_headers: %s", preview(request.request_headers))
+        logger.debug("request_body: %s", preview(request.request_body))
+        logger.debug("request_form_data: %s", preview(request.request_form_data))
+        logger.debug("request_files count: %d", len(request.request_files or []))
+        logger.debug("post_script: %s", preview(request.post_script))
+
+    # Loading environment variables
+    # NOTE: We resolve interpolations for `session` and `environment` as well.
+    # For `environment`, we must first load its variables using the raw value,
+    # then re-resolve against those variables (so env name can reference its own vars).
+    environment_raw = request.environment
+    with timing.phase("storage"):
+        if variables is None:
+            env_rows = await listAllVariableByEnvironmentAsync(environment_raw)
+        else:
+            if environment_raw not in variables:
+                variables[environment_raw] = await listAllVariableByEnvironmentAsync(environment_raw)
+            env_rows = variables[environment_raw]
+    with timing.phase("interpolation"):
+        environment_details = TemplateScope(env_rows)
+        _resolve_session(request, environment_details)
+
+    # $REQUEST_*/$RESPONSE_*/$PREVIOUS_* are per call, continuing from this session's last call
+    sessions = get_session_store()
+    with timing.phase("storage"):
+        last = await sessions.get_async(request.session)
+    ctx = ExecutionContext.for_session(request.session, last)
+    with use_context(ctx):
+        try:
+            return await _execute(request, environment_details, ctx, variables, transactions, timing)
+        finally:
+            await sessions.put_async(ctx)
+
+
+async def _execute(
+    request: RestAPIIn,
+    environment_details: TemplateScope,
+    ctx: ExecutionContext,
+    variables: Optional[Dict[str, List[Dict[str, Any]]]],
+    transactions: Optional[TransactionBatch],
+    timing: CallTiming,
+) -> RestAPIOut:
+    # Interpolation is CPU-bound (regex/base64/jq); keep it off the event loop.
+    # asyncio.to_thread copies the current context, so the worker sees `ctx`.
+    # The worker thread checks the deadline between request components.
+    with timing.phase("interpolation"):
+        await run_within_deadline(asyncio.to_thread(_resolve_request, request, environment_details), "interpolation")
+
     # Create transaction record and perform the HTTP request via utility switch
     # Coerce headers to str->str mapping for httpx
     send_headers: Dict[str, str] = {str(k): str(v) for k, v in (request.request_headers or {}).items()}
@@ -399,12 +395,9 @@ def restapiCall(request: RestAPIIn):
         ],
     }
 
-    # Populate RESTAPI request constants and snapshot previous response
-    RESTAPI.PREVIOUS_RESPONSE_BODY = getattr(RESTAPI, "RESPONSE_BODY", None)
-    RESTAPI.PREVIOUS_HTTP_STATUS_CODE = getattr(RESTAPI, "RESPONSE_HTTP_STATUS_CODE", None)
-    RESTAPI.REQUEST_HEADERS = send_headers
+    # Populate request constants and snapshot previous response
     if (request.request_form_data or {}) or (request.request_files or []):
-        RESTAPI.REQUEST_BODY = {
+        request_body_constant: Any = {
             "body": request.request_body,
             "form_data": request.request_form_data,
             "files": [
@@ -417,83 +410,209 @@ def restapiCall(request: RestAPIIn):
             ],
         }
     else:
-        RESTAPI.REQUEST_BODY = request.request_body
+        request_body_constant = request.request_body
+    ctx.begin_request(send_headers, request_body_constant)
 
     txn_id: Optional[str] = None
+    attempts: List[Dict[str, Any]] = []
+    cache_status: Optional[str] = None
+    coalesced = False
     try:
-        created_txn = createTransaction(
-            session=request.session,
-            action=request.action,
-            http_method=request.method,
-            request_snapshot=request_snapshot,
-        )
+        with timing.phase("storage"):
+            if transactions is not None:
+                created_txn = transactions.create(request.session, request.action, request.method, request_snapshot)
+            else:
+                created_txn = await createTransactionAsync(
+                    session=request.session,
+                    action=request.action,
+                    http_method=request.method,
+                    request_snapshot=request_snapshot,
+                )
         txn_id = created_txn["transactionId"]
 
-        response = http_request(
-            method=request.method,
-            url=request.url,
-            headers=send_headers,
-            body=request.request_body,
-            form_data=send_form_data,
-            files=send_files,
+        limits = limits_from_config(
+            request.url,
+            decode_value_if_json(environment_details.merged.get(COMMON.RATE_LIMIT_ENV_VARIABLE)),
         )
 
+        policy = _retry_policy(request, environment_details)
+        http_timeout = _http_timeout(request)
+        stream_response = request.stream_response if request.stream_response is not None else COMMON.RESPONSE_STREAMING
+
+        async def fetch_once(headers: Dict[str, str]) -> Dict[str, Any]:
+            async def send(timeout: float) -> Dict[str, Any]:
+                # Every attempt waits for an admission slot on the downstream origin,
+                # then fails fast while the origin's circuit is open
+                async with admit(request.url, limits, request.environment), circuit(request.url) as outcome:
+                    response = await http_request_async(
+                        method=request.method,
+                        url=request.url,
+                        headers=headers,
+                        body=request.request_body,
+                        form_data=send_form_data,
+                        files=send_files,
+                        timeout=_cap_timeout(http_timeout, timeout),
+                        stream=stream_response,
+                        timing=timing,
+                    )
+                    outcome.status(response.get("status"))
+                    return response
+
+            return await send_with_retry(
+                send,
+                method=request.method,
+                headers=headers,
+                policy=policy,
+                timeout=max(v for v in (http_timeout.connect, http_timeout.read, http_timeout.write, http_timeout.pool) if v),
+                attempts=attempts,
+                deadline=current_deadline(),
+            )
+
+        async def fetch(headers: Dict[str, str]) -> Dict[str, Any]:
+            nonlocal coalesced
+            key = None
+            if COMMON.SINGLE_FLIGHT_ENABLED and not (send_form_data or send_files):
+                key = flight_key(
+                    request.method, request.url, headers, request.request_body, "stream" if stream_response else ""
+                )
+            if key is None:
+                return await fetch_once(headers)
+            # Identical concurrent calls share one downstream request
+            shared_response, coalesced = await get_single_flight().do(key, lambda: fetch_once(headers))
+            return dict(shared_response) if coalesced else shared_response
+
+        cache_mode = _cache_mode(request, bool(send_form_data or send_files))
+        with timing.phase("downstream"):
+            if cache_mode == "off":
+                response = await run_within_deadline(fetch(send_headers), "downstream call")
+            else:
+                # Cache hits skip admission and retries; revalidations go through both
+                response, cache_status = await run_within_deadline(
+                    fetch_with_cache(request.url, send_headers, cache_mode, fetch), "downstream call"
+                )
+
         status_code = int(response.get("status", 0))
         final_status = "SUCCESS" if 200 <= status_code < 400 else "FAILED"
         if txn_id is None:
             raise RuntimeError("Transaction ID not set")
-        updateTransaction(transactionId=txn_id, response_snapshot=response, status=final_status)
+        timing.retry_count = max(0, len(attempts) - 1)
+        await _complete_transaction(
+            transactions, txn_id, _with_attempts(response, attempts, cache_status, coalesced), final_status, timing
+        )
     except Exception as e:
         # Attempt to update transaction with error, then re-raise
         try:
             if txn_id is not None:
-                updateTransaction(transactionId=txn_id, response_snapshot={"error": str(e)}, status="ERROR")
+                timing.retry_count = max(0, len(attempts) - 1)
+                await _complete_transaction(transactions, txn_id, _with_attempts({"error": str(e)}, attempts), "ERROR", timing)
         except Exception as upd_exc:
             logger.error("Failed to update transaction on error: %s", upd_exc)
         logger.error("HTTP request failed: %s", e)
-        # Populate RESTAPI response constants with error info
-        RESTAPI.RESPONSE_HTTP_STATUS_CODE = None
-        RESTAPI.RESPONSE_HEADERS = {}
-        RESTAPI.RESPONSE_BODY = {"error": str(e)}
+        # Populate response constants with error info
+        ctx.set_response(None, {}, {"error": str(e)})
         raise
 
     logger.info("RestAPI Call Executed Successfully")
     # Coerce header values like "true"/"null"/numbers to native types for response consistency
     resp_headers: Dict[str, Any] = {k: decode_value_if_json(v) for k, v in (response.get("headers", {}) or {}).items()}
 
-    # Populate RESTAPI response constants
-    RESTAPI.RESPONSE_HTTP_STATUS_CODE = response["status"]
-    RESTAPI.RESPONSE_HEADERS = resp_headers
-    RESTAPI.RESPONSE_BODY = response["body"]
+    # Populate response constants
+    ctx.set_response(response["status"], resp_headers, response["body"])
 
     # Execute post_script only on SUCCESS
     if isinstance(response["status"], int) and 200 <= response["status"] < 400:
         post_script = getattr(request, "post_script", None)
         if isinstance(post_script, dict) and post_script:
-            outputs: Dict[str, Any] = {}
-            for key, expr in post_script.items():
-                try:
-                    # Evaluate expression with iterative interpolation (vars -> RESTAPI consts -> base64 -> jq)
-                    value = resolve_interpolations(expr, environment_details)
-                    # Extract variable name from {{NEW_VARIABLE}} or use key as-is (robust to missing capture groups)
-                    mvar = re.fullmatch(COMMON.BRACED_VARIABLE_REGEX, str(key))
-                    if mvar and (mvar.lastindex or 0) >= 1:
-                        var_name = mvar.group(1)
-                    else:
-                        var_name = str(key)
-                    outputs[var_name] = value
-                except Exception as exc:
-                    logger.error("post_script evaluation failed for key %r: %s", key, exc)
-            
+            outputs = await asyncio.to_thread(_evaluate_post_script, post_script, environment_details)
+
             # Upsert evaluated variables into the environment
             for var_name, out_val in outputs.items():
                 try:
-                    upsertEnvironmentVariable(request.environment, var_name, out_val)
+                    await upsertEnvironmentVariableAsync(request.environment, var_name, out_val)
                 except Exception as exc:
                     logger.error("Failed to upsert post_script variable %r: %s", var_name, exc)
+                    continue
+                if variables is not None and request.environment in variables:
+                    _set_snapshot_variable(variables[request.environment], request.environment, var_name, out_val)
 
     return RestAPIOut(
         response_status=response["status"],
         response_headers=resp_headers,
         response_body=response["body"],
     )
+
+
+async def _run_batch(batch: RestAPIBatchIn, timeout: Optional[float] = None) -> AsyncIterator[RestAPIBatchItemOut]:
+    """
+    Execute batch items and yield each result as it completes.
+
+    All items share one variable snapshot (loaded once per environment) and
+    one transaction buffer that is written with a single bulk insert at the
+    end; downstream calls reuse the pooled keep-alive clients. `timeout` is the
+    caller's deadline for the whole batch; every item inherits it.
+    """
+    # Set here rather than by the caller: a streamed batch runs after the route returned
+    with deadline_scope(timeout):
+        async for out in _run_batch_items(batch):
+            yield out
+
+
+def _item_failed(out: RestAPIBatchItemOut) -> bool:
+    # An item fails when it raised or its transaction ended FAILED (downstream status outside 200-399)
+    if not out.ok or out.result is None:
+        return True
+    status = out.result.response_status
+    return not (isinstance(status, int) and 200 <= status < 400)
+
+
+async def _run_batch_items(batch: RestAPIBatchIn) -> AsyncIterator[RestAPIBatchItemOut]:
+    variables: Dict[str, List[Dict[str, Any]]] = {}
+    transactions = TransactionBatch()
+
+    async def run(index: int, item: RestAPIIn) -> RestAPIBatchItemOut:
+        try:
+            result = await restapiCall(item, variables=variables, transactions=transactions)
+            return RestAPIBatchItemOut(index=index, ok=True, result=result)
+        except Exception as exc:
+            logger.error("Batch item %d failed: %s", index, exc)
+            return RestAPIBatchItemOut(index=index, ok=False, error=str(exc))
+
+    logger.info("Invoking RestAPI batch: %d item(s), mode=%s", len(batch.items), batch.mode)
+    try:
+        if batch.mode == "parallel":
+            limit = asyncio.Semaphore(batch.concurrency)
+
+            async def bounded(index: int, item: RestAPIIn) -> RestAPIBatchItemOut:
+                async with limit:
+                    return await run(index, item)
+
+            tasks = [asyncio.create_task(bounded(i, item)) for i, item in enumerate(batch.items)]
+            try:
+                for done in asyncio.as_completed(tasks):
+                    yield await done
+            finally:
+                for t in tasks:
+                    t.cancel()
+        else:
+            failed = False
+            for i, item in enumerate(batch.items):
+                if failed and batch.stop_on_error:
+                    yield RestAPIBatchItemOut(index=i, ok=False, error="skipped: an earlier item failed")
+                    continue
+                out = await run(i, item)
+                failed = failed or _item_failed(out)
+                yield out
+    finally:
+        written = await transactions.flushAsync()
+        logger.debug("Batch transactions written: %d", written)
+
+
+async def restapiBatch(batch: RestAPIBatchIn, timeout: Optional[float] = None) -> List[RestAPIBatchItemOut]:
+    """Execute a batch and return the per-item results in request order."""
+    results = [out async for out in _run_batch(batch, timeout)]
+    return sorted(results, key=lambda out: out.index)
+
+
+def restapiBatchStream(batch: RestAPIBatchIn, timeout: Optional[float] = None) -> AsyncIterator[RestAPIBatchItemOut]:
+    """Execute a batch, yielding per-item results as they complete (request order when sequential)."""
+    return _run_batch(batch, timeout)
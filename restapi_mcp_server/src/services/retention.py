@@ -0,0 +1,178 @@
+"""
+Transaction retention: keeps the hot transaction store small.
+
+Policies (0 disables a policy; both are off by default):
+  - TRANSACTION_RETENTION_DAYS: rows created longer ago than this are purged
+  - TRANSACTION_MAX_ROWS: only the newest rows are kept
+
+PENDING rows (calls still in flight) are never purged. Purged rows are moved
+into gzip'd JSON Lines segments per creation date under STORAGE/archive
+(utils/archivestore) unless TRANSACTION_ARCHIVE is off, and remain queryable
+through queryArchivedTransactions().
+
+With a policy set, a background thread purges at startup and every
+TRANSACTION_PURGE_INTERVAL seconds; purgeTransactions() runs one purge on demand.
+"""
+from ..utils.logger import setup_logging
+from ..utils.persist import delete_rows_in, read_rows_in, scan_rows
+from ..utils.archivestore import get_transaction_archive
+from ..utils.filelock import FileLock
+from ..constants import COMMON
+from .transactions import _decode_row
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+import threading
+
+logger = setup_logging()
+
+_purge_lock = threading.Lock()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _created_at(row: Dict[str, Any]) -> Optional[datetime]:
+    try:
+        created = datetime.fromisoformat(str(row.get("creation_dt")))
+    except (TypeError, ValueError):
+        return None
+    return created if created.tzinfo else created.replace(tzinfo=timezone.utc)
+
+
+# Rows read per storage query, and archived and deleted per write, during a purge
+PURGE_BATCH_ROWS = 1000
+_PURGE_ORDER = ("creation_dt", "transactionId")
+
+
+def _count_rows() -> int:
+    return sum(
+        len(batch)
+        for batch in scan_rows(COMMON.FileType.TRANSACTION, _PURGE_ORDER, columns=["status"], batch_size=PURGE_BATCH_ROWS)
+    )
+
+
+def _remove(ids: List[str]) -> Tuple[int, int]:
+    """Archive (if enabled) and delete the rows with these ids; returns (archived, deleted)."""
+    archived = 0
+    if COMMON.TRANSACTION_ARCHIVE:
+        archived = get_transaction_archive().append(read_rows_in(COMMON.FileType.TRANSACTION, "transactionId", ids))
+    return archived, delete_rows_in(COMMON.FileType.TRANSACTION, "transactionId", ids)
+
+
+def purgeTransactions() -> Dict[str, Any]:
+    """
+    Apply the retention policies once: archive (if enabled) and delete the
+    expired rows. Returns {"examined", "archived", "deleted"}.
+
+    Rows are scanned oldest first reading only their id, status and
+    creation_dt; full rows are read just for the expired ids, one batch of
+    PURGE_BATCH_ROWS at a time, to archive them before they are deleted.
+    Purges of other worker processes are excluded by a lock file, so a row
+    is archived once.
+    """
+    if not _retention_enabled():
+        return {"examined": 0, "archived": 0, "deleted": 0}
+    with _purge_lock, FileLock(Path(COMMON.STORAGE) / COMMON.ARCHIVE_DIR / ".purge.lock"):
+        cutoff = None
+        if COMMON.TRANSACTION_RETENTION_DAYS > 0:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=COMMON.TRANSACTION_RETENTION_DAYS)
+        # Rows over TRANSACTION_MAX_ROWS: the oldest non-PENDING rows go, as well as any older than the cutoff
+        excess = _count_rows() - COMMON.TRANSACTION_MAX_ROWS if COMMON.TRANSACTION_MAX_ROWS > 0 else 0
+        examined = archived = deleted = expired = 0
+        done = False
+        for batch in scan_rows(
+            COMMON.FileType.TRANSACTION,
+            _PURGE_ORDER,
+            # Age policy alone: rows created after the cutoff are not read
+            upper=cutoff.isoformat() if cutoff is not None and excess <= 0 else None,
+            columns=["status"],
+            batch_size=PURGE_BATCH_ROWS,
+        ):
+            ids: List[str] = []
+            for row in batch:
+                created = _created_at(row)
+                if expired >= excess and (cutoff is None or (created is not None and created >= cutoff)):
+                    # Rows come oldest first, so no later row is expired either
+                    done = True
+                    break
+                examined += 1
+                if row.get("status") == "PENDING":
+                    continue
+                if expired < excess or (cutoff is not None and created is not None and created < cutoff):
+                    ids.append(row["transactionId"])
+                    expired += 1
+            if ids:
+                batch_archived, batch_deleted = _remove(ids)
+                archived += batch_archived
+                deleted += batch_deleted
+            if done:
+                break
+        if deleted:
+            logger.info("Transaction retention: archived %d, deleted %d of %d examined row(s)", archived, deleted, examined)
+        return {"examined": examined, "archived": archived, "deleted": deleted}
+
+
+def queryArchivedTransactions(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = 1000,
+    **equals: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Archived transactions created between date_from and date_to (inclusive,
+    UTC dates) whose columns equal `equals`, oldest first, at most `limit`.
+    """
+    found: List[Dict[str, Any]] = []
+    for row in get_transaction_archive().iter_rows(date_from, date_to):
+        if all(row.get(col) == val for col, val in equals.items()):
+            found.append(_decode_row(row))
+            if len(found) >= limit:
+                break
+    return found
+
+
+def listArchiveSegments() -> List[Dict[str, Any]]:
+    """Archive segments: [{"date", "file", "bytes"}] in date order."""
+    return get_transaction_archive().segments()
+
+
+def _retention_enabled() -> bool:
+    return COMMON.TRANSACTION_RETENTION_DAYS > 0 or COMMON.TRANSACTION_MAX_ROWS > 0
+
+
+def _purge_loop() -> None:
+    # First purge at startup, then every TRANSACTION_PURGE_INTERVAL seconds
+    while True:
+        try:
+            purgeTransactions()
+        except Exception as exc:
+            logger.error("Transaction retention purge failed: %s", exc)
+        if _stop.wait(COMMON.TRANSACTION_PURGE_INTERVAL):
+            return
+
+
+def startRetention() -> bool:
+    """Start the background purge if a retention policy is set; returns whether it runs."""
+    global _thread
+    if not _retention_enabled():
+        return False
+    if _thread is not None and _thread.is_alive():
+        return True
+    _stop.clear()
+    _thread = threading.Thread(target=_purge_loop, name="transaction-retention", daemon=True)
+    _thread.start()
+    logger.info(
+        "Transaction retention: max age %s day(s), max rows %s, every %ss",
+        COMMON.TRANSACTION_RETENTION_DAYS or "-",
+        COMMON.TRANSACTION_MAX_ROWS or "-",
+        COMMON.TRANSACTION_PURGE_INTERVAL,
+    )
+    return True
+
+
+def stopRetention() -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=5.0)
+    _thread = None
@@ -1,43 +1,239 @@
 from ..utils.logger import setup_logging
-from ..utils.persist import filter_rows, read_csv_df, write_csv_df
+from ..utils.persist import COLUMNS, filter_rows, insert_row, insert_rows, page_rows, read_rows, scan_rows, update_rows
+from ..utils import fastjson
 from ..constants import COMMON
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import base64
+import binascii
+import csv
+import io
+import threading
+import zlib
 from ..utils.jsoncodec import decode_value_if_json, encode_value_for_storage
 from ..utils.idgen import generateUUID
+from ..utils.calltiming import TIMING_COLUMNS
 from datetime import datetime, timezone
-import pandas as pd
+import asyncio
+import math
 
 
 logger = setup_logging()
 
+
+def _timing_value(value: Any, kind: type) -> Any:
+    # CSV storage returns numbers as text and empty cells as NaN
+    if value is None or value == "" or (isinstance(value, float) and math.isnan(value)):
+        return None
+    try:
+        return kind(float(value)) if kind is int else kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _decode_row(r: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode request/response JSON (and their nested headers) stored as strings.
+
+    Only the columns present in `r` are decoded (projected rows may lack them).
+    Timing columns are returned as numbers (None when not recorded).
+    """
+    for col in ("request", "response"):
+        if col not in r:
+            continue
+        r[col] = decode_value_if_json(r.get(col))
+        if isinstance(r[col], dict) and "headers" in r[col]:
+            r[col]["headers"] = decode_value_if_json(r[col]["headers"])
+    for col, kind in TIMING_COLUMNS.items():
+        if col in r:
+            r[col] = _timing_value(r[col], kind)
+    return r
+
+
 def listAllTransactions() -> List[Dict[str, Any]]:
     """Return all transactions as a list of dicts. Decodes request/response JSON if stored as strings."""
     try:
-        df = read_csv_df(COMMON.FileType.TRANSACTION)
+        rows = read_rows(COMMON.FileType.TRANSACTION)
     except Exception as exc:
         logger.error("Failed to load transaction details: %s", exc)
         raise
-    if df.empty:
-        return []
-    rows: List[Dict[str, Any]] = df.to_dict(orient="records")  # type: ignore
-    for r in rows:
-        r["request"] = decode_value_if_json(r.get("request"))
-        if isinstance(r.get("request"), dict) and "headers" in r["request"]:
-            r["request"]["headers"] = decode_value_if_json(r["request"]["headers"])
-        r["response"] = decode_value_if_json(r.get("response"))
-        if isinstance(r.get("response"), dict) and "headers" in r["response"]:
-            r["response"]["headers"] = decode_value_if_json(r["response"]["headers"])
-    return rows
+    return [_decode_row(r) for r in rows]
 
 
-def createTransaction(session: str, action: str, http_method: str, request_snapshot: Any) -> Dict[str, Any]:
-    """Create a new transaction row with PENDING status and return the created record."""
+# Keyset order of listTransactions(): newest first by default
+_PAGE_ORDER = ("creation_dt", "transactionId")
+PAGE_MAX_LIMIT = 1000
+
+
+def _encode_cursor(row: Dict[str, Any]) -> str:
+    key = [row.get(c) for c in _PAGE_ORDER]
+    return base64.urlsafe_b64encode(fastjson.dumpb(key)).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> List[str]:
     try:
-        df = read_csv_df(COMMON.FileType.TRANSACTION)
-    except Exception as exc:
-        logger.error("Failed to read transactions CSV: %s", exc)
-        raise
+        key = fastjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+    if not isinstance(key, list) or len(key) != len(_PAGE_ORDER):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return [str(v) for v in key]
+
+
+def _check_order_and_fields(order: str, fields: Optional[Sequence[str]]) -> None:
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be 'asc' or 'desc'")
+    if fields is not None:
+        columns = COLUMNS[COMMON.FileType.TRANSACTION]
+        unknown = [f for f in fields if f not in columns]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+
+
+def _equals_filters(
+    session: Optional[str], action: Optional[str], status: Optional[str], http_method: Optional[str]
+) -> Dict[str, str]:
+    return {
+        k: v
+        for k, v in {"session": session, "action": action, "status": status, "http_method": http_method}.items()
+        if v is not None
+    }
+
+
+def _projected_columns(fields: Sequence[str]) -> List[str]:
+    """Columns returned for `fields`: transactionId first, then the fields in order."""
+    return list(dict.fromkeys(["transactionId", *fields]))
+
+
+def _utc_iso(value: Optional[datetime]) -> Optional[str]:
+    """
+    A datetime in the creation_dt format (UTC isoformat(), which drops zero
+    microseconds), so stored values compare correctly as strings.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def listTransactions(
+    session: Optional[str] = None,
+    action: Optional[str] = None,
+    status: Optional[str] = None,
+    http_method: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    order: str = "desc",
+    fields: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    One page of transactions: {"items": [...], "next_cursor": str | None}.
+
+    Filters are exact matches; created_from is inclusive and created_to
+    exclusive. Pages are ordered by (creation_dt, transactionId), newest
+    first unless order="asc"; pass next_cursor back to get the next page.
+    `fields` limits the returned columns (transactionId is always included);
+    request/response are only decoded when requested.
+    """
+    _check_order_and_fields(order, fields)
+    equals = _equals_filters(session, action, status, http_method)
+    limit = max(1, min(int(limit), PAGE_MAX_LIMIT))
+    rows = page_rows(
+        COMMON.FileType.TRANSACTION,
+        _PAGE_ORDER,
+        equals=equals,
+        lower=_utc_iso(created_from),
+        upper=_utc_iso(created_to),
+        after=_decode_cursor(cursor) if cursor else None,
+        descending=order == "desc",
+        # One extra row tells whether there is a next page
+        limit=limit + 1,
+        columns=fields,
+    )
+    more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = _encode_cursor(rows[-1]) if more and rows else None
+    if fields is not None:
+        keep = _projected_columns(fields)
+        rows = [{c: r.get(c) for c in keep} for r in rows]
+    return {"items": [_decode_row(r) for r in rows], "next_cursor": next_cursor}
+
+
+# Rows read from storage per chunk of an export
+EXPORT_BATCH_ROWS = 1000
+EXPORT_FORMATS = ("ndjson", "csv")
+
+
+def exportTransactions(
+    session: Optional[str] = None,
+    action: Optional[str] = None,
+    status: Optional[str] = None,
+    http_method: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    order: str = "asc",
+    fields: Optional[Sequence[str]] = None,
+    fmt: str = "ndjson",
+    compress: bool = False,
+) -> Iterator[bytes]:
+    """
+    Every transaction matching the listTransactions() filters, as an iterator
+    of byte chunks (one per EXPORT_BATCH_ROWS rows), oldest first by default.
+
+    fmt="ndjson" writes one JSON object per line with request/response
+    decoded; fmt="csv" writes a header row and the columns as stored.
+    `compress` gzips the stream. Arguments are checked here (ValueError),
+    before the first chunk is produced.
+    """
+    _check_order_and_fields(order, fields)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    batches = scan_rows(
+        COMMON.FileType.TRANSACTION,
+        _PAGE_ORDER,
+        equals=_equals_filters(session, action, status, http_method),
+        lower=_utc_iso(created_from),
+        upper=_utc_iso(created_to),
+        descending=order == "desc",
+        columns=fields,
+        batch_size=EXPORT_BATCH_ROWS,
+    )
+    keep = _projected_columns(fields) if fields is not None else COLUMNS[COMMON.FileType.TRANSACTION]
+    chunks = _csv_chunks(batches, keep) if fmt == "csv" else _ndjson_chunks(batches, keep)
+    return _gzip_chunks(chunks) if compress else chunks
+
+
+def _ndjson_chunks(batches: Iterator[List[Dict[str, Any]]], keep: Sequence[str]) -> Iterator[bytes]:
+    for rows in batches:
+        yield b"".join(fastjson.dumpb(_decode_row({c: r.get(c) for c in keep}), default=str) + b"\n" for r in rows)
+
 
+def _csv_chunks(batches: Iterator[List[Dict[str, Any]]], keep: Sequence[str]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(keep)
+    for rows in batches:
+        writer.writerows([["" if r.get(c) is None else r.get(c) for c in keep] for r in rows])
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        # Header only: nothing matched
+        yield buf.getvalue().encode("utf-8")
+
+
+def _gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _new_transaction_row(session: str, action: str, http_method: str, request_snapshot: Any) -> Dict[str, Any]:
+    """Build a PENDING transaction row ready for storage."""
     txn_id = str(generateUUID())
     now = datetime.now(timezone.utc).isoformat()
 
@@ -49,7 +245,7 @@ def createTransaction(session: str, action: str, http_method: str, request_snaps
             "headers": encode_value_for_storage(request_snapshot["headers"]),
         }
 
-    row = {
+    return {
         "transactionId": txn_id,
         "session": session,
         "action": action,
@@ -61,14 +257,35 @@ def createTransaction(session: str, action: str, http_method: str, request_snaps
         "last_updation_dt": now,
     }
 
+
+def _completion_values(response_snapshot: Any, status: str, timing: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build the response/status (and timing) columns written when a transaction completes."""
+    now = datetime.now(timezone.utc).isoformat()
+
+    # Encode headers explicitly inside response snapshot before storing
+    response_for_storage = response_snapshot
+    if isinstance(response_snapshot, dict) and "headers" in response_snapshot:
+        response_for_storage = {
+            **response_snapshot,
+            "headers": encode_value_for_storage(response_snapshot["headers"]),
+        }
+
+    return {
+        "response": encode_value_for_storage(response_for_storage),
+        "status": status,
+        "last_updation_dt": now,
+        **{col: (timing or {}).get(col) for col in TIMING_COLUMNS},
+    }
+
+
+def createTransaction(session: str, action: str, http_method: str, request_snapshot: Any) -> Dict[str, Any]:
+    """Create a new transaction row with PENDING status and return the created record."""
+    row = _new_transaction_row(session, action, http_method, request_snapshot)
+
     try:
-        if df.empty:
-            df = pd.DataFrame([row])
-        else:
-            df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-        write_csv_df(df, COMMON.FileType.TRANSACTION)
+        insert_row(COMMON.FileType.TRANSACTION, row)
     except Exception as exc:
-        logger.error("Failed to write transactions CSV (create): %s", exc)
+        logger.error("Failed to write transaction (create): %s", exc)
         raise
 
     # Return a decoded view for request/response
@@ -79,50 +296,30 @@ def createTransaction(session: str, action: str, http_method: str, request_snaps
     }
 
 
-def updateTransaction(transactionId: str, response_snapshot: Any, status: str) -> Dict[str, Any]:
-    """Update an existing transaction's response and status. Returns the updated record."""
+def updateTransaction(
+    transactionId: str, response_snapshot: Any, status: str, timing: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Update an existing transaction's response and status, and its timing
+    columns from `timing` (CallTiming.columns()). Returns the updated record.
+    """
     try:
-        df = read_csv_df(COMMON.FileType.TRANSACTION)
+        updated = update_rows(
+            COMMON.FileType.TRANSACTION,
+            _completion_values(response_snapshot, status, timing),
+            transactionId=transactionId,
+        )
     except Exception as exc:
-        logger.error("Failed to read transactions CSV: %s", exc)
+        logger.error("Failed to write transaction (update): %s", exc)
         raise
 
-    if df.empty or "transactionId" not in df.columns:
-        logger.error("Transactions CSV missing or has no 'transactionId' column")
-        raise KeyError("Transactions CSV not initialized properly")
-
-    mask = df["transactionId"] == transactionId
-    if not mask.any():
+    if updated == 0:
         logger.error("Transaction %s not found", transactionId)
         raise KeyError(f"Transaction {transactionId} not found")
 
-    now = datetime.now(timezone.utc).isoformat()
-    try:
-        # Encode headers explicitly inside response snapshot before storing
-        response_for_storage = response_snapshot
-        if isinstance(response_snapshot, dict) and "headers" in response_snapshot:
-            response_for_storage = {
-                **response_snapshot,
-                "headers": encode_value_for_storage(response_snapshot["headers"]),
-            }
-
-        df.loc[mask, "response"] = encode_value_for_storage(response_for_storage)
-        df.loc[mask, "status"] = status
-        df.loc[mask, "last_updation_dt"] = now
-        write_csv_df(df, COMMON.FileType.TRANSACTION)
-    except Exception as exc:
-        logger.error("Failed to write transactions CSV (update): %s", exc)
-        raise
-
     # Build updated record dict
-    updated_row = df[mask].iloc[0].to_dict()
-    updated_row["request"] = decode_value_if_json(updated_row.get("request"))
-    if isinstance(updated_row.get("request"), dict) and "headers" in updated_row["request"]:
-        updated_row["request"]["headers"] = decode_value_if_json(updated_row["request"]["headers"])
-    updated_row["response"] = decode_value_if_json(updated_row.get("response"))
-    if isinstance(updated_row.get("response"), dict) and "headers" in updated_row["response"]:
-        updated_row["response"]["headers"] = decode_value_if_json(updated_row["response"]["headers"])
-    return updated_row
+    rows = filter_rows(COMMON.FileType.TRANSACTION, transactionId=transactionId)
+    return _decode_row(rows[0])
 
 
 def listSpecificTransaction(transactionId: str) -> List[Dict[str, Any]]:
@@ -132,11 +329,65 @@ def listSpecificTransaction(transactionId: str) -> List[Dict[str, Any]]:
     except Exception as exc:
         logger.error("Failed to get transaction %s: %s", transactionId, exc)
         raise
-    for r in rows:
-        r["request"] = decode_value_if_json(r.get("request"))
-        if isinstance(r.get("request"), dict) and "headers" in r["request"]:
-            r["request"]["headers"] = decode_value_if_json(r["request"]["headers"])
-        r["response"] = decode_value_if_json(r.get("response"))
-        if isinstance(r.get("response"), dict) and "headers" in r["response"]:
-            r["response"]["headers"] = decode_value_if_json(r["response"]["headers"])
-    return rows
+    return [_decode_row(r) for r in rows]
+
+
+async def createTransactionAsync(session: str, action: str, http_method: str, request_snapshot: Any) -> Dict[str, Any]:
+    """createTransaction() run in a worker thread so the event loop is not blocked."""
+    return await asyncio.to_thread(createTransaction, session, action, http_method, request_snapshot)
+
+
+async def updateTransactionAsync(
+    transactionId: str, response_snapshot: Any, status: str, timing: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """updateTransaction() run in a worker thread so the event loop is not blocked."""
+    return await asyncio.to_thread(updateTransaction, transactionId, response_snapshot, status, timing)
+
+
+class TransactionBatch:
+    """
+    Transactions of a batch run, kept in memory and written with one bulk insert.
+
+    create()/update() mirror createTransaction()/updateTransaction() but only
+    touch the buffer; flush() stores every buffered row (already completed)
+    in a single insert_rows() call.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Dict[str, Any]] = {}
+
+    def create(self, session: str, action: str, http_method: str, request_snapshot: Any) -> Dict[str, Any]:
+        row = _new_transaction_row(session, action, http_method, request_snapshot)
+        with self._lock:
+            self._rows[row["transactionId"]] = row
+        return {**row, "request": request_snapshot, "response": None}
+
+    def update(
+        self, transactionId: str, response_snapshot: Any, status: str, timing: Optional[Dict[str, Any]] = None
+    ) -> None:
+        values = _completion_values(response_snapshot, status, timing)
+        with self._lock:
+            row = self._rows.get(transactionId)
+            if row is None:
+                logger.error("Transaction %s not found", transactionId)
+                raise KeyError(f"Transaction {transactionId} not found")
+            row.update(values)
+
+    def flush(self) -> int:
+        """Insert every buffered row; returns the number of rows written."""
+        with self._lock:
+            rows = list(self._rows.values())
+            self._rows.clear()
+        if not rows:
+            return 0
+        try:
+            insert_rows(COMMON.FileType.TRANSACTION, rows)
+        except Exception as exc:
+            logger.error("Failed to write transactions (batch of %d): %s", len(rows), exc)
+            raise
+        return len(rows)
+
+    async def flushAsync(self) -> int:
+        """flush() run in a worker thread so the event loop is not blocked."""
+        return await asyncio.to_thread(self.flush)
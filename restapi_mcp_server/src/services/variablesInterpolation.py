@@ -1,18 +1,111 @@
 from ..utils.interpolation import interpolate
 from ..utils.logger import setup_logging
-from ..utils.persist import filter_rows, read_csv_df, write_csv_df
+from ..utils.persist import delete_rows, filter_rows, storage_change_token, upsert_row
 from ..constants import COMMON
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from ..utils.jsoncodec import encode_value_for_storage, decode_value_if_json
-import json
-import pandas as pd
+import asyncio
+import threading
+import time
 
 logger = setup_logging()
 
 
-def listAllVariableByEnvironment(environment: str) -> List[Dict[str, Any]]:
-    # Return a list of {environment, variable, value} dictionaries for the given environment
-    rows: List[Dict[str, Any]] = []
+class _EnvironmentCache:
+    """
+    Process-level cache of decoded variable rows, keyed by environment.
+
+    Upserts and deletes in this process write through to the cache. Writes by
+    other processes (or edits to the storage file) are detected through the
+    storage change token, which is re-checked at most once every
+    ENV_CACHE_CHECK_INTERVAL seconds, or on every lookup when WORKERS > 1 so
+    the next step of a chain sees variables another worker just wrote; a
+    changed token drops every entry.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._token: Any = None
+        self._checked_at = 0.0
+        # Bumped on every invalidation/write so a slow load cannot store stale rows.
+        self._generation = 0
+
+    def _validate(self) -> None:
+        now = time.monotonic()
+        if COMMON.WORKERS <= 1 and now - self._checked_at < COMMON.ENV_CACHE_CHECK_INTERVAL:
+            return
+        token = storage_change_token(COMMON.FileType.ENVIRONMENT)
+        with self._lock:
+            self._checked_at = now
+            if token != self._token:
+                if self._entries:
+                    logger.debug("Environment storage changed; clearing variable cache")
+                self._entries.clear()
+                self._token = token
+                self._generation += 1
+
+    def get(self, environment: str) -> Optional[List[Dict[str, Any]]]:
+        if not COMMON.ENV_CACHE_ENABLED:
+            return None
+        self._validate()
+        with self._lock:
+            rows = self._entries.get(environment)
+            return None if rows is None else [dict(r) for r in rows]
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def put(self, environment: str, rows: List[Dict[str, Any]], generation: int) -> None:
+        if not COMMON.ENV_CACHE_ENABLED:
+            return
+        with self._lock:
+            if generation == self._generation:
+                self._entries[environment] = [dict(r) for r in rows]
+
+    def write_token(self) -> Any:
+        """Storage change token to read before a write and pass to upsert()/drop() after it."""
+        return storage_change_token(COMMON.FileType.ENVIRONMENT)
+
+    def _after_write(self, before: Any) -> None:
+        # Called with self._lock held. Our own write changed the token; adopt it
+        # so the entry is not discarded, unless storage had already changed
+        # since the last check, in which case our entries may be stale.
+        if before != self._token:
+            self._entries.clear()
+        self._token = storage_change_token(COMMON.FileType.ENVIRONMENT)
+        self._checked_at = time.monotonic()
+        self._generation += 1
+
+    def upsert(self, environment: str, variable: str, value: Any, before: Any) -> None:
+        with self._lock:
+            rows = self._entries.get(environment)
+            if rows is not None:
+                for r in rows:
+                    if r.get("variable") == variable:
+                        r["value"] = value
+                        break
+                else:
+                    rows.append({"environment": environment, "variable": variable, "value": value})
+            self._after_write(before)
+
+    def drop(self, environment: str, before: Any) -> None:
+        with self._lock:
+            self._entries.pop(environment, None)
+            self._after_write(before)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+
+_ENV_CACHE = _EnvironmentCache()
+
+
+def _load_environment(environment: str) -> List[Dict[str, Any]]:
+    generation = _ENV_CACHE.generation()
     try:
         rows = filter_rows(COMMON.FileType.ENVIRONMENT, environment=environment)
     except Exception as exc:
@@ -20,49 +113,48 @@ def listAllVariableByEnvironment(environment: str) -> List[Dict[str, Any]]:
         raise
     for r in rows:
         r["value"] = decode_value_if_json(r.get("value"))
+    _ENV_CACHE.put(environment, rows, generation)
     return rows
 
 
+def listAllVariableByEnvironment(environment: str) -> List[Dict[str, Any]]:
+    # Return a list of {environment, variable, value} dictionaries for the given environment
+    rows = _ENV_CACHE.get(environment)
+    if rows is not None:
+        return rows
+    return _load_environment(environment)
+
+
 def listSpecificVariableByEnvironment(environment: str, variable: str) -> List[Dict[str, Any]]:
     # Return a list (typically 0 or 1 item) of {environment, variable, value} for the given env+variable
-    rows: List[Dict[str, Any]] = []
     try:
-        rows = filter_rows(COMMON.FileType.ENVIRONMENT, environment=environment, variable=variable)
+        rows = listAllVariableByEnvironment(environment)
     except Exception as exc:
         logger.error("Failed to get variable %s for environment %s: %s", variable, environment, exc)
         raise
-    for r in rows:
-        r["value"] = decode_value_if_json(r.get("value"))
-    return rows
+    return [r for r in rows if r.get("variable") == variable]
+
+
+def clearEnvironmentCache() -> None:
+    """Drop every cached environment; the next lookup reads from storage."""
+    _ENV_CACHE.clear()
 
 
 def upsertEnvironmentVariable(environment: str, variable: str, value: Any) -> Dict[str, Any]:
     # Upsert a row for the given environment/variable; update value if exists else create new.
-    try:
-        df = read_csv_df(COMMON.FileType.ENVIRONMENT)
-    except Exception as exc:
-        logger.error("Failed to read environment CSV: %s", exc)
-        raise
-
     encoded_value = encode_value_for_storage(value)
-
-    if df.empty:
-        df = pd.DataFrame([{"environment": environment, "variable": variable, "value": encoded_value}])
-    else:
-        mask = (df["environment"] == environment) & (df["variable"] == variable)
-        if mask.any():
-            df.loc[mask, "value"] = encoded_value
-        else:
-            df = pd.concat(
-                [df, pd.DataFrame([{"environment": environment, "variable": variable, "value": encoded_value}])],
-                ignore_index=True,
-            )
-
+    before = _ENV_CACHE.write_token()
     try:
-        write_csv_df(df, COMMON.FileType.ENVIRONMENT)
+        upsert_row(
+            COMMON.FileType.ENVIRONMENT,
+            {"environment": environment, "variable": variable, "value": encoded_value},
+            key_columns=("environment", "variable"),
+        )
     except Exception as exc:
-        logger.error("Failed to write environment CSV: %s", exc)
+        logger.error("Failed to write environment variable: %s", exc)
         raise
+    # Cache the value as it will read back from storage
+    _ENV_CACHE.upsert(environment, variable, decode_value_if_json(encoded_value), before)
 
     return {"environment": environment, "variable": variable, "value": value}
 
@@ -81,32 +173,27 @@ def eval(expression: str, data: List[Dict[str, Any]]) -> str:
 def deleteAllVariablesByEnvironment(environment: str) -> int:
     """Delete all variables for the given environment.
 
-    Reads the environment CSV and removes all rows where `environment` matches
-    the provided environment value. Returns the number of deleted rows.
+    Removes all stored rows where `environment` matches the provided
+    environment value. Returns the number of deleted rows.
     """
+    before = _ENV_CACHE.write_token()
     try:
-        df = read_csv_df(COMMON.FileType.ENVIRONMENT)
+        deleted = delete_rows(COMMON.FileType.ENVIRONMENT, environment=environment)
     except Exception as exc:
-        logger.error("Failed to read environment CSV: %s", exc)
+        logger.error("Failed to delete variables for environment %s: %s", environment, exc)
         raise
+    _ENV_CACHE.drop(environment, before)
+    return deleted
 
-    if df.empty:
-        return 0
-
-    if "environment" not in df.columns:
-        logger.error("'environment' column not found in ENVIRONMENT CSV")
-        raise KeyError("'environment' column not found in ENVIRONMENT CSV")
 
-    mask = df["environment"] == environment
-    deleted_count = int(mask.sum())
-    if deleted_count == 0:
-        return 0
+async def listAllVariableByEnvironmentAsync(environment: str) -> List[Dict[str, Any]]:
+    """listAllVariableByEnvironment(); served from the cache when possible, else loaded in a worker thread."""
+    rows = _ENV_CACHE.get(environment)
+    if rows is not None:
+        return rows
+    return await asyncio.to_thread(_load_environment, environment)
 
-    new_df = df[~mask]
-    try:
-        write_csv_df(new_df, COMMON.FileType.ENVIRONMENT)
-    except Exception as exc:
-        logger.error("Failed to write environment CSV after delete: %s", exc)
-        raise
 
-    return deleted_count
+async def upsertEnvironmentVariableAsync(environment: str, variable: str, value: Any) -> Dict[str, Any]:
+    """upsertEnvironmentVariable() run in a worker thread so the event loop is not blocked."""
+    return await asyncio.to_thread(upsertEnvironmentVariable, environment, variable, value)
@@ -0,0 +1,130 @@
+"""Compressed, date-partitioned archive of transaction rows.
+
+Rows moved out of the hot store by the retention purge (services/retention)
+are appended to one gzip'd JSON Lines segment per creation date:
+
+    STORAGE/archive/transaction/2025-01-31.jsonl.gz
+
+Each purge appends a new gzip member to the segment; gzip readers treat the
+concatenated members as one stream. Rows are stored exactly as they were in
+the hot store (request/response still encoded). Appends hold a lock file, so
+several worker processes can purge into the same archive.
+
+A purge interrupted between archiving and deleting rows archives them again
+next time; readers keep the last copy of each transactionId.
+"""
+from __future__ import annotations
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import gzip
+import os
+import re
+from ..constants import COMMON
+from . import fastjson
+from .filelock import FileLock
+from .logger import setup_logging
+
+logger = setup_logging()
+
+__all__ = ["ArchiveStore", "get_transaction_archive", "segment_date"]
+
+_SEGMENT_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.jsonl\.gz$")
+_UNDATED = "undated"
+
+
+def segment_date(creation_dt: Any) -> str:
+    """Partition key (YYYY-MM-DD) of a row's creation_dt; "undated" if it has none."""
+    text = str(creation_dt or "")
+    if len(text) >= 10 and re.match(r"^\d{4}-\d{2}-\d{2}", text):
+        return text[:10]
+    return _UNDATED
+
+
+class ArchiveStore:
+    def __init__(self, directory: Path, key: str = "transactionId") -> None:
+        self.directory = directory
+        self.key = key
+        self._lock = FileLock(directory / ".archive.lock")
+
+    def _segment_path(self, day: str) -> Path:
+        return self.directory / f"{day}.jsonl.gz"
+
+    def append(self, rows: Sequence[Dict[str, Any]]) -> int:
+        """Append rows to their date segments; returns the number of rows written."""
+        if not rows:
+            return 0
+        by_day: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_day.setdefault(segment_date(row.get("creation_dt")), []).append(row)
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for day, day_rows in by_day.items():
+                payload = b"".join(fastjson.dumpb(r, default=str) + b"\n" for r in day_rows)
+                with open(self._segment_path(day), "ab") as fh:
+                    fh.write(gzip.compress(payload, compresslevel=COMMON.ARCHIVE_COMPRESS_LEVEL))
+                    fh.flush()
+                    os.fsync(fh.fileno())
+        logger.debug("Archived %d row(s) into %d segment(s) under %s", len(rows), len(by_day), self.directory)
+        return len(rows)
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Segments in date order: {"date", "file", "bytes"}."""
+        if not self.directory.is_dir():
+            return []
+        found = []
+        for p in self.directory.iterdir():
+            m = _SEGMENT_RE.match(p.name)
+            if m is None and p.name != f"{_UNDATED}.jsonl.gz":
+                continue
+            try:
+                size = p.stat().st_size
+            except FileNotFoundError:
+                continue
+            found.append({"date": m.group(1) if m else _UNDATED, "file": p.name, "bytes": size})
+        return sorted(found, key=lambda s: s["date"])
+
+    def _days(self, date_from: Optional[date], date_to: Optional[date]) -> List[str]:
+        days = []
+        for seg in self.segments():
+            if seg["date"] == _UNDATED:
+                if date_from is None and date_to is None:
+                    days.append(seg["date"])
+                continue
+            day = date.fromisoformat(seg["date"])
+            if (date_from is None or day >= date_from) and (date_to is None or day <= date_to):
+                days.append(seg["date"])
+        return days
+
+    def iter_rows(self, date_from: Optional[date] = None, date_to: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Rows of the segments between date_from and date_to (inclusive), one
+        segment at a time, keeping the last copy of each key within a segment.
+        """
+        for day in self._days(date_from, date_to):
+            rows: Dict[Any, Dict[str, Any]] = {}
+            try:
+                with gzip.open(self._segment_path(day), "rb") as fh:
+                    for line in fh:
+                        if not line.strip():
+                            continue
+                        row = fastjson.loads(line)
+                        rows[row.get(self.key)] = row
+            except FileNotFoundError:
+                continue
+            except (OSError, EOFError, ValueError) as exc:
+                # A segment cut short (e.g. disk full mid-append) still yields its complete rows
+                logger.error("Archive segment %s is damaged; returning the rows read before: %s", day, exc)
+            yield from rows.values()
+
+
+_ARCHIVE: Optional[ArchiveStore] = None
+
+
+def get_transaction_archive() -> ArchiveStore:
+    """Archive for transaction rows under STORAGE/ARCHIVE_DIR/transaction."""
+    global _ARCHIVE
+    directory = Path(COMMON.STORAGE) / COMMON.ARCHIVE_DIR / "transaction"
+    if _ARCHIVE is None or _ARCHIVE.directory != directory:
+        _ARCHIVE = ArchiveStore(directory)
+    return _ARCHIVE
@@ -0,0 +1,126 @@
+"""Per-call latency breakdown recorded on every transaction.
+
+restapiCall fills one CallTiming per call and stores columns() with the
+transaction when it completes:
+
+    total_ms          the whole call, up to the write that completes the transaction
+    interpolation_ms  resolving templates (session, environment, request parts)
+    storage_ms        loading the environment's variables and creating the transaction row
+    downstream_ms     the downstream exchange: admission waits, attempts, backoff, cache
+    connect_ms        TCP connect of the final attempt, DNS lookup included
+    tls_ms            TLS handshake of the final attempt
+    ttfb_ms           start of the final attempt until its response headers arrived
+    request_bytes     request body bytes of the final attempt
+    response_bytes    response body bytes received by the final attempt (as sent, before decoding)
+    retry_count       attempts after the first
+
+The network figures come from httpcore trace events (the "trace" request
+extension of httpx). httpcore resolves names inside its TCP connect and
+reports no DNS event, so DNS time is part of connect_ms. connect_ms and
+tls_ms are None when the attempt reused a pooled connection; all network
+figures are None when nothing was sent (cache hit, coalesced call).
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+import time
+
+__all__ = ["TIMING_COLUMNS", "CallTiming"]
+
+# Transaction columns written from CallTiming.columns(), with their types
+TIMING_COLUMNS: Dict[str, type] = {
+    "total_ms": float,
+    "interpolation_ms": float,
+    "storage_ms": float,
+    "downstream_ms": float,
+    "connect_ms": float,
+    "tls_ms": float,
+    "ttfb_ms": float,
+    "request_bytes": int,
+    "response_bytes": int,
+    "retry_count": int,
+}
+
+# httpcore trace steps ("<layer>.<step>.started/complete") measured per attempt
+_CONNECT_STEPS = ("connect_tcp", "connect_unix_socket")
+_TLS_STEP = "start_tls"
+_HEADERS_STEP = "receive_response_headers"
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 3)
+
+
+class CallTiming:
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self._phases: Dict[str, float] = {"interpolation": 0.0, "storage": 0.0, "downstream": 0.0}
+        self._attempt_start: Optional[float] = None
+        self._started: Dict[str, float] = {}
+        self.connect_ms: Optional[float] = None
+        self.tls_ms: Optional[float] = None
+        self.ttfb_ms: Optional[float] = None
+        self.request_bytes: Optional[int] = None
+        self.response_bytes: Optional[int] = None
+        self.retry_count = 0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to phase `name` (interpolation, storage or downstream)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phases[name] += time.perf_counter() - start
+
+    def begin_attempt(self) -> None:
+        """Forget the previous attempt's network figures; the final attempt's are kept."""
+        self._attempt_start = time.perf_counter()
+        self._started.clear()
+        self.connect_ms = self.tls_ms = self.ttfb_ms = None
+        self.request_bytes = self.response_bytes = None
+
+    def end_attempt(self, request_bytes: Optional[int], response_bytes: Optional[int]) -> None:
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+
+    def _event(self, name: str) -> None:
+        now = time.perf_counter()
+        # e.g. "connection.start_tls.complete", "http11.receive_response_headers.complete"
+        _, _, event = name.partition(".")
+        step, _, state = event.rpartition(".")
+        if state == "started":
+            self._started[step] = now
+            return
+        if state != "complete":
+            return
+        started = self._started.pop(step, None)
+        if step in _CONNECT_STEPS and started is not None:
+            self.connect_ms = _ms(now - started)
+        elif step == _TLS_STEP and started is not None:
+            self.tls_ms = _ms(now - started)
+        elif step == _HEADERS_STEP and self._attempt_start is not None:
+            self.ttfb_ms = _ms(now - self._attempt_start)
+
+    def trace(self, name: str, info: Dict[str, Any]) -> None:
+        """httpcore trace callback for httpx.Client requests."""
+        self._event(name)
+
+    async def atrace(self, name: str, info: Dict[str, Any]) -> None:
+        """httpcore trace callback for httpx.AsyncClient requests."""
+        self._event(name)
+
+    def columns(self) -> Dict[str, Any]:
+        """Transaction column values; total_ms runs until now."""
+        return {
+            "total_ms": _ms(time.perf_counter() - self._start),
+            "interpolation_ms": _ms(self._phases["interpolation"]),
+            "storage_ms": _ms(self._phases["storage"]),
+            "downstream_ms": _ms(self._phases["downstream"]),
+            "connect_ms": self.connect_ms,
+            "tls_ms": self.tls_ms,
+            "ttfb_ms": self.ttfb_ms,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "retry_count": self.retry_count,
+        }
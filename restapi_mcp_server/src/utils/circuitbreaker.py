@@ -0,0 +1,219 @@
+"""Circuit breaker per downstream origin.
+
+Each origin (scheme://host:port) has a breaker with three states:
+  - closed:    calls pass; outcomes are recorded in a sliding time window
+  - open:      calls fail fast with CircuitOpenError for CIRCUIT_OPEN_SECONDS
+  - half_open: up to CIRCUIT_HALF_OPEN_CALLS probe calls pass; a healthy probe
+               closes the circuit, a failed or slow one opens it again
+
+A closed circuit opens once the window (the last CIRCUIT_WINDOW_SECONDS) holds
+at least CIRCUIT_MIN_CALLS outcomes and either the failure rate reaches
+CIRCUIT_FAILURE_RATE or the share of calls slower than CIRCUIT_SLOW_CALL_SECONDS
+reaches CIRCUIT_SLOW_CALL_RATE. Transport errors (connect failures, timeouts)
+and 5xx responses count as failures.
+
+Breakers are shared by every event loop in the process, so state is guarded
+by a threading lock and never awaited on.
+"""
+from __future__ import annotations
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+import threading
+import time
+from ..constants import COMMON
+from .httppool import origin_of
+from .logger import setup_logging
+
+logger = setup_logging()
+
+__all__ = ["CircuitOpenError", "CircuitBreaker", "CallOutcome", "circuit", "circuit_states", "circuit_stats"]
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an origin whose circuit is open."""
+
+    def __init__(self, origin: str, retry_after: float) -> None:
+        self.origin = origin
+        self.retry_after = retry_after
+        super().__init__(f"Circuit open for {origin}; retry in {retry_after:.1f}s")
+
+
+class CallOutcome:
+    """Handed to the caller of circuit(); report the response status with .status()."""
+
+    __slots__ = ("status_code",)
+
+    def __init__(self) -> None:
+        self.status_code: Optional[int] = None
+
+    def status(self, status_code: Any) -> None:
+        try:
+            self.status_code = int(status_code)
+        except (TypeError, ValueError):
+            self.status_code = None
+
+
+class CircuitBreaker:
+    def __init__(self, origin: str) -> None:
+        self.origin = origin
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        # (finished_at, failed, slow)
+        self._window: Deque[Tuple[float, bool, bool]] = deque()
+        # metrics
+        self.rejected = 0
+        self.times_opened = 0
+        self.last_error: Optional[str] = None
+
+    def _trim(self, now: float) -> None:
+        horizon = now - COMMON.CIRCUIT_WINDOW_SECONDS
+        while self._window and self._window[0][0] < horizon:
+            self._window.popleft()
+
+    def _rates(self) -> Tuple[int, float, float]:
+        calls = len(self._window)
+        if not calls:
+            return 0, 0.0, 0.0
+        failed = sum(1 for _, f, _ in self._window if f)
+        slow = sum(1 for _, _, s in self._window if s)
+        return calls, failed / calls, slow / calls
+
+    def _open(self, now: float, reason: str) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self._probes = 0
+        self.times_opened += 1
+        logger.warning("Circuit opened for %s: %s", self.origin, reason)
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpenError."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                remaining = self._opened_at + COMMON.CIRCUIT_OPEN_SECONDS - now
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.origin, remaining)
+                self.state = HALF_OPEN
+                self._probes = 0
+                logger.info("Circuit half-open for %s", self.origin)
+            if self.state == HALF_OPEN:
+                if self._probes >= max(1, COMMON.CIRCUIT_HALF_OPEN_CALLS):
+                    self.rejected += 1
+                    raise CircuitOpenError(self.origin, 0.0)
+                self._probes += 1
+
+    def record(self, failed: bool, elapsed: float, error: Optional[str] = None) -> None:
+        slow = COMMON.CIRCUIT_SLOW_CALL_SECONDS > 0 and elapsed >= COMMON.CIRCUIT_SLOW_CALL_SECONDS
+        with self._lock:
+            now = time.monotonic()
+            if error:
+                self.last_error = error
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if failed or slow:
+                    self._open(now, "probe " + ("failed" if failed else f"took {elapsed:.1f}s"))
+                else:
+                    self.state = CLOSED
+                    self._window.clear()
+                    logger.info("Circuit closed for %s", self.origin)
+                return
+            if self.state == OPEN:
+                # A call admitted before the circuit opened
+                return
+            self._window.append((now, failed, slow))
+            self._trim(now)
+            calls, failure_rate, slow_rate = self._rates()
+            if calls < COMMON.CIRCUIT_MIN_CALLS:
+                return
+            if failure_rate >= COMMON.CIRCUIT_FAILURE_RATE:
+                self._open(now, f"{failure_rate:.0%} of {calls} calls failed")
+            elif COMMON.CIRCUIT_SLOW_CALL_SECONDS > 0 and slow_rate >= COMMON.CIRCUIT_SLOW_CALL_RATE:
+                self._open(now, f"{slow_rate:.0%} of {calls} calls took over {COMMON.CIRCUIT_SLOW_CALL_SECONDS}s")
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe slot for a call that ended without an outcome (cancelled)."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            calls, failure_rate, slow_rate = self._rates()
+            state = self.state
+            retry_in = 0.0
+            if state == OPEN:
+                retry_in = max(0.0, self._opened_at + COMMON.CIRCUIT_OPEN_SECONDS - now)
+            return {
+                "state": state,
+                "window_calls": calls,
+                "failure_rate": round(failure_rate, 3),
+                "slow_call_rate": round(slow_rate, 3),
+                "retry_in_s": round(retry_in, 3),
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "last_error": self.last_error,
+            }
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def _breaker(origin: str) -> CircuitBreaker:
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(origin)
+        if breaker is None:
+            breaker = _BREAKERS[origin] = CircuitBreaker(origin)
+        return breaker
+
+
+@asynccontextmanager
+async def circuit(url: str) -> AsyncIterator[CallOutcome]:
+    """
+    Guard one call to `url`'s origin. Raises CircuitOpenError without calling
+    when the circuit is open; otherwise records the outcome: an exception from
+    the body is a failure, as is a 5xx status reported via outcome.status().
+    """
+    if not COMMON.CIRCUIT_BREAKER_ENABLED:
+        yield CallOutcome()
+        return
+    breaker = _breaker(origin_of(url))
+    breaker.before_call()
+    outcome = CallOutcome()
+    start = time.monotonic()
+    try:
+        yield outcome
+    except Exception as exc:
+        breaker.record(True, time.monotonic() - start, f"{type(exc).__name__}: {exc}")
+        raise
+    except BaseException:
+        # Cancelled: no outcome to record
+        breaker.release_probe()
+        raise
+    else:
+        failed = outcome.status_code is not None and outcome.status_code >= 500
+        breaker.record(failed, time.monotonic() - start, f"HTTP {outcome.status_code}" if failed else None)
+
+
+def circuit_states() -> Dict[str, str]:
+    """Origin -> circuit state."""
+    with _BREAKERS_LOCK:
+        breakers: List[CircuitBreaker] = list(_BREAKERS.values())
+    return {b.origin: b.state for b in breakers}
+
+
+def circuit_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-origin circuit state and sliding-window rates."""
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.values())
+    return {b.origin: b.stats() for b in breakers}
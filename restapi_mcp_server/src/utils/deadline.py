@@ -0,0 +1,107 @@
+"""End-to-end deadlines for orchestrated calls.
+
+A deadline is an absolute time.monotonic() value kept in a ContextVar, so it
+follows the call through awaits, asyncio tasks and asyncio.to_thread workers.
+Scopes only ever tighten it: a nested deadline_scope() keeps the earlier of
+the two deadlines.
+
+Callers pass their budget in the COMMON.DEADLINE_HEADER request header
+(seconds the caller is prepared to wait, like gRPC's grpc-timeout) or in a
+call's `timeout.deadline` field.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Iterator, Optional, TypeVar
+import asyncio
+import inspect
+import time
+from .logger import setup_logging
+
+logger = setup_logging()
+
+__all__ = [
+    "DeadlineExceeded",
+    "current_deadline",
+    "remaining",
+    "check_deadline",
+    "deadline_scope",
+    "parse_timeout_header",
+    "run_within_deadline",
+]
+
+T = TypeVar("T")
+
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("restapi_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The caller's deadline passed before `stage` finished."""
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        super().__init__(f"Deadline exceeded during {stage}")
+
+
+def current_deadline() -> Optional[float]:
+    return _DEADLINE.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline (may be negative), or None without one."""
+    deadline = _DEADLINE.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline(stage: str) -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(stage)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """Run the block with at most `seconds` left (None keeps the current deadline)."""
+    current = _DEADLINE.get()
+    if seconds is None:
+        yield current
+        return
+    deadline = time.monotonic() + max(0.0, float(seconds))
+    if current is not None:
+        deadline = min(current, deadline)
+    token = _DEADLINE.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _DEADLINE.reset(token)
+
+
+def parse_timeout_header(value: Any) -> Optional[float]:
+    """Parse a deadline header value (seconds); invalid values are ignored."""
+    if value is None or str(value).strip() == "":
+        return None
+    try:
+        seconds = float(str(value).strip())
+    except ValueError:
+        logger.warning("Ignoring invalid deadline header value: %r", value)
+        return None
+    return seconds if seconds > 0 else None
+
+
+async def run_within_deadline(awaitable: Awaitable[T], stage: str) -> T:
+    """Await `awaitable`, cancelling it and raising DeadlineExceeded when the deadline passes."""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if inspect.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(stage)
+    cm = asyncio.timeout(left)
+    try:
+        async with cm:
+            return await awaitable
+    except TimeoutError:
+        if cm.expired():
+            raise DeadlineExceeded(stage) from None
+        raise
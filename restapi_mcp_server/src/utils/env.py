@@ -29,9 +29,72 @@ def load_common_from_env() -> None:
       - HOST
       - API_PORT
       - MCP_API_PORT
+      - WORKERS
       - DEFAULT_HTTP_TIMEOUT
+      - MCP_CALL_TIMEOUT
+      - RESPONSE_STREAMING
+      - RESPONSE_MEMORY_MAX_BYTES
+      - RESPONSE_SPOOL_TTL
+      - BODY_PREVIEW_BYTES
+      - TRANSACTION_BODY_MAX_BYTES
+      - TRANSACTION_RETENTION_DAYS
+      - TRANSACTION_MAX_ROWS
+      - TRANSACTION_PURGE_INTERVAL
+      - TRANSACTION_ARCHIVE
+      - ARCHIVE_DIR
+      - ARCHIVE_COMPRESS_LEVEL
+      - JSON_CODEC
+      - LOG_PREVIEW_BYTES
+      - LOG_SAMPLE_RATE
+      - LOG_FORMAT
+      - LOG_DIR
+      - LOG_FILE_NAME
+      - LOG_MAX_BYTES
+      - LOG_ROTATE_WHEN
+      - LOG_BACKUP_COUNT
+      - ENV_CACHE_ENABLED
+      - ENV_CACHE_CHECK_INTERVAL
+      - HTTP_POOL_MAX_CONNECTIONS
+      - HTTP_POOL_MAX_KEEPALIVE
+      - HTTP_POOL_KEEPALIVE_EXPIRY
+      - TEMPLATE_CACHE_SIZE
+      - TEMPLATE_CACHE_MAX_KEY_CHARS
+      - JQ_CACHE_SIZE
+      - SESSION_CONTEXT_TTL
+      - SESSION_CONTEXT_MAX
+      - SESSION_EVICT_INTERVAL
+      - RETRY_MAX_ATTEMPTS
+      - RETRY_BACKOFF_INITIAL
+      - RETRY_BACKOFF_MAX
+      - RETRY_TOTAL_TIMEOUT
+      - OUTBOUND_MAX_IN_FLIGHT
+      - OUTBOUND_RPS
+      - OUTBOUND_BURST
+      - HTTP_CACHE_MODE
+      - HTTP_CACHE_MAX_BYTES
+      - HTTP_CACHE_DISK
+      - HTTP_CACHE_DISK_MAX_BYTES
+      - SINGLE_FLIGHT_ENABLED
+      - SINGLE_FLIGHT_IGNORE_HEADERS
+      - CIRCUIT_BREAKER_ENABLED
+      - CIRCUIT_WINDOW_SECONDS
+      - CIRCUIT_MIN_CALLS
+      - CIRCUIT_FAILURE_RATE
+      - CIRCUIT_SLOW_CALL_SECONDS
+      - CIRCUIT_SLOW_CALL_RATE
+      - CIRCUIT_OPEN_SECONDS
+      - CIRCUIT_HALF_OPEN_CALLS
       - DEBUG
       - STORAGE
+      - STORAGE_BACKEND
+      - SQLITE_DB_FILE
+      - SQLITE_BUSY_TIMEOUT_MS
+      - TRANSACTION_BACKEND
+      - JOURNAL_FILE
+      - JOURNAL_FSYNC
+      - JOURNAL_COMPACT_MIN_BYTES
+      - JOURNAL_COMPACT_RATIO
+      - JOURNAL_COMPACT_INTERVAL
       - LOG_LEVEL, log_level
 
     Special handling:
@@ -81,9 +144,72 @@ def load_common_from_env() -> None:
     maybe_set_str("HOST", "HOST")
     maybe_set_int("API_PORT", "API_PORT")
     maybe_set_int("MCP_API_PORT", "MCP_API_PORT")
+    maybe_set_int("WORKERS", "WORKERS")
     maybe_set_float("DEFAULT_HTTP_TIMEOUT", "DEFAULT_HTTP_TIMEOUT")
+    maybe_set_float("MCP_CALL_TIMEOUT", "MCP_CALL_TIMEOUT")
+    maybe_set_bool("RESPONSE_STREAMING", "RESPONSE_STREAMING")
+    maybe_set_int("RESPONSE_MEMORY_MAX_BYTES", "RESPONSE_MEMORY_MAX_BYTES")
+    maybe_set_float("RESPONSE_SPOOL_TTL", "RESPONSE_SPOOL_TTL")
+    maybe_set_int("BODY_PREVIEW_BYTES", "BODY_PREVIEW_BYTES")
+    maybe_set_int("TRANSACTION_BODY_MAX_BYTES", "TRANSACTION_BODY_MAX_BYTES")
+    maybe_set_float("TRANSACTION_RETENTION_DAYS", "TRANSACTION_RETENTION_DAYS")
+    maybe_set_int("TRANSACTION_MAX_ROWS", "TRANSACTION_MAX_ROWS")
+    maybe_set_float("TRANSACTION_PURGE_INTERVAL", "TRANSACTION_PURGE_INTERVAL")
+    maybe_set_bool("TRANSACTION_ARCHIVE", "TRANSACTION_ARCHIVE")
+    maybe_set_str("ARCHIVE_DIR", "ARCHIVE_DIR")
+    maybe_set_int("ARCHIVE_COMPRESS_LEVEL", "ARCHIVE_COMPRESS_LEVEL")
+    maybe_set_str("JSON_CODEC", "JSON_CODEC")
+    maybe_set_int("LOG_PREVIEW_BYTES", "LOG_PREVIEW_BYTES")
+    maybe_set_float("LOG_SAMPLE_RATE", "LOG_SAMPLE_RATE")
+    maybe_set_str("LOG_FORMAT", "LOG_FORMAT")
+    maybe_set_str("LOG_DIR", "LOG_DIR")
+    maybe_set_str("LOG_FILE_NAME", "LOG_FILE_NAME")
+    maybe_set_int("LOG_MAX_BYTES", "LOG_MAX_BYTES")
+    maybe_set_str("LOG_ROTATE_WHEN", "LOG_ROTATE_WHEN")
+    maybe_set_int("LOG_BACKUP_COUNT", "LOG_BACKUP_COUNT")
+    maybe_set_bool("ENV_CACHE_ENABLED", "ENV_CACHE_ENABLED")
+    maybe_set_float("ENV_CACHE_CHECK_INTERVAL", "ENV_CACHE_CHECK_INTERVAL")
+    maybe_set_int("HTTP_POOL_MAX_CONNECTIONS", "HTTP_POOL_MAX_CONNECTIONS")
+    maybe_set_int("HTTP_POOL_MAX_KEEPALIVE", "HTTP_POOL_MAX_KEEPALIVE")
+    maybe_set_float("HTTP_POOL_KEEPALIVE_EXPIRY", "HTTP_POOL_KEEPALIVE_EXPIRY")
+    maybe_set_int("TEMPLATE_CACHE_SIZE", "TEMPLATE_CACHE_SIZE")
+    maybe_set_int("TEMPLATE_CACHE_MAX_KEY_CHARS", "TEMPLATE_CACHE_MAX_KEY_CHARS")
+    maybe_set_int("JQ_CACHE_SIZE", "JQ_CACHE_SIZE")
+    maybe_set_float("SESSION_CONTEXT_TTL", "SESSION_CONTEXT_TTL")
+    maybe_set_int("SESSION_CONTEXT_MAX", "SESSION_CONTEXT_MAX")
+    maybe_set_float("SESSION_EVICT_INTERVAL", "SESSION_EVICT_INTERVAL")
+    maybe_set_int("RETRY_MAX_ATTEMPTS", "RETRY_MAX_ATTEMPTS")
+    maybe_set_float("RETRY_BACKOFF_INITIAL", "RETRY_BACKOFF_INITIAL")
+    maybe_set_float("RETRY_BACKOFF_MAX", "RETRY_BACKOFF_MAX")
+    maybe_set_float("RETRY_TOTAL_TIMEOUT", "RETRY_TOTAL_TIMEOUT")
+    maybe_set_int("OUTBOUND_MAX_IN_FLIGHT", "OUTBOUND_MAX_IN_FLIGHT")
+    maybe_set_float("OUTBOUND_RPS", "OUTBOUND_RPS")
+    maybe_set_float("OUTBOUND_BURST", "OUTBOUND_BURST")
+    maybe_set_str("HTTP_CACHE_MODE", "HTTP_CACHE_MODE")
+    maybe_set_int("HTTP_CACHE_MAX_BYTES", "HTTP_CACHE_MAX_BYTES")
+    maybe_set_bool("HTTP_CACHE_DISK", "HTTP_CACHE_DISK")
+    maybe_set_int("HTTP_CACHE_DISK_MAX_BYTES", "HTTP_CACHE_DISK_MAX_BYTES")
+    maybe_set_bool("SINGLE_FLIGHT_ENABLED", "SINGLE_FLIGHT_ENABLED")
+    maybe_set_str("SINGLE_FLIGHT_IGNORE_HEADERS", "SINGLE_FLIGHT_IGNORE_HEADERS")
+    maybe_set_bool("CIRCUIT_BREAKER_ENABLED", "CIRCUIT_BREAKER_ENABLED")
+    maybe_set_float("CIRCUIT_WINDOW_SECONDS", "CIRCUIT_WINDOW_SECONDS")
+    maybe_set_int("CIRCUIT_MIN_CALLS", "CIRCUIT_MIN_CALLS")
+    maybe_set_float("CIRCUIT_FAILURE_RATE", "CIRCUIT_FAILURE_RATE")
+    maybe_set_float("CIRCUIT_SLOW_CALL_SECONDS", "CIRCUIT_SLOW_CALL_SECONDS")
+    maybe_set_float("CIRCUIT_SLOW_CALL_RATE", "CIRCUIT_SLOW_CALL_RATE")
+    maybe_set_float("CIRCUIT_OPEN_SECONDS", "CIRCUIT_OPEN_SECONDS")
+    maybe_set_int("CIRCUIT_HALF_OPEN_CALLS", "CIRCUIT_HALF_OPEN_CALLS")
     debug_overridden = maybe_set_bool("DEBUG", "DEBUG")
     maybe_set_str("STORAGE", "STORAGE")
+    maybe_set_str("STORAGE_BACKEND", "STORAGE_BACKEND")
+    maybe_set_str("SQLITE_DB_FILE", "SQLITE_DB_FILE")
+    maybe_set_int("SQLITE_BUSY_TIMEOUT_MS", "SQLITE_BUSY_TIMEOUT_MS")
+    maybe_set_str("TRANSACTION_BACKEND", "TRANSACTION_BACKEND")
+    maybe_set_str("JOURNAL_FILE", "JOURNAL_FILE")
+    maybe_set_bool("JOURNAL_FSYNC", "JOURNAL_FSYNC")
+    maybe_set_int("JOURNAL_COMPACT_MIN_BYTES", "JOURNAL_COMPACT_MIN_BYTES")
+    maybe_set_float("JOURNAL_COMPACT_RATIO", "JOURNAL_COMPACT_RATIO")
+    maybe_set_float("JOURNAL_COMPACT_INTERVAL", "JOURNAL_COMPACT_INTERVAL")
 
     log_level_overridden = maybe_set_str("log_level", "LOG_LEVEL", "log_level")
 
@@ -0,0 +1,356 @@
+"""Per-call execution context for RESTAPI constants.
+
+$REQUEST_BODY, $RESPONSE_BODY, $PREVIOUS_RESPONSE_BODY and the other names
+declared in constants/RESTAPI.py used to be module globals written by every
+call, so concurrent sessions overwrote each other's state. Each call now runs
+with its own ExecutionContext held in a contextvar (asyncio tasks and
+asyncio.to_thread workers inherit it), seeded from the last call of the same
+session. Session state lives in a SessionContextStore whose entries expire
+after SESSION_CONTEXT_TTL seconds of inactivity.
+
+With WORKERS > 1 consecutive calls of a session may land on different worker
+processes, so the state is kept in the storage backend instead
+(SharedSessionContextStore, the SESSION file type): every worker continues
+from the session's last call, whichever worker served it. Bodies larger than
+SESSION_INLINE_BODY_BYTES are written once to STORAGE/SESSION_BODY_DIR, named
+by their hash, so the session row stays small and the previous response is
+never stored twice.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields, replace
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from ..constants import COMMON, RESTAPI
+from . import fastjson
+from .logger import setup_logging
+from .persist import delete_rows, delete_rows_in, filter_rows, scan_rows, upsert_row
+
+logger = setup_logging()
+
+__all__ = [
+    "ExecutionContext",
+    "SessionContextStore",
+    "SharedSessionContextStore",
+    "current_context",
+    "use_context",
+    "lookup_constant",
+    "get_session_store",
+]
+
+# Names a payload may reference as $NAME (declared in constants/RESTAPI.py)
+CONSTANT_NAMES = frozenset(n for n in vars(RESTAPI) if n.isupper())
+
+# Shared session contexts keep bodies serialized larger than this in their own file
+SESSION_INLINE_BODY_BYTES = 4096
+_BODY_FIELDS = ("request_body", "response_body", "previous_response_body")
+# Unreferenced body files younger than this are kept: their session row may not be written yet
+_BODY_GRACE_S = 300.0
+
+
+@dataclass
+class ExecutionContext:
+    """
+    Request/response state of one call; fields mirror constants/RESTAPI.py.
+    """
+
+    session: Optional[str] = None
+    request_body: Any = None
+    request_headers: Any = None
+    response_body: Any = None
+    response_headers: Any = None
+    response_http_status_code: Any = None
+    previous_response_body: Any = None
+    previous_http_status_code: Any = None
+
+    @classmethod
+    def for_session(cls, session: Optional[str], last: Optional["ExecutionContext"] = None) -> "ExecutionContext":
+        """New call context continuing from the session's last call (if any)."""
+        if last is None:
+            return cls(session=session)
+        return replace(last, session=session)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        if name in CONSTANT_NAMES:
+            return getattr(self, name.lower(), default)
+        return default
+
+    def begin_request(self, headers: Any, body: Any) -> None:
+        # The last response becomes the previous one once a new request is sent
+        self.previous_response_body = self.response_body
+        self.previous_http_status_code = self.response_http_status_code
+        self.request_headers = headers
+        self.request_body = body
+
+    def set_response(self, status: Any, headers: Any, body: Any) -> None:
+        self.response_http_status_code = status
+        self.response_headers = headers
+        self.response_body = body
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    @classmethod
+    def from_dict(cls, values: Dict[str, Any]) -> "ExecutionContext":
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in values.items() if k in names})
+
+
+_CURRENT: ContextVar[Optional[ExecutionContext]] = ContextVar("restapi_execution_context", default=None)
+
+
+def current_context() -> Optional[ExecutionContext]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def use_context(ctx: ExecutionContext) -> Iterator[ExecutionContext]:
+    """Make `ctx` the current context for the enclosed block (and tasks/threads it starts)."""
+    token = _CURRENT.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _CURRENT.reset(token)
+
+
+def lookup_constant(name: str, default: Any = None) -> Any:
+    """
+    Resolve a RESTAPI constant from the current context; outside a call,
+    fall back to the defaults declared in constants/RESTAPI.py.
+    """
+    ctx = _CURRENT.get()
+    if ctx is not None:
+        return ctx.get(name, default)
+    return getattr(RESTAPI, name, default)
+
+
+class SessionContextStore:
+    """
+    Last execution context per session, evicted after SESSION_CONTEXT_TTL
+    seconds without use and bounded to SESSION_CONTEXT_MAX sessions
+    (least recently used first).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, ExecutionContext]] = {}
+
+    def _evict(self, now: float) -> None:
+        # put() re-inserts, so entries are ordered by last use: expired and
+        # least recently used sessions are always at the front.
+        ttl = COMMON.SESSION_CONTEXT_TTL
+        while self._entries:
+            session, (ts, _) = next(iter(self._entries.items()))
+            if len(self._entries) > COMMON.SESSION_CONTEXT_MAX or (ttl > 0 and now - ts > ttl):
+                del self._entries[session]
+            else:
+                break
+
+    def get(self, session: Optional[str]) -> Optional[ExecutionContext]:
+        if session is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session)
+            if entry is None:
+                return None
+            ts, ctx = entry
+            ttl = COMMON.SESSION_CONTEXT_TTL
+            if ttl > 0 and now - ts > ttl:
+                del self._entries[session]
+                return None
+            return replace(ctx)
+
+    def put(self, ctx: ExecutionContext) -> None:
+        if ctx.session is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(ctx.session, None)
+            self._entries[ctx.session] = (now, replace(ctx))
+            self._evict(now)
+
+    async def get_async(self, session: Optional[str]) -> Optional[ExecutionContext]:
+        return self.get(session)
+
+    async def put_async(self, ctx: ExecutionContext) -> None:
+        self.put(ctx)
+
+    def drop(self, session: str) -> None:
+        with self._lock:
+            self._entries.pop(session, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict(time.monotonic())
+            return len(self._entries)
+
+
+class SharedSessionContextStore:
+    """
+    SessionContextStore kept in the storage backend (SESSION file type), one
+    row per session, so worker processes share it. Reads and writes go
+    through utils/persist and take the same locks as the other stores.
+    Expired and least recently used sessions are removed at most every
+    SESSION_EVICT_INTERVAL seconds per process.
+
+    A body over SESSION_INLINE_BODY_BYTES is stored as a reference ("_refs")
+    to a file named by its SHA-256, written once: the next call's previous
+    response is the same content and reuses the file. Files no row refers to
+    are removed with the evicted sessions.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._next_evict = 0.0
+
+    @staticmethod
+    def _stamp(delta: float = 0.0) -> str:
+        # Fixed-width UTC timestamps, so last_used compares correctly as text
+        return (datetime.now(timezone.utc) - timedelta(seconds=delta)).isoformat(timespec="microseconds")
+
+    @staticmethod
+    def _body_dir() -> Path:
+        return Path(COMMON.STORAGE) / COMMON.SESSION_BODY_DIR
+
+    def _store_body(self, encoded: bytes) -> str:
+        digest = hashlib.sha256(encoded).hexdigest()
+        path = self._body_dir() / f"{digest}.json"
+        try:
+            # Already stored (usually the last call's response): mark it in use
+            os.utime(path)
+            return digest
+        except FileNotFoundError:
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as fh:
+            fh.write(encoded)
+        os.replace(tmp, path)
+        return digest
+
+    def _encode(self, ctx: ExecutionContext) -> str:
+        values = ctx.as_dict()
+        refs: Dict[str, str] = {}
+        for name in _BODY_FIELDS:
+            encoded = fastjson.dumpb(values[name], default=str)
+            if len(encoded) > SESSION_INLINE_BODY_BYTES:
+                refs[name] = self._store_body(encoded)
+                values[name] = None
+        if refs:
+            values["_refs"] = refs
+        return fastjson.dumps(values, default=str)
+
+    def _decode(self, context: str) -> ExecutionContext:
+        values = fastjson.loads(context)
+        for name, digest in (values.pop("_refs", None) or {}).items():
+            values[name] = fastjson.loads((self._body_dir() / f"{digest}.json").read_bytes())
+        return ExecutionContext.from_dict(values)
+
+    def get(self, session: Optional[str]) -> Optional[ExecutionContext]:
+        if session is None:
+            return None
+        rows = filter_rows(COMMON.FileType.SESSION, session=session)
+        if not rows:
+            return None
+        row = rows[0]
+        ttl = COMMON.SESSION_CONTEXT_TTL
+        if ttl > 0 and str(row.get("last_used") or "") < self._stamp(ttl):
+            return None
+        try:
+            return self._decode(row["context"])
+        except (OSError, TypeError, ValueError) as exc:
+            logger.error("Ignoring unreadable context of session %s: %s", session, exc)
+            return None
+
+    def put(self, ctx: ExecutionContext) -> None:
+        if ctx.session is None:
+            return
+        row = {
+            "session": ctx.session,
+            "context": self._encode(ctx),
+            "last_used": self._stamp(),
+        }
+        upsert_row(COMMON.FileType.SESSION, row, ["session"])
+        self._maybe_evict()
+
+    async def get_async(self, session: Optional[str]) -> Optional[ExecutionContext]:
+        """get() run in a worker thread so the event loop is not blocked."""
+        return await asyncio.to_thread(self.get, session)
+
+    async def put_async(self, ctx: ExecutionContext) -> None:
+        """put() run in a worker thread so the event loop is not blocked."""
+        await asyncio.to_thread(self.put, ctx)
+
+    def drop(self, session: str) -> None:
+        delete_rows(COMMON.FileType.SESSION, session=session)
+
+    def _maybe_evict(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_evict:
+                return
+            self._next_evict = now + COMMON.SESSION_EVICT_INTERVAL
+        try:
+            self.evict()
+        except Exception as exc:
+            logger.error("Session context eviction failed: %s", exc)
+
+    def evict(self) -> int:
+        """Delete expired sessions, then the least recently used beyond SESSION_CONTEXT_MAX."""
+        ttl = COMMON.SESSION_CONTEXT_TTL
+        cutoff = self._stamp(ttl) if ttl > 0 else None
+        expired, kept = [], 0
+        # Newest first: every row after the first SESSION_CONTEXT_MAX live ones goes
+        for batch in scan_rows(
+            COMMON.FileType.SESSION, ("last_used", "session"), descending=True, columns=["session"], batch_size=1000
+        ):
+            for row in batch:
+                if (cutoff is not None and str(row["last_used"]) < cutoff) or kept >= COMMON.SESSION_CONTEXT_MAX:
+                    expired.append(row["session"])
+                else:
+                    kept += 1
+        deleted = delete_rows_in(COMMON.FileType.SESSION, "session", expired) if expired else 0
+        self._prune_bodies()
+        return deleted
+
+    def _prune_bodies(self) -> None:
+        """Remove body files that no session row refers to."""
+        directory = self._body_dir()
+        if not directory.is_dir():
+            return
+        live = set()
+        for batch in scan_rows(COMMON.FileType.SESSION, ("session",), columns=["context"], batch_size=1000):
+            for row in batch:
+                try:
+                    live.update((fastjson.loads(row["context"]).get("_refs") or {}).values())
+                except (TypeError, ValueError, AttributeError):
+                    continue
+        stale_before = time.time() - _BODY_GRACE_S
+        for path in directory.glob("*.json"):
+            if path.stem in live:
+                continue
+            try:
+                if path.stat().st_mtime < stale_before:
+                    path.unlink()
+            except FileNotFoundError:
+                continue
+
+    def __len__(self) -> int:
+        return sum(len(batch) for batch in scan_rows(COMMON.FileType.SESSION, ("session",), columns=["session"]))
+
+
+_SESSIONS = SessionContextStore()
+_SHARED_SESSIONS = SharedSessionContextStore()
+
+
+def get_session_store() -> Any:
+    """The session store: in-process, or in the storage backend with WORKERS > 1."""
+    return _SHARED_SESSIONS if COMMON.WORKERS > 1 else _SESSIONS
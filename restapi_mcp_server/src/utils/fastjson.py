@@ -0,0 +1,81 @@
+"""JSON codec used across the request path.
+
+Uses orjson when it is installed (pip install orjson) and the stdlib json
+module otherwise; COMMON.JSON_CODEC ("auto", "orjson" or "json") can force
+the stdlib. Both backends produce the same text: compact separators, UTF-8
+rather than \\u escapes, non-string dict keys converted to strings.
+
+Values orjson rejects (integers beyond 64 bits, and datetimes and
+dataclasses, which go through `default` in the stdlib) are encoded by the
+stdlib, as is text orjson cannot parse (NaN/Infinity literals, non-UTF-8
+bytes). Two differences remain with orjson: NaN/Infinity floats encode as
+null, and integers beyond 64 bits decode as floats.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Optional, Union
+import json
+from ..constants import COMMON
+
+try:  # optional speed-up
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    _orjson = None
+
+__all__ = ["dumps", "dumpb", "loads", "JSONDecodeError", "codec_name"]
+
+# orjson's JSONDecodeError subclasses this, so one except clause covers both
+JSONDecodeError = json.JSONDecodeError
+
+if _orjson is not None:
+    _ORJSON_OPTS = (
+        _orjson.OPT_NON_STR_KEYS
+        | _orjson.OPT_PASSTHROUGH_DATETIME
+        | _orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+def _use_orjson() -> bool:
+    return _orjson is not None and COMMON.JSON_CODEC != "json"
+
+
+def codec_name() -> str:
+    """Backend in use: "orjson" or "json"."""
+    return "orjson" if _use_orjson() else "json"
+
+
+def _stdlib_dumps(obj: Any, sort_keys: bool, default: Optional[Callable[[Any], Any]]) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys, default=default)
+
+
+def dumpb(obj: Any, *, sort_keys: bool = False, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Serialize `obj` to UTF-8 JSON bytes."""
+    if _use_orjson():
+        try:
+            return _orjson.dumps(obj, default=default, option=_ORJSON_OPTS | (_orjson.OPT_SORT_KEYS if sort_keys else 0))
+        except TypeError:
+            pass
+    return _stdlib_dumps(obj, sort_keys, default).encode("utf-8")
+
+
+def dumps(obj: Any, *, sort_keys: bool = False, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Serialize `obj` to a JSON string."""
+    if _use_orjson():
+        try:
+            return _orjson.dumps(
+                obj, default=default, option=_ORJSON_OPTS | (_orjson.OPT_SORT_KEYS if sort_keys else 0)
+            ).decode("utf-8")
+        except TypeError:
+            pass
+    return _stdlib_dumps(obj, sort_keys, default)
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """Parse JSON text; raises JSONDecodeError (a ValueError) on invalid input."""
+    if _use_orjson():
+        try:
+            return _orjson.loads(data)
+        except _orjson.JSONDecodeError:
+            # NaN/Infinity literals or non-UTF-8 bytes: the stdlib accepts
+            # these or raises the error callers expect
+            pass
+    return json.loads(data)
@@ -0,0 +1,74 @@
+"""Cross-process file locks for storage shared by several workers.
+
+FileLock pairs a threading.RLock (threads of this process) with an
+exclusive fcntl.flock() on a lock file next to the guarded file (other
+processes, e.g. uvicorn workers started with WORKERS > 1). It is re-entrant:
+only the outermost acquisition takes the flock.
+
+Without fcntl (Windows) only the thread lock is taken, which is safe for a
+single process.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Optional
+import os
+import threading
+
+try:  # POSIX only
+    import fcntl
+except ImportError:  # pragma: no cover - depends on the platform
+    fcntl = None  # type: ignore[assignment]
+
+__all__ = ["FileLock", "atomic_write_path"]
+
+
+class FileLock:
+    """Re-entrant lock held across threads and processes while the block runs."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        try:
+            if self._depth == 0 and fcntl is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                self._fd = fd
+            self._depth += 1
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fd, self._fd = self._fd, None
+            try:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+
+def atomic_write_path(path: Path) -> Path:
+    """
+    Temporary path to write a new version of `path` to before os.replace():
+    same directory (same filesystem) and unique per process and thread.
+    """
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
@@ -0,0 +1,367 @@
+"""Private HTTP cache for downstream GET requests.
+
+Opt-in per call (RestAPIIn.cache) or server-wide (COMMON.HTTP_CACHE_MODE):
+  - "off":          no caching (default)
+  - "default":      serve fresh entries, revalidate stale ones
+  - "no-cache":     always revalidate stored entries before use
+  - "force-cache":  serve any stored entry, even stale; fetch only on a miss
+
+Freshness follows Cache-Control (no-store, no-cache, max-age) and Expires,
+with the usual heuristic (10% of the Last-Modified age, at most a day) when
+neither is present. Stale entries are revalidated with If-None-Match /
+If-Modified-Since; a 304 refreshes the stored entry. Entries are keyed by URL
+and request headers, so different credentials never share an entry.
+
+Entries live in an in-memory LRU bounded by HTTP_CACHE_MAX_BYTES and,
+optionally (HTTP_CACHE_DISK), in JSON files under STORAGE/http_cache bounded
+by HTTP_CACHE_DISK_MAX_BYTES.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from ..constants import COMMON
+from . import fastjson
+from .logger import setup_logging
+
+logger = setup_logging()
+
+__all__ = ["CACHE_MODES", "HttpCache", "get_http_cache", "fetch_with_cache"]
+
+CACHE_MODES = ("off", "default", "no-cache", "force-cache")
+_CACHEABLE_STATUS = {200, 203}
+_HEURISTIC_MAX_S = 86400.0
+# Headers a 304 updates on the stored response (RFC 9111 4.3.4); representation
+# metadata such as Content-Length or Content-Type stays the stored entity's
+_REVALIDATION_HEADERS = ("date", "etag", "last-modified", "cache-control", "expires", "vary")
+
+
+def _header(headers: Optional[Mapping[str, Any]], name: str) -> Optional[str]:
+    name = name.lower()
+    for k, v in (headers or {}).items():
+        if k.lower() == name:
+            return str(v)
+    return None
+
+
+def _revalidated_headers(stored: Optional[Mapping[str, Any]], fresh: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """The stored response headers updated with a 304's non-representation headers."""
+    merged = dict(stored or {})
+    for name in _REVALIDATION_HEADERS:
+        value = _header(fresh, name)
+        if value is None:
+            continue
+        for k in [k for k in merged if k.lower() == name]:
+            del merged[k]
+        merged[name] = value
+    return merged
+
+
+def _cache_control(headers: Optional[Mapping[str, Any]]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    value = _header(headers, "cache-control")
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        key, _, arg = part.partition("=")
+        directives[key.strip().lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class CacheEntry:
+    response: Dict[str, Any]
+    stored_at: float
+    freshness: float
+    size: int
+
+    def age(self, now: float) -> float:
+        return max(0.0, now - self.stored_at)
+
+    def is_fresh(self, now: float) -> bool:
+        return self.age(now) < self.freshness
+
+    def validators(self) -> Dict[str, str]:
+        headers = self.response.get("headers") or {}
+        out: Dict[str, str] = {}
+        etag = _header(headers, "etag")
+        if etag:
+            out["If-None-Match"] = etag
+        last_modified = _header(headers, "last-modified")
+        if last_modified:
+            out["If-Modified-Since"] = last_modified
+        return out
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"response": self.response, "stored_at": self.stored_at, "freshness": self.freshness}
+
+
+def freshness_lifetime(headers: Optional[Mapping[str, Any]], now: float) -> Optional[float]:
+    """
+    Seconds a response stays fresh; None if it must not be stored.
+    0 means "store, but revalidate before every use".
+    """
+    cc = _cache_control(headers)
+    if "no-store" in cc:
+        return None
+    vary = _header(headers, "vary")
+    if vary and vary.strip() == "*":
+        return None
+    if "no-cache" in cc:
+        return 0.0
+    if cc.get("max-age") is not None:
+        try:
+            return max(0.0, float(cc["max-age"] or 0) - float(_header(headers, "age") or 0))
+        except ValueError:
+            return 0.0
+    expires = _http_date(_header(headers, "expires"))
+    if _header(headers, "expires") is not None:
+        if expires is None:
+            return 0.0
+        date = _http_date(_header(headers, "date")) or now
+        return max(0.0, expires - date)
+    last_modified = _http_date(_header(headers, "last-modified"))
+    if last_modified is not None:
+        date = _http_date(_header(headers, "date")) or now
+        return min(_HEURISTIC_MAX_S, max(0.0, (date - last_modified) * 0.1))
+    return 0.0
+
+
+class HttpCache:
+    def __init__(self, disk_dir: Optional[Path] = None) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.disk_dir = disk_dir
+        if disk_dir is not None:
+            disk_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url: str, headers: Optional[Mapping[str, Any]]) -> str:
+        canonical = fastjson.dumpb([url, sorted((str(k).lower(), str(v)) for k, v in (headers or {}).items())])
+        return hashlib.sha256(canonical).hexdigest()
+
+    # ------------------------------------------------------------------ #
+    # Memory tier
+    # ------------------------------------------------------------------ #
+    def _put_memory(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            if entry.size > COMMON.HTTP_CACHE_MAX_BYTES:
+                return
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > COMMON.HTTP_CACHE_MAX_BYTES and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._put_memory(key, entry)
+        return entry
+
+    def put(self, key: str, response: Dict[str, Any], freshness: float) -> CacheEntry:
+        payload = fastjson.dumpb(response, default=str)
+        entry = CacheEntry(response=response, stored_at=time.time(), freshness=freshness, size=len(payload))
+        self._put_memory(key, entry)
+        self._write_disk(key, entry)
+        return entry
+
+    def drop(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+        if self.disk_dir is not None:
+            try:
+                os.unlink(self.disk_dir / f"{key}.json")
+            except FileNotFoundError:
+                pass
+
+    # ------------------------------------------------------------------ #
+    # Disk tier
+    # ------------------------------------------------------------------ #
+    def _read_disk(self, key: str) -> Optional[CacheEntry]:
+        if self.disk_dir is None:
+            return None
+        path = self.disk_dir / f"{key}.json"
+        try:
+            with open(path, "rb") as fh:
+                data = fastjson.loads(fh.read())
+            return CacheEntry(
+                response=data["response"],
+                stored_at=float(data["stored_at"]),
+                freshness=float(data["freshness"]),
+                size=path.stat().st_size,
+            )
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            logger.error("Dropping unreadable HTTP cache file %s: %s", path, exc)
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return None
+
+    def _write_disk(self, key: str, entry: CacheEntry) -> None:
+        if self.disk_dir is None:
+            return
+        path = self.disk_dir / f"{key}.json"
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "wb") as fh:
+                fh.write(fastjson.dumpb(entry.to_json(), default=str))
+            os.replace(tmp, path)
+        except Exception as exc:
+            logger.error("Failed to write HTTP cache file %s: %s", path, exc)
+            return
+        self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        assert self.disk_dir is not None
+        files = []
+        total = 0
+        for p in self.disk_dir.glob("*.json"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        if total <= COMMON.HTTP_CACHE_DISK_MAX_BYTES:
+            return
+        for _, size, p in sorted(files):
+            try:
+                os.unlink(p)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= COMMON.HTTP_CACHE_DISK_MAX_BYTES:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": COMMON.HTTP_CACHE_MAX_BYTES,
+                "disk": str(self.disk_dir) if self.disk_dir is not None else None,
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+            }
+
+
+_CACHE: Optional[HttpCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            disk = Path(COMMON.STORAGE) / COMMON.HTTP_CACHE_DIR if COMMON.HTTP_CACHE_DISK else None
+            _CACHE = HttpCache(disk)
+        return _CACHE
+
+
+async def fetch_with_cache(
+    url: str,
+    headers: Dict[str, str],
+    mode: str,
+    fetch: Callable[[Dict[str, str]], Awaitable[Dict[str, Any]]],
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Serve a GET through the cache. `fetch(headers)` performs the request.
+    Returns (response, cache_status) with cache_status one of
+    "HIT", "REVALIDATED", "MISS" or "BYPASS".
+    """
+    cache = get_http_cache()
+    request_cc = _cache_control(headers)
+    if "no-store" in request_cc:
+        return await fetch(headers), "BYPASS"
+
+    key = cache.key(url, headers)
+    entry = await asyncio.to_thread(cache.get, key) if cache.disk_dir is not None else cache.get(key)
+    now = time.time()
+
+    if entry is not None:
+        use_stored = mode == "force-cache" or (
+            mode == "default" and "no-cache" not in request_cc and entry.is_fresh(now)
+        )
+        if use_stored:
+            cache.hits += 1
+            logger.debug("HTTP cache hit: %s (age %.1fs)", url, entry.age(now))
+            return entry.response, "HIT"
+
+        validators = entry.validators()
+        if validators:
+            response = await fetch({**headers, **validators})
+            if response.get("status") == 304:
+                # Merge refreshed headers into the stored response and restart its freshness
+                merged_headers = _revalidated_headers(entry.response.get("headers"), response.get("headers"))
+                refreshed = {**entry.response, "headers": merged_headers}
+                lifetime = freshness_lifetime(merged_headers, time.time())
+                await _store(cache, key, refreshed, lifetime if lifetime is not None else 0.0)
+                cache.revalidated += 1
+                logger.debug("HTTP cache revalidated: %s", url)
+                return refreshed, "REVALIDATED"
+            cache.misses += 1
+            await _maybe_store(cache, key, response)
+            return response, "MISS"
+
+    cache.misses += 1
+    response = await fetch(headers)
+    await _maybe_store(cache, key, response)
+    return response, "MISS"
+
+
+async def _store(cache: HttpCache, key: str, response: Dict[str, Any], lifetime: float) -> None:
+    if cache.disk_dir is not None:
+        await asyncio.to_thread(cache.put, key, response, lifetime)
+    else:
+        cache.put(key, response, lifetime)
+
+
+async def _maybe_store(cache: HttpCache, key: str, response: Dict[str, Any]) -> None:
+    # Spooled bodies live in files with their own lifetime
+    if response.get("status") not in _CACHEABLE_STATUS or response.get("spooled"):
+        return
+    headers = response.get("headers") or {}
+    lifetime = freshness_lifetime(headers, time.time())
+    if lifetime is None:
+        cache.drop(key)
+        return
+    # Without freshness or validators an entry could never be used
+    if lifetime <= 0 and not (_header(headers, "etag") or _header(headers, "last-modified")):
+        return
+    await _store(cache, key, response, lifetime)
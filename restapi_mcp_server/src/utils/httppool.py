@@ -0,0 +1,217 @@
+"""Process-wide pool of persistent httpx clients for downstream calls.
+
+One httpx.Client is kept per origin (scheme://host:port) so keep-alive
+connections are reused across orchestrated calls instead of paying a new
+TCP connect and TLS handshake every time. httpx.AsyncClient connections are
+bound to the event loop that opened them, so async clients are kept per
+(event loop, origin). Pool limits come from COMMON and the pool is closed
+once on application shutdown.
+"""
+from __future__ import annotations
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Dict, List, Optional
+import asyncio
+import threading
+import weakref
+import httpx
+from ..constants import COMMON
+from .logger import setup_logging
+
+logger = setup_logging()
+
+__all__ = ["HttpClientPool", "get_http_pool", "close_http_pool", "aclose_http_pool", "origin_of"]
+
+
+def origin_of(url: str) -> str:
+    """
+    Return the origin (scheme://host:port) for a URL, used as the pool key.
+    """
+    parsed = httpx.URL(url)
+    port = parsed.port or {"http": 80, "https": 443}.get(parsed.scheme, 0)
+    return f"{parsed.scheme}://{parsed.host}:{port}"
+
+
+def _build_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=COMMON.HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=COMMON.HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=COMMON.HTTP_POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def _no_cookie_jar() -> CookieJar:
+    # Clients are shared across sessions; never persist downstream cookies between calls.
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+def _connection_stats(pool: Any) -> Dict[str, int]:
+    """
+    Summarize the connections held by an httpcore connection pool.
+    """
+    connections = list(getattr(pool, "connections", []) or [])
+    idle = sum(1 for c in connections if _safe_call(c, "is_idle"))
+    closed = sum(1 for c in connections if _safe_call(c, "is_closed"))
+    waiting = len(getattr(pool, "_requests", []) or [])
+    return {
+        "connections": len(connections),
+        "active": len(connections) - idle - closed,
+        "idle": idle,
+        "queued_requests": waiting,
+    }
+
+
+def _safe_call(obj: Any, name: str) -> bool:
+    try:
+        return bool(getattr(obj, name)())
+    except Exception:
+        return False
+
+
+class HttpClientPool:
+    """
+    Keep one persistent httpx.Client per origin, and one httpx.AsyncClient per
+    (event loop, origin).
+
+    Clients are created lazily on first use and reused for every later request
+    to the same origin. The pool is thread-safe; httpx.Client itself is safe to
+    share between threads.
+    """
+
+    def __init__(self, limits: Optional[httpx.Limits] = None, timeout: Optional[float] = None) -> None:
+        self._limits = limits or _build_limits()
+        self._timeout = COMMON.DEFAULT_HTTP_TIMEOUT if timeout is None else timeout
+        self._clients: Dict[str, httpx.Client] = {}
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def get_client(self, url: str) -> httpx.Client:
+        """
+        Return the shared client for the origin of `url`, creating it if needed.
+        """
+        origin = origin_of(url)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("HTTP client pool is closed")
+            client = self._clients.get(origin)
+            if client is None:
+                logger.debug("Creating pooled HTTP client for origin %s", origin)
+                client = httpx.Client(timeout=self._timeout, limits=self._limits, cookies=_no_cookie_jar())
+                self._clients[origin] = client
+            self._requests[origin] = self._requests.get(origin, 0) + 1
+        return client
+
+    def get_async_client(self, url: str) -> httpx.AsyncClient:
+        """
+        Return the shared async client for the origin of `url` on the running event loop.
+        """
+        origin = origin_of(url)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("HTTP client pool is closed")
+            clients = self._async_clients.setdefault(loop, {})
+            client = clients.get(origin)
+            if client is None:
+                logger.debug("Creating pooled async HTTP client for origin %s", origin)
+                client = httpx.AsyncClient(timeout=self._timeout, limits=self._limits, cookies=_no_cookie_jar())
+                clients[origin] = client
+            self._requests[origin] = self._requests.get(origin, 0) + 1
+        return client
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Return pool occupancy per origin (sync and async clients combined).
+        """
+        with self._lock:
+            items: List[tuple[str, Any]] = list(self._clients.items())
+            for clients in self._async_clients.values():
+                items.extend(clients.items())
+            requests = dict(self._requests)
+        merged: Dict[str, Dict[str, int]] = {}
+        for origin, client in items:
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            totals = merged.setdefault(origin, {})
+            for key, value in _connection_stats(pool).items():
+                totals[key] = totals.get(key, 0) + value
+        return [{"origin": origin, "requests": requests.get(origin, 0), **totals} for origin, totals in merged.items()]
+
+    def limits(self) -> Dict[str, Any]:
+        return {
+            "max_connections": self._limits.max_connections,
+            "max_keepalive_connections": self._limits.max_keepalive_connections,
+            "keepalive_expiry": self._limits.keepalive_expiry,
+        }
+
+    def close(self) -> None:
+        """
+        Close every pooled client. Further get_client() calls raise RuntimeError.
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._async_clients.clear()
+            self._closed = True
+        for client in clients:
+            try:
+                client.close()
+            except Exception as exc:
+                logger.error("Failed to close pooled HTTP client: %s", exc)
+        logger.debug("HTTP client pool closed (%d client(s))", len(clients))
+
+    async def aclose(self) -> None:
+        """
+        Close async clients owned by the running event loop, then the rest of the pool.
+
+        Async clients bound to other event loops cannot be awaited from here and
+        are dropped; their connections close with their loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = list(self._async_clients.pop(loop, {}).values())
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as exc:
+                logger.error("Failed to close pooled async HTTP client: %s", exc)
+        self.close()
+
+
+_pool: Optional[HttpClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpClientPool:
+    """
+    Return the process-wide HttpClientPool, creating it on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = HttpClientPool()
+        return _pool
+
+
+def close_http_pool() -> None:
+    """
+    Close the process-wide pool if it was created.
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+async def aclose_http_pool() -> None:
+    """
+    Async variant of close_http_pool() for use from an application lifespan.
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        await pool.aclose()
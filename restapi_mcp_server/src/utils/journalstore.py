@@ -0,0 +1,304 @@
+"""Append-only JSON Lines journal backend for transactions.
+
+Writes never rewrite the file: createTransaction appends a "put" record and
+updateTransaction appends a "patch" record, so the cost of a write does not
+depend on the size of the history. Readers fold the journal into the latest
+state per transactionId; the folded state is kept in memory and caught up
+incrementally from the last read offset (other processes may append too).
+
+Several processes (WORKERS > 1) may share the journal: appends go through an
+O_APPEND descriptor in a single write, and every write and compaction holds
+an exclusive flock on "<journal>.lock", so a compaction in one process never
+drops records another process is appending.
+
+A background thread compacts the journal (rewrites it as one "put" per live
+row and atomically replaces the file) once it holds more than
+JOURNAL_COMPACT_RATIO records per live row and is larger than
+JOURNAL_COMPACT_MIN_BYTES.
+
+Record shapes (one JSON object per line):
+    {"op": "put", "row": {...}}
+    {"op": "patch", "key": "<transactionId>", "values": {...}}
+    {"op": "del", "key": "<transactionId>"}
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import math
+import os
+import threading
+from ..constants import COMMON
+from . import fastjson
+from .filelock import FileLock
+from .logger import setup_logging
+
+logger = setup_logging()
+
+__all__ = ["JournalBackend"]
+
+_KEY = "transactionId"
+
+
+def _clean(value: Any) -> Any:
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class JournalBackend:
+    """
+    Transaction storage on an append-only journal (TRANSACTION file type only).
+    """
+
+    name = "journal"
+
+    def __init__(self, storage_path: Path, columns: List[str]) -> None:
+        if not storage_path.is_dir():
+            logger.error("Storage folder not configured: %s", storage_path)
+            raise FileNotFoundError(f"Storage folder not configured: {storage_path}")
+        self.path = storage_path / COMMON.JOURNAL_FILE
+        self.columns = columns
+        self._lock = threading.RLock()
+        # Held (after self._lock) around every write: excludes other processes
+        self._file_lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._records = 0
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self.path.touch(exist_ok=True)
+        self._fh = open(self.path, "ab", buffering=0)
+        self._load()
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._compactor = threading.Thread(target=self._compact_loop, name="journal-compactor", daemon=True)
+        self._compactor.start()
+
+    # ------------------------------------------------------------------ #
+    # Journal replay
+    # ------------------------------------------------------------------ #
+    def _load(self) -> None:
+        with self._lock:
+            self._rows = {}
+            self._records = 0
+            self._offset = 0
+            self._inode = None
+            self._catch_up()
+
+    def _catch_up(self) -> None:
+        """
+        Apply records appended since the last read (by this or another process).
+        Reloads from scratch if the file was replaced by a compaction.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+        if st is None or (self._inode is not None and st.st_ino != self._inode) or (st.st_size < self._offset):
+            # Replaced (compacted) or truncated elsewhere: reopen and replay everything.
+            self._fh.close()
+            self.path.touch(exist_ok=True)
+            self._fh = open(self.path, "ab", buffering=0)
+            self._rows, self._records, self._offset = {}, 0, 0
+            st = os.stat(self.path)
+        self._inode = st.st_ino
+        if st.st_size == self._offset:
+            return
+        with open(self.path, "rb") as fh:
+            fh.seek(self._offset)
+            data = fh.read()
+        # Only consume complete lines; a concurrent writer may be mid-append.
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(fastjson.loads(line))
+            except Exception as exc:
+                logger.error("Skipping unreadable journal record in %s: %s", self.path, exc)
+        self._offset += end
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        self._records += 1
+        op = record.get("op")
+        if op == "put":
+            row = record["row"]
+            self._rows[row[_KEY]] = {c: row.get(c) for c in self.columns}
+        elif op == "patch":
+            row = self._rows.get(record["key"])
+            if row is not None:
+                row.update(record["values"])
+        elif op == "del":
+            self._rows.pop(record["key"], None)
+
+    def _append(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Append records; the caller holds self._lock and self._file_lock."""
+        payload = b"".join(
+            fastjson.dumpb(r, default=str) + b"\n" for r in records
+        )
+        if not payload:
+            return
+        # Reopens the file if another process compacted (replaced) it
+        self._catch_up()
+        view = memoryview(payload)
+        while view:
+            written = os.write(self._fh.fileno(), view)
+            view = view[written:]
+        if COMMON.JOURNAL_FSYNC:
+            os.fsync(self._fh.fileno())
+        # The file is the source of truth: fold our records (and any appended
+        # concurrently by another process) back in from the last offset.
+        self._catch_up()
+        if self._needs_compaction():
+            self._wake.set()
+
+    # ------------------------------------------------------------------ #
+    # Row API
+    # ------------------------------------------------------------------ #
+    def _check(self, file_type: COMMON.FileType, names: Iterable[str] = ()) -> None:
+        if file_type != COMMON.FileType.TRANSACTION:
+            raise ValueError("Journal storage only supports transactions")
+        for col in names:
+            if col not in self.columns:
+                logger.error("Column '%s' not found in journal for %s", col, file_type.name)
+                raise KeyError(f"Column '{col}' not found in journal for {file_type.name}")
+
+    def _match(self, equals: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if _KEY in equals:
+            row = self._rows.get(equals[_KEY])
+            candidates = [row] if row is not None else []
+        else:
+            candidates = list(self._rows.values())
+        return [r for r in candidates if all(r.get(c) == v for c, v in equals.items())]
+
+    def read_rows(self, file_type: COMMON.FileType) -> List[Dict[str, Any]]:
+        return self.filter_rows(file_type)
+
+    def filter_rows(self, file_type: COMMON.FileType, **equals: Any) -> List[Dict[str, Any]]:
+        self._check(file_type, equals.keys())
+        with self._lock:
+            self._catch_up()
+            return [dict(r) for r in self._match(equals)]
+
+    def insert_row(self, file_type: COMMON.FileType, row: Dict[str, Any]) -> None:
+        self.insert_rows(file_type, [row])
+
+    def insert_rows(self, file_type: COMMON.FileType, rows: Sequence[Dict[str, Any]]) -> None:
+        self._check(file_type)
+        records = [{"op": "put", "row": {c: _clean(r.get(c)) for c in self.columns}} for r in rows]
+        with self._lock, self._file_lock:
+            self._append(records)
+
+    def update_rows(self, file_type: COMMON.FileType, values: Dict[str, Any], **equals: Any) -> int:
+        self._check(file_type, list(values.keys()) + list(equals.keys()))
+        clean = {k: _clean(v) for k, v in values.items()}
+        with self._lock, self._file_lock:
+            self._catch_up()
+            keys = [r[_KEY] for r in self._match(equals)]
+            self._append([{"op": "patch", "key": k, "values": clean} for k in keys])
+            return len(keys)
+
+    def upsert_row(self, file_type: COMMON.FileType, row: Dict[str, Any], key_columns: Sequence[str]) -> None:
+        with self._lock, self._file_lock:
+            keys = {k: row[k] for k in key_columns}
+            values = {k: v for k, v in row.items() if k not in keys}
+            if self.update_rows(file_type, values, **keys) == 0:
+                self.insert_row(file_type, row)
+
+    def delete_rows(self, file_type: COMMON.FileType, **equals: Any) -> int:
+        self._check(file_type, equals.keys())
+        with self._lock, self._file_lock:
+            self._catch_up()
+            keys = [r[_KEY] for r in self._match(equals)]
+            self._append([{"op": "del", "key": k} for k in keys])
+            return len(keys)
+
+    def read_rows_in(self, file_type: COMMON.FileType, column: str, values: Sequence[Any]) -> List[Dict[str, Any]]:
+        self._check(file_type, [column])
+        wanted = set(values)
+        with self._lock:
+            self._catch_up()
+            if column == _KEY:
+                found = [self._rows.get(v) for v in wanted]
+                return [dict(r) for r in found if r is not None]
+            return [dict(r) for r in self._rows.values() if r.get(column) in wanted]
+
+    def delete_rows_in(self, file_type: COMMON.FileType, column: str, values: Sequence[Any]) -> int:
+        self._check(file_type, [column])
+        wanted = set(values)
+        with self._lock, self._file_lock:
+            self._catch_up()
+            keys = [r[_KEY] for r in self._rows.values() if r.get(column) in wanted]
+            self._append([{"op": "del", "key": k} for k in keys])
+            return len(keys)
+
+    def change_token(self, file_type: COMMON.FileType) -> Optional[tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def migrate_from_csv(self, file_type: COMMON.FileType, rows: List[Dict[str, Any]]) -> int:
+        """
+        Import legacy CSV rows if the journal is still empty.
+        """
+        self._check(file_type)
+        with self._lock, self._file_lock:
+            self._catch_up()
+            if self._records or not rows:
+                return 0
+            self.insert_rows(file_type, rows)
+            return len(rows)
+
+    # ------------------------------------------------------------------ #
+    # Compaction
+    # ------------------------------------------------------------------ #
+    def _needs_compaction(self) -> bool:
+        if self._offset < COMMON.JOURNAL_COMPACT_MIN_BYTES:
+            return False
+        return self._records > max(1, len(self._rows)) * COMMON.JOURNAL_COMPACT_RATIO
+
+    def compact(self) -> None:
+        """
+        Rewrite the journal as one "put" record per live row and atomically
+        replace the file.
+        """
+        with self._lock, self._file_lock:
+            self._catch_up()
+            before = self._offset
+            tmp = self.path.with_suffix(self.path.suffix + ".compact")
+            with open(tmp, "wb") as out:
+                for row in self._rows.values():
+                    out.write(fastjson.dumpb({"op": "put", "row": row}, default=str) + b"\n")
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, self.path)
+            self._fh.close()
+            self._fh = open(self.path, "ab", buffering=0)
+            st = os.stat(self.path)
+            self._inode, self._offset, self._records = st.st_ino, st.st_size, len(self._rows)
+        logger.info("Compacted transaction journal %s: %d -> %d bytes", self.path, before, self._offset)
+
+    def _compact_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(timeout=COMMON.JOURNAL_COMPACT_INTERVAL)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                with self._lock:
+                    due = self._needs_compaction()
+                if due:
+                    self.compact()
+            except Exception as exc:
+                logger.error("Transaction journal compaction failed: %s", exc)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            try:
+                self._fh.close()
+            except Exception as exc:
+                logger.error("Failed to close transaction journal: %s", exc)
@@ -1,13 +1,86 @@
 from __future__ import annotations
 
-import json
 import jq
-from typing import Any, List
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+from ..constants import COMMON
+from . import fastjson
 from .logger import setup_logging
 
 logger = setup_logging()
 
-__all__ = ["jqinterpolate"]
+__all__ = ["jqinterpolate", "compile_jq", "jq_cache_info", "clear_jq_cache"]
+
+
+class _JqProgramCache:
+    """
+    Bounded, thread-safe LRU of compiled jq programs keyed by expression.
+
+    Compiled programs are safe to share between threads (jq states are
+    pooled per program), so a hit skips jq.compile() entirely.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._programs: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, expression: str) -> Any:
+        maxsize = COMMON.JQ_CACHE_SIZE
+        with self._lock:
+            program = self._programs.get(expression)
+            if program is not None:
+                self._programs.move_to_end(expression)
+                self.hits += 1
+                return program
+            self.misses += 1
+        # Compile outside the lock; failures are raised and never cached
+        program = jq.compile(expression)
+        if maxsize <= 0:
+            return program
+        with self._lock:
+            self._programs[expression] = program
+            self._programs.move_to_end(expression)
+            while len(self._programs) > maxsize:
+                self._programs.popitem(last=False)
+                self.evictions += 1
+        return program
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._programs),
+                "maxsize": COMMON.JQ_CACHE_SIZE,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._programs.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+_PROGRAMS = _JqProgramCache()
+
+
+def compile_jq(expression: str) -> Any:
+    """Return the compiled jq program for `expression` (cached)."""
+    return _PROGRAMS.get(expression)
+
+
+def jq_cache_info() -> Dict[str, int]:
+    """Return size, maxsize and hit/miss/eviction counters of the jq program cache."""
+    return _PROGRAMS.info()
+
+
+def clear_jq_cache() -> None:
+    """Drop every compiled jq program and reset the counters."""
+    _PROGRAMS.clear()
 
 
 def jqinterpolate(expression: str, json_input: Any) -> List[Any]:
@@ -26,13 +99,15 @@ def jqinterpolate(expression: str, json_input: Any) -> List[Any]:
                    float, bool, or None).
 
     Raises:
-        json.JSONDecodeError: If `json_input` is not valid JSON text.
         jq.jq.CompileError: If `expression` is not a valid jq program.
 
     Notes:
-        - The JSON is parsed using json.loads.
-        - The jq expression is compiled per call and then evaluated with `.all()`,
-          which collects all outputs of the filter into a Python list.
+        - Valid JSON text is handed to jq as-is; Python objects are serialized
+          with the fast JSON codec (utils/fastjson) instead of jq's json.dumps.
+          Text that is not valid JSON is passed to jq as a JSON string.
+        - The compiled jq program is cached (LRU, COMMON.JQ_CACHE_SIZE entries) and
+          evaluated with `.all()`, which collects all outputs of the filter into a
+          Python list.
     """
     logger.debug("jqinterpolate called: expression=%s", expression)
     if isinstance(json_input, (str, bytes, bytearray)):
@@ -43,25 +118,26 @@ def jqinterpolate(expression: str, json_input: Any) -> List[Any]:
     # Accept either JSON text (str/bytes/bytearray) or a Python object (dict/list/etc.)
     if isinstance(json_input, (str, bytes, bytearray)):
         text = json_input.decode("utf-8") if isinstance(json_input, (bytes, bytearray)) else json_input
-        # Try to parse as JSON; if it is not valid JSON, pass the raw string to jq
+        # Valid JSON text goes to jq unchanged; anything else is passed as a JSON string
         try:
-            json_data = json.loads(text)
+            fastjson.loads(text)
+            json_text = text
         except Exception as exc:
             logger.debug("jqinterpolate: non-JSON text input, passing as string: %s", exc)
-            json_data = text
+            json_text = fastjson.dumps(text)
     else:
-        json_data = json_input
+        json_text = fastjson.dumps(json_input)
 
     try:
-        # Compile jq expression into a reusable filter
-        jq_filter = jq.compile(expression)
+        # Compiled once per distinct expression, then reused
+        jq_filter = compile_jq(expression)
     except Exception as exc:
         logger.error("jqinterpolate: failed to compile jq expression: %s", exc)
         raise
 
     try:
         # Run the filter and collect all results into a list
-        result = jq_filter.input(json_data).all()
+        result = jq_filter.input_text(json_text).all()
     except Exception as exc:
         logger.error("jqinterpolate: evaluation failed: %s", exc)
         raise
@@ -7,8 +7,8 @@
 """
 from __future__ import annotations
 from typing import Any
-import json
 import re
+from . import fastjson
 
 
 def encode_value_for_storage(value: Any) -> str:
@@ -20,9 +20,9 @@ def encode_value_for_storage(value: Any) -> str:
     """
     try:
         if isinstance(value, (dict, list)):
-            return json.dumps(value, ensure_ascii=False)
+            return fastjson.dumps(value)
         elif isinstance(value, (int, float, bool)) or value is None:
-            return json.dumps(value, ensure_ascii=False)
+            return fastjson.dumps(value)
         return str(value)
     except Exception:
         return str(value)
@@ -40,10 +40,10 @@ def decode_value_if_json(value: Any) -> Any:
 
     def _coerce_scalar(s: str) -> Any:
         sl = s.strip()
-        # Only attempt json.loads for JSON scalars: true/false/null or numbers
+        # Only attempt to parse JSON scalars: true/false/null or numbers
         if sl in ("true", "false", "null") or re.fullmatch(r"-?\d+(\.\d+)?([eE][+-]?\d+)?", sl):
             try:
-                return json.loads(sl)
+                return fastjson.loads(sl)
             except Exception:
                 return s
         return s
@@ -61,7 +61,7 @@ def decode_value_if_json(value: Any) -> Any:
         s = value.strip()
         if s.startswith("{") or s.startswith("["):
             try:
-                parsed = json.loads(s)
+                parsed = fastjson.loads(s)
                 return _normalize(parsed)
             except Exception:
                 return value
@@ -1,38 +1,261 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
 import sys
+import threading
 from uvicorn.logging import DefaultFormatter
 from ..constants import COMMON
+from . import fastjson
 
 logger = logging.getLogger(__name__)
 
+# Whether the current call's DEBUG records are kept (see sample_call)
+_SAMPLED: ContextVar[bool] = ContextVar("restapi_log_sampled", default=True)
+_PREVIEW_ENCODER = json.JSONEncoder(ensure_ascii=False, default=str)
+
+
+class _SamplingFilter(logging.Filter):
+    """Drops DEBUG records of calls not picked by LOG_SAMPLE_RATE."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or _SAMPLED.get()
+
+
+_SAMPLING_FILTER = _SamplingFilter()
+
+
+def debug_enabled() -> bool:
+    """
+    True when DEBUG records of the current call would be emitted. Guard
+    debug-only work (building previews, copying headers) with it.
+    """
+    return _SAMPLED.get() and logger.isEnabledFor(logging.DEBUG)
+
+
+@contextmanager
+def sample_call() -> Iterator[bool]:
+    """Decide once per call whether its DEBUG records are logged (LOG_SAMPLE_RATE)."""
+    rate = COMMON.LOG_SAMPLE_RATE
+    sampled = rate >= 1 or (rate > 0 and random.random() < rate)
+    token = _SAMPLED.set(sampled)
+    try:
+        yield sampled
+    finally:
+        _SAMPLED.reset(token)
+
+
+def capped_preview(value: Any, limit: Optional[int] = None) -> str:
+    """
+    Text of `value` cut to `limit` characters (LOG_PREVIEW_BYTES by default).
+    Containers are serialized incrementally, so a large payload is only
+    encoded up to the limit.
+    """
+    limit = COMMON.LOG_PREVIEW_BYTES if limit is None else limit
+    if isinstance(value, (bytes, bytearray)):
+        text = bytes(value[: limit + 1]).decode("utf-8", errors="replace")
+        total = len(value)
+    elif isinstance(value, str):
+        text, total = value[: limit + 1], len(value)
+    else:
+        parts = []
+        size = 0
+        try:
+            for chunk in _PREVIEW_ENCODER.iterencode(value):
+                parts.append(chunk)
+                size += len(chunk)
+                if size > limit:
+                    break
+            text = "".join(parts)
+        except Exception:
+            try:
+                text = repr(value)[: limit + 1]
+            except Exception:
+                text = "<unrepresentable>"
+        total = None
+    if len(text) <= limit:
+        return text
+    more = f"{total - limit} more" if total is not None else "more"
+    return f"{text[:limit]}... <{more} chars>"
+
+
+class LogPreview:
+    """Formats capped_preview(value) only if the log record is emitted."""
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: Optional[int] = None) -> None:
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return capped_preview(self.value, self.limit)
+
+    __repr__ = __str__
+
+
+def preview(value: Any, limit: Optional[int] = None) -> LogPreview:
+    """Lazy, size-capped preview for logger arguments: logger.debug("x=%s", preview(x))."""
+    return LogPreview(value, limit)
+
+
+class _RecordQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread. Only the message is rendered here
+    (its arguments may change once the call returns); the exception text is
+    rendered too, since tracebacks cannot cross threads. Formatting happens
+    in the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _PLAIN_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, thread, message and exc/stack when present."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return fastjson.dumps(entry, default=str)
+
+
+_PLAIN_FORMATTER = logging.Formatter()
+_listener: Optional[QueueListener] = None
+_config: Optional[Tuple[Any, ...]] = None
+_setup_lock = threading.Lock()
+
+
+def _formatter(colors: bool) -> logging.Formatter:
+    if COMMON.LOG_FORMAT == "json":
+        return JsonLineFormatter()
+    if colors:
+        return DefaultFormatter("%(levelprefix)s %(message)s", use_colors=True)
+    return logging.Formatter("%(asctime)s %(levelname)s [%(threadName)s] %(message)s")
+
+
+def _file_handler() -> logging.Handler:
+    directory = Path(COMMON.LOG_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / COMMON.LOG_FILE_NAME
+    if COMMON.LOG_ROTATE_WHEN:
+        return TimedRotatingFileHandler(
+            path, when=COMMON.LOG_ROTATE_WHEN, backupCount=COMMON.LOG_BACKUP_COUNT, encoding="utf-8", utc=True
+        )
+    return RotatingFileHandler(
+        path, maxBytes=COMMON.LOG_MAX_BYTES, backupCount=COMMON.LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+
+
+def output_handlers() -> List[logging.Handler]:
+    """Handlers the background listener writes to (console first, then the file sink if any)."""
+    return list(_listener.handlers) if _listener is not None else []
+
+
+def shutdown_logging() -> None:
+    """Stop the background writer after it has written every queued record."""
+    global _listener, _config
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+        _listener = None
+        _config = None
+
+
 def setup_logging() -> logging.Logger:
     """
-    Setup the logging configuration for the application. 
-    """          
+    Setup the logging configuration for the application.
 
-    debug=COMMON.DEBUG
+    Log calls only put the record on a queue; a single background thread
+    (QueueListener) formats and writes it to stderr and, when LOG_DIR is
+    set, to a rotating file. Modules call this at import, so it only
+    rebuilds the pipeline when the logging settings changed since the last
+    call (e.g. after load_common_from_env()).
+    """
+    global _listener, _config
 
-    logger.setLevel(logging.DEBUG if debug else logging.INFO)
-    logger.propagate = False
+    debug = COMMON.DEBUG
+    config = (
+        debug,
+        COMMON.LOG_FORMAT,
+        COMMON.LOG_DIR,
+        COMMON.LOG_FILE_NAME,
+        COMMON.LOG_MAX_BYTES,
+        COMMON.LOG_ROTATE_WHEN,
+        COMMON.LOG_BACKUP_COUNT,
+    )
+    with _setup_lock:
+        logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        logger.propagate = False
+        if _SAMPLING_FILTER not in logger.filters:
+            logger.addFilter(_SAMPLING_FILTER)
+        if config == _config and _listener is not None:
+            return logger
+
+        handlers: List[logging.Handler] = []
+        try:
+            handler = logging.StreamHandler()
+            handler.setLevel(logging.DEBUG if debug else logging.INFO)
+            handler.setFormatter(_formatter(colors=True))
+            handlers.append(handler)
+        except Exception as e:
+            print(f"Failed to create stdout log handler: {e}", file=sys.stderr)
+
+        if COMMON.LOG_DIR:
+            try:
+                handler = _file_handler()
+                handler.setLevel(logging.DEBUG if debug else logging.INFO)
+                handler.setFormatter(_formatter(colors=False))
+                handlers.append(handler)
+            except Exception as e:
+                print(f"Failed to create log file handler in {COMMON.LOG_DIR}: {e}", file=sys.stderr)
+
+        previous = _listener
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+        # Swap the queue handler in before draining the old pipeline
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(_RecordQueueHandler(log_queue))
+        _config = config
+
+        if previous is not None:
+            previous.stop()
+            for handler in previous.handlers:
+                handler.close()
 
-    # Remove all existing handlers to prevent accumulation
-    for handler in logger.handlers:
-        logger.removeHandler(handler)
-    
-    handlers = []
-           
-    # Create a new handler
-    try:
-        handler = logging.StreamHandler()
-        handler.setLevel(logging.DEBUG if debug else logging.INFO)
-        formatter = DefaultFormatter("%(levelprefix)s %(message)s", use_colors=True)
-        handler.setFormatter(formatter)
-        handlers.append(handler)
-    except Exception as e:
-        print(f"Failed to create stdout log handler: {e}", file=sys.stderr)
-
-    # Add the handlers to the logger
-    for handler in handlers:
-        logger.addHandler(handler)
-    
     return logger
+
+
+atexit.register(shutdown_logging)
@@ -2,18 +2,71 @@ import pandas as pd
 from ..constants import COMMON
 from pathlib import Path
 from .logger import setup_logging
-from typing import Dict, List, Any
+from .filelock import FileLock, atomic_write_path
+from .calltiming import TIMING_COLUMNS
+from typing import Dict, Iterator, List, Any, Optional, Sequence
+import os
+import sys
+import threading
 
 logger = setup_logging()
 
+# Column layout shared by every storage backend
+COLUMNS: Dict[COMMON.FileType, List[str]] = {
+    COMMON.FileType.ENVIRONMENT: ["environment", "variable", "value"],
+    COMMON.FileType.TRANSACTION: [
+        "transactionId",
+        "session",
+        "action",
+        "http_method",
+        "request",
+        "response",
+        "status",
+        "creation_dt",
+        "last_updation_dt",
+        *TIMING_COLUMNS,
+    ],
+    # Last call state per session when it is shared by several workers (see executioncontext)
+    COMMON.FileType.SESSION: ["session", "context", "last_used"],
+}
+
+_CSV_FILES: Dict[COMMON.FileType, str] = {
+    COMMON.FileType.ENVIRONMENT: "environment.csv",
+    COMMON.FileType.TRANSACTION: "transaction.csv",
+    COMMON.FileType.SESSION: "session.csv",
+}
+
+# One re-entrant lock per storage file. Requests are served concurrently, and
+# with WORKERS > 1 by several processes, so CSV read-modify-write sequences
+# must hold the file's lock (a thread lock plus a flock on "<file>.lock").
+_STORAGE_LOCKS: Dict[Path, FileLock] = {}
+_STORAGE_LOCKS_GUARD = threading.Lock()
+
+def storage_lock(file_type: COMMON.FileType) -> FileLock:
+    """
+    Return the re-entrant, cross-process lock guarding the storage file for `file_type`.
+
+    Hold it around any read-modify-write sequence, e.g.:
+
+        with storage_lock(COMMON.FileType.TRANSACTION):
+            df = read_csv_df(COMMON.FileType.TRANSACTION)
+            ...
+            write_csv_df(df, COMMON.FileType.TRANSACTION)
+    """
+    lock_path = get_file_location(file_type).with_suffix(".csv.lock")
+    with _STORAGE_LOCKS_GUARD:
+        lock = _STORAGE_LOCKS.get(lock_path)
+        if lock is None:
+            lock = _STORAGE_LOCKS[lock_path] = FileLock(lock_path)
+        return lock
+
 def get_file_location(file_type: COMMON.FileType) -> Path:
     """
     Return the CSV file path for the given file type under COMMON.STORAGE.
     Does not create the file or directory.
     """
     storage_path = Path(COMMON.STORAGE)
-    filename = "environment.csv" if file_type == COMMON.FileType.ENVIRONMENT else "transaction.csv"
-    return storage_path / filename
+    return storage_path / _CSV_FILES[file_type]
 
 def write_csv_df(incoming_df: pd.DataFrame, file_type: COMMON.FileType):
     """Write a DataFrame to the configured storage CSV.
@@ -26,8 +79,9 @@ def write_csv_df(incoming_df: pd.DataFrame, file_type: COMMON.FileType):
     - If the configured storage folder does not exist, an error is logged.
     - If the target CSV file is missing, an error is logged and no write
       is attempted.
-    - On success the DataFrame is written with `index=False` and a debug
-      log is emitted.
+    - On success the DataFrame is written with `index=False` to a temporary
+      file that atomically replaces the CSV, so readers in this or another
+      process never see a partially written file.
 
     Args:
         incoming_df (pd.DataFrame): DataFrame to write to CSV.
@@ -52,13 +106,20 @@ def write_csv_df(incoming_df: pd.DataFrame, file_type: COMMON.FileType):
 
     logger.debug("%s file found: %s", path.name, path)
     try:
-        incoming_df.to_csv(path, index=False)
+        with storage_lock(file_type):
+            tmp = atomic_write_path(path)
+            try:
+                incoming_df.to_csv(tmp, index=False)
+                os.replace(tmp, path)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
     except Exception as exc:
         logger.error("Failed to write CSV %s: %s", path, exc)
         raise
     logger.debug("%s file updated", path.name)
 
-def filter_rows(file_type: COMMON.FileType, **equals: Any) -> List[Dict[str, Any]]:
+def filter_csv_rows(file_type: COMMON.FileType, **equals: Any) -> List[Dict[str, Any]]:
     """Filter rows from a CSV by equality on provided columns.
 
     Loads the CSV for the given file type (via get_file_location) and returns rows
@@ -138,9 +199,378 @@ def read_csv_df(file_type: COMMON.FileType = COMMON.FileType.ENVIRONMENT) -> pd.
 
     logger.debug("%s file found: %s", path.name, path)
     try:
-        df = pd.read_csv(path, dtype=object)
+        with storage_lock(file_type):
+            df = pd.read_csv(path, dtype=object)
     except Exception as exc:
         logger.error("Failed to read CSV %s: %s", path, exc)
         raise
     
     return df
+
+
+class CsvBackend:
+    """
+    Legacy storage on environment.csv / transaction.csv via pandas.
+
+    Every operation reads and/or rewrites the whole file while holding the
+    file's storage_lock(), which also excludes other processes. Kept for
+    STORAGE_BACKEND=csv deployments.
+    """
+
+    name = "csv"
+
+    @staticmethod
+    def _ensure_file(file_type: COMMON.FileType) -> None:
+        # session.csv is not shipped with the storage folder; create it on first use
+        if file_type != COMMON.FileType.SESSION:
+            return
+        path = get_file_location(file_type)
+        if path.is_file() or not Path(COMMON.STORAGE).is_dir():
+            return
+        with storage_lock(file_type):
+            if not path.is_file():
+                pd.DataFrame(columns=COLUMNS[file_type]).to_csv(path, index=False)
+
+    def read_rows(self, file_type: COMMON.FileType) -> List[Dict[str, Any]]:
+        self._ensure_file(file_type)
+        df = read_csv_df(file_type)
+        if df.empty:
+            return []
+        return df.to_dict(orient="records")  # type: ignore
+
+    def filter_rows(self, file_type: COMMON.FileType, **equals: Any) -> List[Dict[str, Any]]:
+        self._ensure_file(file_type)
+        return filter_csv_rows(file_type, **equals)
+
+    def insert_row(self, file_type: COMMON.FileType, row: Dict[str, Any]) -> None:
+        self.insert_rows(file_type, [row])
+
+    def insert_rows(self, file_type: COMMON.FileType, rows: Sequence[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        self._ensure_file(file_type)
+        with storage_lock(file_type):
+            df = read_csv_df(file_type)
+            new_df = pd.DataFrame(list(rows))
+            df = new_df if df.empty else pd.concat([df, new_df], ignore_index=True)
+            write_csv_df(df, file_type)
+
+    def update_rows(self, file_type: COMMON.FileType, values: Dict[str, Any], **equals: Any) -> int:
+        self._ensure_file(file_type)
+        with storage_lock(file_type):
+            df = read_csv_df(file_type)
+            if df.empty:
+                return 0
+            mask = self._mask(df, file_type, equals)
+            count = int(mask.sum())
+            if count == 0:
+                return 0
+            for col, val in values.items():
+                df.loc[mask, col] = val
+            write_csv_df(df, file_type)
+            return count
+
+    def upsert_row(self, file_type: COMMON.FileType, row: Dict[str, Any], key_columns: Sequence[str]) -> None:
+        with storage_lock(file_type):
+            keys = {k: row[k] for k in key_columns}
+            values = {k: v for k, v in row.items() if k not in keys}
+            if self.update_rows(file_type, values, **keys) == 0:
+                self.insert_row(file_type, row)
+
+    def delete_rows(self, file_type: COMMON.FileType, **equals: Any) -> int:
+        self._ensure_file(file_type)
+        with storage_lock(file_type):
+            df = read_csv_df(file_type)
+            if df.empty:
+                return 0
+            mask = self._mask(df, file_type, equals)
+            count = int(mask.sum())
+            if count == 0:
+                return 0
+            write_csv_df(df[~mask], file_type)
+            return count
+
+    def read_rows_in(self, file_type: COMMON.FileType, column: str, values: Sequence[Any]) -> List[Dict[str, Any]]:
+        if not values:
+            return []
+        self._ensure_file(file_type)
+        df = read_csv_df(file_type)
+        if df.empty:
+            return []
+        if column not in df.columns:
+            logger.error("Column '%s' not found in CSV for %s", column, file_type.name)
+            raise KeyError(f"Column '{column}' not found in CSV for {file_type.name}")
+        return df[df[column].isin(list(values))].to_dict(orient="records")  # type: ignore
+
+    def delete_rows_in(self, file_type: COMMON.FileType, column: str, values: Sequence[Any]) -> int:
+        if not values:
+            return 0
+        self._ensure_file(file_type)
+        with storage_lock(file_type):
+            df = read_csv_df(file_type)
+            if df.empty:
+                return 0
+            if column not in df.columns:
+                logger.error("Column '%s' not found in CSV for %s", column, file_type.name)
+                raise KeyError(f"Column '{column}' not found in CSV for {file_type.name}")
+            mask = df[column].isin(list(values))
+            count = int(mask.sum())
+            if count == 0:
+                return 0
+            write_csv_df(df[~mask], file_type)
+            return count
+
+    def change_token(self, file_type: COMMON.FileType) -> Optional[tuple[int, int, int]]:
+        try:
+            st = os.stat(get_file_location(file_type))
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _mask(df: pd.DataFrame, file_type: COMMON.FileType, equals: Dict[str, Any]) -> "pd.Series[bool]":
+        mask = pd.Series(True, index=df.index)
+        for col, val in equals.items():
+            if col not in df.columns:
+                logger.error("Column '%s' not found in CSV for %s", col, file_type.name)
+                raise KeyError(f"Column '{col}' not found in CSV for {file_type.name}")
+            mask &= df[col] == val
+        return mask
+
+    def close(self) -> None:
+        pass
+
+
+_backend: Optional[Any] = None
+_backend_key: Optional[tuple[str, str]] = None
+_journal: Optional[Any] = None
+_journal_key: Optional[str] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> Any:
+    """
+    Return the storage backend selected by COMMON.STORAGE_BACKEND ("sqlite" or "csv").
+
+    The backend is created on first use and re-created if STORAGE or
+    STORAGE_BACKEND change. Opening the SQLite backend imports rows from the
+    legacy CSV files once (see sqlitestore).
+    """
+    global _backend, _backend_key
+    key = (str(COMMON.STORAGE_BACKEND).lower(), str(COMMON.STORAGE))
+    with _backend_lock:
+        if _backend is not None and _backend_key == key:
+            return _backend
+        if _backend is not None:
+            _backend.close()
+        kind, storage = key
+        if kind == "csv":
+            backend: Any = CsvBackend()
+        elif kind == "sqlite":
+            from .sqlitestore import SqliteBackend
+
+            backend = SqliteBackend(Path(storage), COLUMNS)
+            _migrate_csv_into(backend)
+        else:
+            logger.error("Unsupported STORAGE_BACKEND: %s", COMMON.STORAGE_BACKEND)
+            raise ValueError(f"Unsupported STORAGE_BACKEND: {COMMON.STORAGE_BACKEND}")
+        logger.debug("Storage backend: %s (%s)", backend.name, storage)
+        _backend, _backend_key = backend, key
+        return backend
+
+
+def _get_journal() -> Any:
+    """
+    Return the append-only transaction journal (TRANSACTION_BACKEND=journal).
+    """
+    global _journal, _journal_key
+    storage = str(COMMON.STORAGE)
+    with _backend_lock:
+        if _journal is not None and _journal_key == storage:
+            return _journal
+        if _journal is not None:
+            _journal.close()
+        from .journalstore import JournalBackend
+
+        journal = JournalBackend(Path(storage), COLUMNS[COMMON.FileType.TRANSACTION])
+        if get_file_location(COMMON.FileType.TRANSACTION).is_file():
+            imported = journal.migrate_from_csv(
+                COMMON.FileType.TRANSACTION, CsvBackend().read_rows(COMMON.FileType.TRANSACTION)
+            )
+            if imported:
+                logger.info("Migrated %d TRANSACTION row(s) from CSV into journal storage", imported)
+        logger.debug("Transaction journal: %s", journal.path)
+        _journal, _journal_key = journal, storage
+        return journal
+
+
+def _backend_for(file_type: COMMON.FileType) -> Any:
+    if file_type == COMMON.FileType.TRANSACTION and str(COMMON.TRANSACTION_BACKEND).lower() == "journal":
+        return _get_journal()
+    return get_backend()
+
+
+def close_backend() -> None:
+    """
+    Close the active storage backend(s), if any.
+    """
+    global _backend, _backend_key, _journal, _journal_key
+    with _backend_lock:
+        backends = [_backend, _journal]
+        _backend, _backend_key, _journal, _journal_key = None, None, None, None
+    for backend in backends:
+        if backend is not None:
+            backend.close()
+
+
+def _migrate_csv_into(backend: Any) -> None:
+    for file_type in COMMON.FileType:
+        if not get_file_location(file_type).is_file():
+            continue
+        try:
+            rows = CsvBackend().read_rows(file_type)
+            imported = backend.migrate_from_csv(file_type, rows)
+        except Exception as exc:
+            logger.error("Failed to migrate %s CSV into %s storage: %s", file_type.name, backend.name, exc)
+            raise
+        if imported:
+            logger.info("Migrated %d %s row(s) from CSV into %s storage", imported, file_type.name, backend.name)
+
+
+def read_rows(file_type: COMMON.FileType) -> List[Dict[str, Any]]:
+    """Return every row for `file_type` from the active storage backend."""
+    return _backend_for(file_type).read_rows(file_type)
+
+
+def filter_rows(file_type: COMMON.FileType, **equals: Any) -> List[Dict[str, Any]]:
+    """Return rows matching all `column=value` equality filters.
+
+    Raises KeyError if a filter column does not exist.
+    """
+    logger.debug("Filter %s equals: %s", file_type.name, equals)
+    return _backend_for(file_type).filter_rows(file_type, **equals)
+
+
+def insert_row(file_type: COMMON.FileType, row: Dict[str, Any]) -> None:
+    """Append a single row."""
+    _backend_for(file_type).insert_row(file_type, row)
+
+
+def insert_rows(file_type: COMMON.FileType, rows: Sequence[Dict[str, Any]]) -> None:
+    """Append several rows in one write."""
+    _backend_for(file_type).insert_rows(file_type, rows)
+
+
+def update_rows(file_type: COMMON.FileType, values: Dict[str, Any], **equals: Any) -> int:
+    """Set `values` on rows matching all equality filters; returns the number of rows updated."""
+    return _backend_for(file_type).update_rows(file_type, values, **equals)
+
+
+def upsert_row(file_type: COMMON.FileType, row: Dict[str, Any], key_columns: Sequence[str]) -> None:
+    """Update the row identified by `key_columns`, or insert it if missing."""
+    _backend_for(file_type).upsert_row(file_type, row, key_columns)
+
+
+def delete_rows(file_type: COMMON.FileType, **equals: Any) -> int:
+    """Delete rows matching all equality filters; returns the number of rows deleted."""
+    return _backend_for(file_type).delete_rows(file_type, **equals)
+
+
+def page_rows(
+    file_type: COMMON.FileType,
+    order_by: Sequence[str],
+    equals: Optional[Dict[str, Any]] = None,
+    lower: Optional[Any] = None,
+    upper: Optional[Any] = None,
+    after: Optional[Sequence[Any]] = None,
+    descending: bool = False,
+    limit: int = 50,
+    columns: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Return one page of rows in keyset order.
+
+    Rows match all `equals` filters and have lower <= order_by[0] < upper
+    (either bound optional). They are sorted by the `order_by` columns
+    (descending if asked) and start strictly after the `after` key (the
+    order_by values of the previous page's last row). Only `columns` are
+    returned (all columns if None); the order_by columns are always included.
+    Values are compared as strings.
+
+    SQLite runs this as one indexed query. The other backends filter and
+    sort in memory.
+    """
+    equals = equals or {}
+    backend = _backend_for(file_type)
+    if hasattr(backend, "page_rows"):
+        return backend.page_rows(file_type, order_by, equals, lower, upper, after, descending, limit, columns)
+
+    def key(r: Dict[str, Any]) -> tuple:
+        return tuple("" if r.get(c) is None else str(r.get(c)) for c in order_by)
+
+    rows = backend.filter_rows(file_type, **equals)
+    first = order_by[0]
+    if lower is not None:
+        rows = [r for r in rows if r.get(first) is not None and str(r.get(first)) >= str(lower)]
+    if upper is not None:
+        rows = [r for r in rows if r.get(first) is not None and str(r.get(first)) < str(upper)]
+    if after is not None:
+        cursor = tuple(str(v) for v in after)
+        rows = [r for r in rows if (key(r) < cursor if descending else key(r) > cursor)]
+    rows.sort(key=key, reverse=descending)
+    rows = rows[: max(0, limit)]
+    if columns is not None:
+        keep = list(dict.fromkeys([*order_by, *columns]))
+        rows = [{c: r.get(c) for c in keep} for r in rows]
+    return rows
+
+
+def scan_rows(
+    file_type: COMMON.FileType,
+    order_by: Sequence[str],
+    equals: Optional[Dict[str, Any]] = None,
+    lower: Optional[Any] = None,
+    upper: Optional[Any] = None,
+    descending: bool = False,
+    columns: Optional[Sequence[str]] = None,
+    batch_size: int = 1000,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield every row page_rows() would match, in batches of `batch_size`.
+
+    SQLite reads one keyset page per batch, so only a batch is held in
+    memory however many rows match. The other backends filter and sort once
+    and yield slices of the result.
+    """
+    equals = equals or {}
+    batch_size = max(1, int(batch_size))
+    backend = _backend_for(file_type)
+    if hasattr(backend, "page_rows"):
+        after: Optional[List[Any]] = None
+        while True:
+            rows = backend.page_rows(file_type, order_by, equals, lower, upper, after, descending, batch_size, columns)
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                return
+            after = [rows[-1].get(c) for c in order_by]
+
+    rows = page_rows(file_type, order_by, equals, lower, upper, None, descending, sys.maxsize, columns)
+    for start in range(0, len(rows), batch_size):
+        yield rows[start:start + batch_size]
+
+
+def read_rows_in(file_type: COMMON.FileType, column: str, values: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Return the rows whose `column` is one of `values`."""
+    return _backend_for(file_type).read_rows_in(file_type, column, values)
+
+
+def delete_rows_in(file_type: COMMON.FileType, column: str, values: Sequence[Any]) -> int:
+    """Delete rows whose `column` is one of `values` in one write; returns the number of rows deleted."""
+    return _backend_for(file_type).delete_rows_in(file_type, column, values)
+
+
+def storage_change_token(file_type: COMMON.FileType) -> Optional[tuple[int, int, int]]:
+    """Return an opaque (inode, mtime_ns, size) token that changes when `file_type` rows are written.
+
+    Only stats a file; used by caches to detect writes from other processes.
+    """
+    return _backend_for(file_type).change_token(file_type)
@@ -0,0 +1,278 @@
+"""Outbound admission control per downstream origin.
+
+Each origin (scheme://host:port) gets an OriginLimiter enforcing:
+  - max_in_flight: concurrent requests (0 = unlimited)
+  - rps / burst: token bucket refilled at `rps` tokens per second holding at
+    most `burst` tokens (rps 0 = unlimited)
+
+Callers that cannot be admitted wait in a FIFO queue and are admitted in
+arrival order (a later caller never overtakes a queued one). Waiting is
+async and works across event loops (the MCP tools and the API run on
+different loops), so state is guarded by a threading lock and waiters are
+woken with call_soon_threadsafe.
+
+Limits come from the server defaults (COMMON.OUTBOUND_*) or an environment's
+RESTAPI_RATE_LIMIT variable; see limits_from_config(). Environments calling
+the same origin share its limiter: the latest limits of every environment
+are kept and the strictest value of each field applies (see strictest()),
+so no call can relax limits another environment set.
+"""
+from __future__ import annotations
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Mapping, Optional
+import asyncio
+import threading
+import time
+from ..constants import COMMON
+from .httppool import origin_of
+from .logger import setup_logging
+
+logger = setup_logging()
+
+__all__ = ["OriginLimits", "limits_from_config", "strictest", "admit", "admission_stats"]
+
+
+@dataclass(frozen=True)
+class OriginLimits:
+    max_in_flight: int = 0
+    rps: float = 0.0
+    burst: float = 0.0
+
+    @property
+    def unlimited(self) -> bool:
+        return self.max_in_flight <= 0 and self.rps <= 0
+
+    @classmethod
+    def defaults(cls) -> "OriginLimits":
+        return cls(COMMON.OUTBOUND_MAX_IN_FLIGHT, COMMON.OUTBOUND_RPS, COMMON.OUTBOUND_BURST)
+
+
+_LIMIT_KEYS = ("max_in_flight", "rps", "burst")
+
+
+def _limits_from_mapping(base: OriginLimits, value: Mapping[str, Any]) -> OriginLimits:
+    values = {k: getattr(base, k) for k in _LIMIT_KEYS}
+    for key in _LIMIT_KEYS:
+        if key in value and value[key] is not None:
+            values[key] = int(value[key]) if key == "max_in_flight" else float(value[key])
+    return OriginLimits(**values)
+
+
+def strictest(*limits: OriginLimits) -> OriginLimits:
+    """Field by field the lowest set (> 0) value of `limits`; 0 (unlimited) if none sets it."""
+    def lowest(values: Any) -> Any:
+        chosen = [v for v in values if v > 0]
+        return min(chosen) if chosen else 0
+
+    return OriginLimits(
+        max_in_flight=int(lowest(l.max_in_flight for l in limits)),
+        rps=float(lowest(l.rps for l in limits)),
+        burst=float(lowest(l.burst for l in limits)),
+    )
+
+
+def limits_from_config(url: str, config: Any) -> OriginLimits:
+    """
+    Limits for `url`: server defaults overlaid by `config`, which is either
+    {"max_in_flight": .., "rps": .., "burst": ..} for every origin, or a map
+    of origin -> such an object with "*" as the fallback entry.
+    """
+    limits = OriginLimits.defaults()
+    if not isinstance(config, Mapping):
+        return limits
+    try:
+        if any(k in config for k in _LIMIT_KEYS):
+            return _limits_from_mapping(limits, config)
+        entry = config.get(origin_of(url), config.get("*"))
+        if isinstance(entry, Mapping):
+            return _limits_from_mapping(limits, entry)
+    except (TypeError, ValueError) as exc:
+        logger.error("Ignoring invalid rate limit configuration: %s", exc)
+    return limits
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted", "enqueued")
+
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.future: asyncio.Future = self.loop.create_future()
+        self.granted = False
+        self.enqueued = time.monotonic()
+
+
+class OriginLimiter:
+    def __init__(self, origin: str) -> None:
+        self.origin = origin
+        self.limits = OriginLimits.defaults()
+        # Latest limits per source (environment); combined by strictest()
+        self._sources: Dict[str, OriginLimits] = {}
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._tokens = self._capacity()
+        self._refilled = time.monotonic()
+        self._waiters: Deque[_Waiter] = deque()
+        self._timer_pending = False
+        # metrics
+        self.admitted = 0
+        self.queued_total = 0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+
+    def configure(self, source: str, limits: OriginLimits) -> None:
+        """Record `source`'s limits; the strictest of all sources and the server defaults applies."""
+        with self._lock:
+            if self._sources.get(source) == limits:
+                return
+            self._sources[source] = limits
+            effective = strictest(OriginLimits.defaults(), *self._sources.values())
+            if effective != self.limits:
+                self.limits = effective
+                self._tokens = min(self._tokens, self._capacity())
+                self._dispatch()
+
+    def _capacity(self) -> float:
+        return max(1.0, self.limits.burst or self.limits.rps or 1.0)
+
+    def _refill(self, now: float) -> None:
+        if self.limits.rps > 0:
+            self._tokens = min(self._capacity(), self._tokens + (now - self._refilled) * self.limits.rps)
+        self._refilled = now
+
+    def _can_admit(self) -> bool:
+        if self.limits.max_in_flight > 0 and self._in_flight >= self.limits.max_in_flight:
+            return False
+        return self.limits.rps <= 0 or self._tokens >= 1.0
+
+    def _take(self, waited: float) -> None:
+        self._in_flight += 1
+        if self.limits.rps > 0:
+            self._tokens -= 1.0
+        self.admitted += 1
+        self.wait_total_s += waited
+        self.wait_max_s = max(self.wait_max_s, waited)
+
+    def _dispatch(self) -> None:
+        """Admit queued waiters in FIFO order while capacity allows (lock held)."""
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters and self._can_admit():
+            waiter = self._waiters.popleft()
+            try:
+                waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+            except RuntimeError:
+                # The waiter's event loop is closed; nobody is waiting any more.
+                continue
+            waiter.granted = True
+            self._take(now - waiter.enqueued)
+        if self._waiters and not self._timer_pending and self.limits.rps > 0 and not (
+            self.limits.max_in_flight > 0 and self._in_flight >= self.limits.max_in_flight
+        ):
+            # Blocked on tokens only: re-dispatch when the next token is due.
+            delay = max(0.0, (1.0 - self._tokens) / self.limits.rps)
+            loop = self._waiters[0].loop
+            try:
+                loop.call_soon_threadsafe(loop.call_later, delay, self._on_timer)
+                self._timer_pending = True
+            except RuntimeError:
+                self._waiters.popleft()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer_pending = False
+            self._dispatch()
+
+    async def acquire(self) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            if not self._waiters and self._can_admit():
+                self._take(0.0)
+                return
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+            self.queued_total += 1
+            self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._release_locked()
+                else:
+                    try:
+                        self._waiters.remove(waiter)
+                    except ValueError:
+                        pass
+            raise
+
+    def _release_locked(self) -> None:
+        self._in_flight = max(0, self._in_flight - 1)
+        self._dispatch()
+
+    def release(self) -> None:
+        with self._lock:
+            self._release_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sources": sorted(self._sources),
+                "max_in_flight": self.limits.max_in_flight,
+                "rps": self.limits.rps,
+                "burst": self.limits.burst,
+                "in_flight": self._in_flight,
+                "queued": len(self._waiters),
+                "admitted": self.admitted,
+                "queued_total": self.queued_total,
+                "queue_wait_avg_ms": round(self.wait_total_s * 1000.0 / self.admitted, 3) if self.admitted else 0.0,
+                "queue_wait_max_ms": round(self.wait_max_s * 1000.0, 3),
+            }
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+_LIMITERS: Dict[str, OriginLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def _limiter(origin: str) -> OriginLimiter:
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(origin)
+        if limiter is None:
+            limiter = _LIMITERS[origin] = OriginLimiter(origin)
+        return limiter
+
+
+@asynccontextmanager
+async def admit(url: str, limits: Optional[OriginLimits] = None, source: str = "") -> AsyncIterator[None]:
+    """
+    Hold an admission slot for one request to `url`'s origin.
+
+    `limits` are the limits `source` (the calling environment) configures
+    for the origin; they replace only that source's earlier limits. Without
+    `limits` the origin's current limits apply unchanged.
+    """
+    origin = origin_of(url)
+    if origin not in _LIMITERS and (limits or OriginLimits.defaults()).unlimited:
+        yield
+        return
+    limiter = _limiter(origin)
+    if limits is not None:
+        limiter.configure(source, limits)
+    await limiter.acquire()
+    try:
+        yield
+    finally:
+        limiter.release()
+
+
+def admission_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-origin limits, occupancy and queue wait metrics."""
+    with _LIMITERS_LOCK:
+        limiters = list(_LIMITERS.values())
+    return {l.origin: l.stats() for l in limiters}
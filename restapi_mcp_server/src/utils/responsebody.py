@@ -0,0 +1,184 @@
+"""Downstream response bodies: single-pass decoding, previews and spooling.
+
+- decode_body() turns raw bytes into the parsed JSON value or text in one pass
+  (httpx's response.json() followed by response.text decodes twice).
+- BodySink collects a streamed body in memory up to RESPONSE_MEMORY_MAX_BYTES
+  and spools anything larger to a file under STORAGE/RESPONSE_SPOOL_DIR, so a
+  multi-megabyte download never sits in memory. Spooled files are served by
+  GET /restapi/responseFile and removed after RESPONSE_SPOOL_TTL seconds.
+- preview_text() / truncate_for_storage() cap what reaches logs and
+  transaction rows.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, Optional
+import hashlib
+import os
+import re
+import threading
+import time
+import uuid
+from ..constants import COMMON
+from . import fastjson
+from .logger import setup_logging
+
+logger = setup_logging()
+
+__all__ = [
+    "BodySink",
+    "decode_body",
+    "preview_text",
+    "truncate_for_storage",
+    "spool_dir",
+    "spool_path",
+    "purge_spool",
+]
+
+_SPOOL_NAME_RE = re.compile(r"^[0-9a-f]{32}\.body$")
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def decode_body(content: bytes, charset: Optional[str] = None) -> Any:
+    """Parsed JSON if the body is JSON, otherwise its text."""
+    if not content:
+        return ""
+    # Markup is by far the most common large non-JSON body; skip the JSON attempt
+    if content.lstrip()[:1] != b"<":
+        try:
+            return fastjson.loads(content)
+        except (ValueError, UnicodeDecodeError):
+            pass
+    return content.decode(charset or "utf-8", errors="replace")
+
+
+def preview_text(content: bytes, charset: Optional[str] = None, limit: Optional[int] = None) -> str:
+    """The first `limit` bytes of a body as text, marked when cut."""
+    limit = COMMON.BODY_PREVIEW_BYTES if limit is None else limit
+    text = content[:limit].decode(charset or "utf-8", errors="replace")
+    if len(content) > limit:
+        text += f"... <{len(content) - limit} more bytes>"
+    return text
+
+
+def truncate_for_storage(body: Any, limit: Optional[int] = None) -> Any:
+    """
+    The body as stored in a transaction: unchanged while its JSON form fits in
+    TRANSACTION_BODY_MAX_BYTES (0 = no limit), otherwise a truncated preview.
+    """
+    limit = COMMON.TRANSACTION_BODY_MAX_BYTES if limit is None else limit
+    if limit <= 0 or body is None:
+        return body
+    if isinstance(body, str):
+        encoded = body.encode("utf-8")
+    else:
+        encoded = fastjson.dumpb(body, default=str)
+    if len(encoded) <= limit:
+        return body
+    return {"truncated": True, "size": len(encoded), "preview": preview_text(encoded, "utf-8", limit)}
+
+
+def spool_dir() -> Path:
+    return Path(COMMON.STORAGE) / COMMON.RESPONSE_SPOOL_DIR
+
+
+def spool_path(name: str) -> Path:
+    """Path of a spooled body by name; ValueError for names this module did not create."""
+    if not _SPOOL_NAME_RE.match(name or ""):
+        raise ValueError(f"Invalid response file name: {name!r}")
+    return spool_dir() / name
+
+
+def purge_spool(force: bool = False) -> int:
+    """Delete spooled bodies older than RESPONSE_SPOOL_TTL; runs at most once a minute unless forced."""
+    global _last_purge
+    now = time.time()
+    with _purge_lock:
+        if not force and now - _last_purge < 60.0:
+            return 0
+        _last_purge = now
+    removed = 0
+    directory = spool_dir()
+    if not directory.is_dir():
+        return 0
+    for p in directory.glob("*.body"):
+        try:
+            if now - p.stat().st_mtime > COMMON.RESPONSE_SPOOL_TTL:
+                p.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    if removed:
+        logger.debug("Removed %d expired spooled response(s)", removed)
+    return removed
+
+
+class BodySink:
+    """Collects a streamed body in memory, switching to a spool file past max_memory bytes."""
+
+    def __init__(self, max_memory: Optional[int] = None) -> None:
+        self.max_memory = COMMON.RESPONSE_MEMORY_MAX_BYTES if max_memory is None else max_memory
+        self.size = 0
+        self._buffer = bytearray()
+        self._head = b""
+        self._sha256 = hashlib.sha256()
+        self._file = None
+        self.path: Optional[Path] = None
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self.size += len(chunk)
+        self._sha256.update(chunk)
+        if self._file is None:
+            self._buffer += chunk
+            if len(self._buffer) > self.max_memory:
+                self._spill()
+        else:
+            self._file.write(chunk)
+
+    def _spill(self) -> None:
+        directory = spool_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"{uuid.uuid4().hex}.body"
+        self._file = open(self.path, "wb")
+        self._head = bytes(self._buffer[: COMMON.BODY_PREVIEW_BYTES])
+        self._file.write(self._buffer)
+        self._buffer = bytearray()
+        logger.debug("Spooling response body past %d bytes to %s", self.max_memory, self.path)
+
+    @property
+    def spooled(self) -> bool:
+        return self.path is not None
+
+    @property
+    def content(self) -> bytes:
+        return bytes(self._buffer)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            purge_spool()
+
+    def discard(self) -> None:
+        """Drop a partially received body."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        self._buffer = bytearray()
+
+    def descriptor(self, content_type: Optional[str], charset: Optional[str]) -> Dict[str, Any]:
+        """What a spooled body is replaced by in responses and transactions."""
+        assert self.path is not None
+        return {
+            "file": self.path.name,
+            "size": self.size,
+            "sha256": self._sha256.hexdigest(),
+            "content_type": content_type,
+            "preview": preview_text(self._head, charset, len(self._head)) + f"... <{self.size - len(self._head)} more bytes>",
+        }
@@ -1,12 +1,16 @@
 from __future__ import annotations
-from .logger import setup_logging
+from .logger import capped_preview, debug_enabled, setup_logging
 from typing import Any, Dict, Optional, Union
 import httpx
 import time
 from ..constants import COMMON
+from .httppool import get_http_pool
+from .calltiming import CallTiming
+from .responsebody import BodySink, decode_body, preview_text
 
 logger = setup_logging()
 DEFAULT_HTTP_TIMEOUT = COMMON.DEFAULT_HTTP_TIMEOUT
+_SUPPORTED_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS")
 
 def _redact_headers(headers: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
     """
@@ -28,7 +32,7 @@ def _redact_headers(headers: Optional[Dict[str, str]]) -> Optional[Dict[str, str
         redacted[k] = "<redacted>" if k.lower() in sensitive else v
     return redacted
 
-def _preview_body(body: Any | None, limit: int = 512) -> str:
+def _preview_body(body: Any | None, limit: Optional[int] = None) -> str:
     """
     Create a safe, truncated preview string for request/response bodies.
     """
@@ -36,11 +40,7 @@ def _preview_body(body: Any | None, limit: int = 512) -> str:
         return "None"
     if isinstance(body, (bytes, bytearray)):
         return f"<bytes {len(body)} bytes>"
-    try:
-        text = body if isinstance(body, str) else repr(body)
-    except Exception:
-        text = "<unrepresentable body>"
-    return text
+    return capped_preview(body, COMMON.BODY_PREVIEW_BYTES if limit is None else limit)
 
 def _build_send_kwargs(
     body: Any | None,
@@ -74,43 +74,44 @@ def _build_send_kwargs(
     # Fallback: send string representation
     return {"content": str(body)}
 
-def _format_response(response: httpx.Response) -> Dict[str, Any]:
+def _format_response(response: httpx.Response, sink: Optional[BodySink] = None) -> Dict[str, Any]:
     """
     Convert httpx.Response into a simple, uniform dictionary.
-    Attempts to decode JSON; falls back to response text if not JSON.
+    Decodes JSON in a single pass over the body; falls back to text if not JSON.
+    A streamed body that was spooled to disk is replaced by its descriptor.
     """
     # httpx.Headers is a case-insensitive mapping; convert to a plain dict
     headers: Dict[str, str] = {k: v for k, v in response.headers.items()}
+    charset = response.charset_encoding
 
-    # Try to parse JSON; otherwise return text content
-    try:
-        body: Any = response.json()
-    except (ValueError, httpx.DecodingError):
-        body = response.text
+    if sink is not None and sink.spooled:
+        return {
+            "status": response.status_code,
+            "headers": headers,
+            "body": sink.descriptor(response.headers.get("content-type"), charset),
+            "spooled": True,
+        }
 
+    content = sink.content if sink is not None else response.content
     return {
         "status": response.status_code,
         "headers": headers,
-        "body": body,
+        "body": decode_body(content, charset),
     }
 
-def _request(
-    method: str,
+def _log_request(
+    method_upper: str,
     url: str,
-    headers: Optional[Dict[str, str]] = None,
-    body: Any | None = None,
-    form_data: Any | None = None,
-    files: Any | None = None,
-    timeout: Union[float, httpx.Timeout] = DEFAULT_HTTP_TIMEOUT,
-) -> Dict[str, Any]:
+    headers: Optional[Dict[str, str]],
+    body: Any | None,
+    form_data: Any | None,
+    files: Any | None,
+) -> None:
     """
-    Internal helper to perform an HTTP request and return a normalized response dict.
+    Log the outgoing request (headers redacted).
     """
-    send_kwargs = _build_send_kwargs(body=body, form_data=form_data, files=files)
-    method_upper = method.upper()
-    start_ts = time.monotonic()
-
-    # Log request start
+    if not debug_enabled():
+        return
     logger.debug("Request method: %s", method_upper)
     logger.debug("Request url: %s",url)
                 
@@ -127,28 +128,151 @@ def _request(
             file_count = -1
         logger.debug("Request files count: %s", file_count)
 
+def _log_response(response: httpx.Response, start_ts: float, sink: Optional[BodySink] = None) -> None:
+    """
+    Log status, elapsed time, headers and a size-capped preview of the body.
+    """
+    if not debug_enabled():
+        return
+    elapsed_ms = (time.monotonic() - start_ts) * 1000.0
+    status_code = response.status_code
+
+    # Log status
+    logger.debug("Request status: %d",status_code)
+    logger.debug("Request elapsed_ms: (%.1f ms)",elapsed_ms)
+    logger.debug("Response headers: %s", {k: v for k, v in response.headers.items()})
+    
+    # Log a safe, truncated preview of the response body
+    if sink is not None and sink.spooled:
+        logger.debug("Response body: <%d bytes spooled to %s>", sink.size, sink.path)
+        return
+    try:
+        content = sink.content if sink is not None else response.content
+        preview = preview_text(content, response.charset_encoding)
+    except Exception:
+        preview = "<unavailable>"
+    logger.debug("Response body: %s", preview)
+
+def _record_sizes(timing: Optional[CallTiming], response: httpx.Response) -> None:
+    """Record the request/response body sizes of a finished exchange on `timing`."""
+    if timing is None:
+        return
+    request = response.request
+    try:
+        request_bytes: Optional[int] = len(request.content)
+    except httpx.RequestNotRead:
+        # A streamed (e.g. multipart) body; its size is only known from the header
+        length = request.headers.get("content-length")
+        request_bytes = int(length) if length and length.isdigit() else None
+    timing.end_attempt(request_bytes, response.num_bytes_downloaded)
+
+def _request(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    body: Any | None = None,
+    form_data: Any | None = None,
+    files: Any | None = None,
+    timeout: Union[float, httpx.Timeout] = DEFAULT_HTTP_TIMEOUT,
+    stream: bool = False,
+) -> Dict[str, Any]:
+    """
+    Internal helper to perform an HTTP request and return a normalized response dict.
+
+    With `stream`, the body is read in chunks and spooled to disk past
+    RESPONSE_MEMORY_MAX_BYTES instead of being loaded whole.
+    """
+    send_kwargs = _build_send_kwargs(body=body, form_data=form_data, files=files)
+    method_upper = method.upper()
+    start_ts = time.monotonic()
+
+    # Log request start
+    _log_request(method_upper, url, headers, body, form_data, files)
+
     try:
-        # Use a short-lived client for a single request.
-        # If you need connection pooling across many calls, consider sharing a Client.
-        with httpx.Client(timeout=timeout) as client:
-            response = client.request(method=method_upper, url=url, headers=headers, **send_kwargs)
+        # Reuse the pooled keep-alive client for this origin (see httppool).
+        client = get_http_pool().get_client(url)
+        if stream:
+            request = client.build_request(method_upper, url, headers=headers, timeout=timeout, **send_kwargs)
+            response = client.send(request, stream=True)
+            sink = BodySink()
+            try:
+                for chunk in response.iter_bytes():
+                    sink.write(chunk)
+            except BaseException:
+                sink.discard()
+                raise
+            finally:
+                response.close()
+            sink.close()
+            _log_response(response, start_ts, sink)
+            return _format_response(response, sink)
+
+        response = client.request(method=method_upper, url=url, headers=headers, timeout=timeout, **send_kwargs)
 
+        _log_response(response, start_ts)
+        return _format_response(response)
+
+    except httpx.RequestError as exc:
         elapsed_ms = (time.monotonic() - start_ts) * 1000.0
-        status_code = response.status_code
-
-        # Log status
-        logger.debug("Request status: %d",status_code)
-        logger.debug("Request elapsed_ms: (%.1f ms)",elapsed_ms)
-        logger.debug("Response headers: %s", {k: v for k, v in response.headers.items()})
-        
-        # Log a safe, truncated preview of the response body
-        try:
-            preview = response.text
-        except Exception:
-            preview = "<unavailable>"
-        if preview is not None:
-            logger.debug("Response body: %s", preview)
+        logger.error("HTTP %s %s failed after %.1f ms: %s", method_upper, url, elapsed_ms, str(exc))
+        logger.exception("HTTP request error")
+        raise
 
+async def _arequest(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    body: Any | None = None,
+    form_data: Any | None = None,
+    files: Any | None = None,
+    timeout: Union[float, httpx.Timeout] = DEFAULT_HTTP_TIMEOUT,
+    stream: bool = False,
+    timing: Optional[CallTiming] = None,
+) -> Dict[str, Any]:
+    """
+    Async counterpart of _request() using the pooled httpx.AsyncClient.
+
+    With `timing`, the attempt's connect/TLS/TTFB times (httpcore trace
+    events) and body byte counts are recorded on it.
+    """
+    send_kwargs = _build_send_kwargs(body=body, form_data=form_data, files=files)
+    method_upper = method.upper()
+    start_ts = time.monotonic()
+    extensions = None
+    if timing is not None:
+        timing.begin_attempt()
+        extensions = {"trace": timing.atrace}
+
+    _log_request(method_upper, url, headers, body, form_data, files)
+
+    try:
+        client = get_http_pool().get_async_client(url)
+        if stream:
+            request = client.build_request(
+                method_upper, url, headers=headers, timeout=timeout, extensions=extensions, **send_kwargs
+            )
+            response = await client.send(request, stream=True)
+            sink = BodySink()
+            try:
+                async for chunk in response.aiter_bytes():
+                    sink.write(chunk)
+            except BaseException:
+                sink.discard()
+                raise
+            finally:
+                await response.aclose()
+            sink.close()
+            _record_sizes(timing, response)
+            _log_response(response, start_ts, sink)
+            return _format_response(response, sink)
+
+        response = await client.request(
+            method=method_upper, url=url, headers=headers, timeout=timeout, extensions=extensions, **send_kwargs
+        )
+
+        _record_sizes(timing, response)
+        _log_response(response, start_ts)
         return _format_response(response)
 
     except httpx.RequestError as exc:
@@ -259,6 +383,43 @@ def http_request(
             logger.error("Unsupported HTTP method: %s", method)
             raise ValueError(f"Unsupported HTTP method: {method}")
 
+async def http_request_async(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    body: Any | None = None,
+    form_data: Any | None = None,
+    files: Any | None = None,
+    timeout: Union[float, httpx.Timeout] = DEFAULT_HTTP_TIMEOUT,
+    stream: bool = False,
+    timing: Optional[CallTiming] = None,
+) -> Dict[str, Any]:
+    """
+    Perform an HTTP request without blocking the event loop.
+
+    Accepts the same methods and arguments as http_request() and returns the
+    same normalized response dict. Raises ValueError for unsupported methods.
+    With `stream`, a body larger than RESPONSE_MEMORY_MAX_BYTES is spooled to
+    disk and returned as a descriptor ({"file", "size", "sha256", ...}) with
+    "spooled": True in the response dict. `timing` collects the network
+    timings and byte counts of the request (see utils/calltiming).
+    """
+    method_upper = method.upper()
+    if method_upper not in _SUPPORTED_METHODS:
+        logger.error("Unsupported HTTP method: %s", method)
+        raise ValueError(f"Unsupported HTTP method: {method}")
+    return await _arequest(
+        method_upper,
+        url,
+        headers=headers,
+        body=body,
+        form_data=form_data,
+        files=files,
+        timeout=timeout,
+        stream=stream,
+        timing=timing,
+    )
+
 __all__ = [
     "http_get",
     "http_post",
@@ -266,4 +427,5 @@ __all__ = [
     "http_delete",
     "http_patch",
     "http_request",
+    "http_request_async",
 ]
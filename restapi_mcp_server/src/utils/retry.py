@@ -0,0 +1,180 @@
+"""Retry engine for downstream HTTP calls.
+
+A RetryPolicy is built from the server defaults (COMMON.RETRY_*), overlaid by
+the environment's RESTAPI_RETRY variable and then by the call's `retry` block.
+send_with_retry() runs the attempts:
+
+- retries transport errors and the policy's status codes (429/502/503/504 by
+  default) up to max_attempts
+- exponential backoff (initial * multiplier**n, capped at backoff_max) with
+  full jitter; a Retry-After header is honoured when it asks for longer, and
+  ends the retries (returning that response) when it asks for more than
+  backoff_max or the remaining budget
+- idempotency-aware: GET/HEAD/OPTIONS/PUT/DELETE are retried; POST/PATCH only
+  when the request carries an Idempotency-Key header or the policy sets
+  retry_non_idempotent. A connect failure (the request never left) is
+  retryable for every method.
+- total_timeout bounds the whole sequence: attempts get the remaining budget
+  as their timeout and no retry is scheduled past it; the caller's deadline
+  (utils/deadline) bounds it the same way
+
+Every attempt is appended to the caller's `attempts` list so it can be
+recorded under the call's transaction.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+import asyncio
+import random
+import time
+import httpx
+from ..constants import COMMON
+from .logger import setup_logging
+
+logger = setup_logging()
+
+__all__ = ["RetryPolicy", "send_with_retry", "retry_after_seconds"]
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# The request was never sent, so a retry cannot duplicate it
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 1
+    backoff_initial: float = 0.5
+    backoff_max: float = 30.0
+    backoff_multiplier: float = 2.0
+    jitter: bool = True
+    retry_on_status: List[int] = field(default_factory=lambda: [429, 502, 503, 504])
+    retry_on_errors: bool = True
+    retry_non_idempotent: bool = False
+    respect_retry_after: bool = True
+    total_timeout: Optional[float] = None
+
+    @classmethod
+    def defaults(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=COMMON.RETRY_MAX_ATTEMPTS,
+            backoff_initial=COMMON.RETRY_BACKOFF_INITIAL,
+            backoff_max=COMMON.RETRY_BACKOFF_MAX,
+            total_timeout=COMMON.RETRY_TOTAL_TIMEOUT or None,
+        )
+
+    def merged(self, overrides: Optional[Mapping[str, Any]]) -> "RetryPolicy":
+        """Return a copy with the known keys of `overrides` applied."""
+        if not overrides:
+            return self
+        known = {f.name for f in fields(self)}
+        values = {f.name: getattr(self, f.name) for f in fields(self)}
+        for key, value in overrides.items():
+            if key in known:
+                values[key] = value
+            else:
+                logger.warning("Ignoring unknown retry setting: %s", key)
+        return RetryPolicy(**values)
+
+    def allows_method(self, method: str, headers: Optional[Mapping[str, str]]) -> bool:
+        if method.upper() in IDEMPOTENT_METHODS or self.retry_non_idempotent:
+            return True
+        return any(k.lower() == "idempotency-key" for k in (headers or {}))
+
+    def backoff(self, retry_number: int) -> float:
+        delay = min(self.backoff_max, self.backoff_initial * (self.backoff_multiplier ** (retry_number - 1)))
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    value = next((v for k, v in (headers or {}).items() if k.lower() == "retry-after"), None)
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+async def send_with_retry(
+    send: Callable[[float], Awaitable[Dict[str, Any]]],
+    method: str,
+    headers: Optional[Mapping[str, str]],
+    policy: RetryPolicy,
+    timeout: float,
+    attempts: List[Dict[str, Any]],
+    deadline: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Call `send(timeout)` until it succeeds, the policy stops retrying or the
+    time budget is spent. Returns the last response; re-raises the last error.
+    `deadline` is an absolute time.monotonic() value the sequence must not pass.
+    """
+    start = time.monotonic()
+    if policy.total_timeout:
+        deadline = min(deadline, start + policy.total_timeout) if deadline is not None else start + policy.total_timeout
+    method_ok = policy.allows_method(method, headers)
+    attempt = 0
+
+    while True:
+        attempt += 1
+        attempt_timeout = timeout
+        if deadline is not None:
+            attempt_timeout = max(0.001, min(timeout, deadline - time.monotonic()))
+        record: Dict[str, Any] = {"attempt": attempt}
+        attempt_start = time.monotonic()
+        error: Optional[BaseException] = None
+        response: Optional[Dict[str, Any]] = None
+        try:
+            response = await send(attempt_timeout)
+            record["status"] = response.get("status")
+        except httpx.TransportError as exc:
+            error = exc
+            record["error"] = f"{type(exc).__name__}: {exc}"
+        record["elapsed_ms"] = round((time.monotonic() - attempt_start) * 1000.0, 1)
+        attempts.append(record)
+
+        # Decide whether another attempt is allowed
+        if attempt >= policy.max_attempts:
+            break
+        if error is not None:
+            if not policy.retry_on_errors or not (method_ok or isinstance(error, _NOT_SENT_ERRORS)):
+                break
+            delay = policy.backoff(attempt)
+        else:
+            assert response is not None
+            if response.get("status") not in policy.retry_on_status or not method_ok:
+                break
+            delay = policy.backoff(attempt)
+            if policy.respect_retry_after:
+                retry_after = retry_after_seconds(response.get("headers"))
+                if retry_after is not None:
+                    if retry_after > policy.backoff_max:
+                        logger.debug("Retry-After of %.1fs exceeds backoff_max after attempt %d", retry_after, attempt)
+                        break
+                    delay = max(delay, retry_after)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            logger.debug("Retry budget exhausted after attempt %d", attempt)
+            break
+
+        record["retry_in_s"] = round(delay, 3)
+        logger.info(
+            "Retrying %s (attempt %d of %d) in %.2fs after %s",
+            method.upper(), attempt + 1, policy.max_attempts, delay, record.get("error") or record.get("status"),
+        )
+        await asyncio.sleep(delay)
+
+    if error is not None:
+        raise error
+    assert response is not None
+    return response
@@ -0,0 +1,129 @@
+"""Single-flight coalescing of identical concurrent downstream requests.
+
+While a safe request (GET/HEAD/OPTIONS) is in flight, identical requests
+(same method, resolved URL, headers and body) wait for it and share its
+response instead of calling the downstream service again. Headers that are
+unique per call by design (COMMON.SINGLE_FLIGHT_IGNORE_HEADERS, e.g. request
+ids and trace context) are left out of the key.
+
+Callers may run on different event loops (the MCP tools and the API), so the
+shared result is a concurrent.futures.Future guarded by a threading lock.
+"""
+from __future__ import annotations
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple, TypeVar
+import asyncio
+import hashlib
+import threading
+from ..constants import COMMON
+from . import fastjson
+from .logger import setup_logging
+
+logger = setup_logging()
+
+__all__ = ["COALESCED_METHODS", "flight_key", "SingleFlight", "get_single_flight"]
+
+COALESCED_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+T = TypeVar("T")
+
+
+def _ignored_headers() -> frozenset:
+    return frozenset(h.strip().lower() for h in COMMON.SINGLE_FLIGHT_IGNORE_HEADERS.split(",") if h.strip())
+
+
+def _body_hash(body: Any) -> str:
+    if body is None:
+        return ""
+    if isinstance(body, (bytes, bytearray)):
+        data = bytes(body)
+    elif isinstance(body, str):
+        data = body.encode("utf-8")
+    else:
+        data = fastjson.dumpb(body, sort_keys=True, default=str)
+    return hashlib.sha256(data).hexdigest()
+
+
+def flight_key(
+    method: str,
+    url: str,
+    headers: Optional[Mapping[str, Any]],
+    body: Any,
+    variant: str = "",
+) -> Optional[str]:
+    """
+    Coalescing key for a request, or None if its method must not be shared.
+    `variant` separates calls that send the same request but want the
+    response in a different form.
+    """
+    method = method.upper()
+    if method not in COALESCED_METHODS:
+        return None
+    ignored = _ignored_headers()
+    relevant = sorted((str(k).lower(), str(v)) for k, v in (headers or {}).items() if str(k).lower() not in ignored)
+    canonical = fastjson.dumpb([method, url, relevant, _body_hash(body), variant])
+    return hashlib.sha256(canonical).hexdigest()
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run `fn()` unless an identical call is in flight, in which case wait
+        for that call's result. Returns (result, shared).
+        """
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self._calls[key] = Future()
+                    self.leaders += 1
+                else:
+                    self.followers += 1
+            assert future is not None
+
+            if leader:
+                return await self._lead(key, future, fn), False
+
+            try:
+                # shield: a follower giving up must not cancel the shared call
+                return await asyncio.shield(asyncio.wrap_future(future)), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled; run the call again
+                logger.debug("Single-flight leader cancelled; retrying as a new flight")
+
+    async def _lead(self, key: str, future: Future, fn: Callable[[], Awaitable[T]]) -> T:
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "coalesced": self.followers}
+
+
+_SINGLE_FLIGHT = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    return _SINGLE_FLIGHT
@@ -0,0 +1,373 @@
+"""SQLite storage backend for environment variables and transactions.
+
+The database lives under COMMON.STORAGE (COMMON.SQLITE_DB_FILE) and runs in
+WAL mode so readers never block the single writer. Tables are indexed on
+transactionId, session, creation_dt and (environment, variable), which makes
+point lookups O(log n) and inserts/updates single-row operations.
+
+Every write also touches a per-table stamp file next to the database
+(e.g. restapi.db.environment.stamp) so caches in this or other processes can
+detect changes to one table with a stat() instead of a query.
+
+On first open, rows from the legacy environment.csv / transaction.csv files
+are imported once; a marker in the storage_meta table prevents re-import.
+The CSV files themselves are left untouched. Columns introduced later (e.g.
+the transaction timing columns) are added to older databases on open.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import math
+import os
+import sqlite3
+import threading
+import time
+from ..constants import COMMON
+from .logger import setup_logging
+from .calltiming import TIMING_COLUMNS
+
+logger = setup_logging()
+
+__all__ = ["SqliteBackend"]
+
+TABLES: Dict[COMMON.FileType, str] = {
+    COMMON.FileType.ENVIRONMENT: "environment",
+    COMMON.FileType.TRANSACTION: "transactions",
+    COMMON.FileType.SESSION: "sessions",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS storage_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS environment (
+    environment TEXT NOT NULL,
+    variable TEXT NOT NULL,
+    value TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_environment_env_var ON environment (environment, variable);
+CREATE TABLE IF NOT EXISTS transactions (
+    transactionId TEXT NOT NULL,
+    session TEXT,
+    action TEXT,
+    http_method TEXT,
+    request TEXT,
+    response TEXT,
+    status TEXT,
+    creation_dt TEXT,
+    last_updation_dt TEXT,
+    total_ms REAL,
+    interpolation_ms REAL,
+    storage_ms REAL,
+    downstream_ms REAL,
+    connect_ms REAL,
+    tls_ms REAL,
+    ttfb_ms REAL,
+    request_bytes INTEGER,
+    response_bytes INTEGER,
+    retry_count INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_id ON transactions (transactionId);
+CREATE INDEX IF NOT EXISTS idx_transactions_session ON transactions (session);
+CREATE INDEX IF NOT EXISTS idx_transactions_creation_dt ON transactions (creation_dt);
+CREATE INDEX IF NOT EXISTS idx_transactions_session_creation_dt ON transactions (session, creation_dt);
+CREATE TABLE IF NOT EXISTS sessions (
+    session TEXT NOT NULL,
+    context TEXT,
+    last_used TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_session ON sessions (session);
+CREATE INDEX IF NOT EXISTS idx_sessions_last_used ON sessions (last_used);
+"""
+
+# Columns added after the first release, with their types: ALTER TABLE adds
+# them to databases created before
+_ADDED_COLUMNS: Dict[str, Dict[str, str]] = {
+    "transactions": {
+        col: "INTEGER" if kind is int else "REAL" for col, kind in TIMING_COLUMNS.items()
+    },
+}
+
+
+def _clean(value: Any) -> Any:
+    # pandas yields float('nan') for empty CSV cells; store them as NULL.
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class SqliteBackend:
+    """
+    Row-level storage on a single SQLite database file.
+
+    One connection is opened per thread (sqlite3 connections are not meant to
+    be shared concurrently). All connections are closed by close().
+    """
+
+    name = "sqlite"
+
+    def __init__(self, storage_path: Path, columns: Dict[COMMON.FileType, List[str]]) -> None:
+        self.storage_path = storage_path
+        self.path = storage_path / COMMON.SQLITE_DB_FILE
+        self.columns = columns
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+        if not storage_path.is_dir():
+            logger.error("Storage folder not configured: %s", storage_path)
+            raise FileNotFoundError(f"Storage folder not configured: {storage_path}")
+
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        self._add_missing_columns(conn)
+        logger.debug("SQLite storage ready: %s", self.path)
+
+    def _add_missing_columns(self, conn: sqlite3.Connection) -> None:
+        for table, columns in _ADDED_COLUMNS.items():
+            existing = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+            for col, sql_type in columns.items():
+                if col in existing:
+                    continue
+                try:
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN "{col}" {sql_type}')
+                except sqlite3.OperationalError as exc:
+                    # Another worker process added it first
+                    if "duplicate column" not in str(exc):
+                        raise
+                logger.info("Added column %s.%s to %s", table, col, self.path)
+
+    # ------------------------------------------------------------------ #
+    # Connections
+    # ------------------------------------------------------------------ #
+    def _conn(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=COMMON.SQLITE_BUSY_TIMEOUT_MS / 1000.0,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(COMMON.SQLITE_BUSY_TIMEOUT_MS)}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as exc:
+                logger.error("Failed to close SQLite connection: %s", exc)
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------ #
+    # Helpers
+    # ------------------------------------------------------------------ #
+    def _table(self, file_type: COMMON.FileType) -> str:
+        return TABLES[file_type]
+
+    def _check_columns(self, file_type: COMMON.FileType, names: Iterable[str]) -> None:
+        known = self.columns[file_type]
+        for col in names:
+            if col not in known:
+                logger.error("Column '%s' not found in storage for %s", col, file_type.name)
+                raise KeyError(f"Column '{col}' not found in storage for {file_type.name}")
+
+    def _stamp_path(self, file_type: COMMON.FileType) -> Path:
+        return self.path.with_name(f"{self.path.name}.{self._table(file_type)}.stamp")
+
+    def _touch_stamp(self, file_type: COMMON.FileType) -> None:
+        path = self._stamp_path(file_type)
+        try:
+            path.touch()
+            # Explicit ns timestamp: filesystem mtime ticks can be too coarse to tell writes apart.
+            now = time.time_ns()
+            os.utime(path, ns=(now, now))
+        except OSError as exc:
+            logger.error("Failed to touch storage stamp for %s: %s", file_type.name, exc)
+
+    def change_token(self, file_type: COMMON.FileType) -> Optional[tuple[int, int, int]]:
+        """
+        Return a token that changes whenever rows of `file_type` are written.
+        """
+        try:
+            st = os.stat(self._stamp_path(file_type))
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _where(equals: Dict[str, Any]) -> tuple[str, list[Any]]:
+        if not equals:
+            return "", []
+        clause = " AND ".join(f'"{col}" = ?' for col in equals)
+        return f" WHERE {clause}", list(equals.values())
+
+    # ------------------------------------------------------------------ #
+    # Row API
+    # ------------------------------------------------------------------ #
+    def read_rows(self, file_type: COMMON.FileType) -> List[Dict[str, Any]]:
+        return self.filter_rows(file_type)
+
+    def filter_rows(self, file_type: COMMON.FileType, **equals: Any) -> List[Dict[str, Any]]:
+        self._check_columns(file_type, equals.keys())
+        where, params = self._where(equals)
+        cols = ", ".join(f'"{c}"' for c in self.columns[file_type])
+        sql = f"SELECT {cols} FROM {self._table(file_type)}{where} ORDER BY rowid"
+        rows = self._conn().execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
+
+    def page_rows(
+        self,
+        file_type: COMMON.FileType,
+        order_by: Sequence[str],
+        equals: Dict[str, Any],
+        lower: Optional[Any],
+        upper: Optional[Any],
+        after: Optional[Sequence[Any]],
+        descending: bool,
+        limit: int,
+        columns: Optional[Sequence[str]],
+    ) -> List[Dict[str, Any]]:
+        """One keyset page; see persist.page_rows()."""
+        names = list(dict.fromkeys([*order_by, *(columns if columns is not None else self.columns[file_type])]))
+        self._check_columns(file_type, [*names, *equals.keys()])
+        where, params = self._where(equals)
+        clauses = [where[len(" WHERE "):]] if where else []
+        first = f'"{order_by[0]}"'
+        if lower is not None:
+            clauses.append(f"{first} >= ?")
+            params.append(str(lower))
+        if upper is not None:
+            clauses.append(f"{first} < ?")
+            params.append(str(upper))
+        if after is not None:
+            keys = ", ".join(f'"{c}"' for c in order_by)
+            marks = ", ".join("?" for _ in order_by)
+            clauses.append(f"({keys}) {'<' if descending else '>'} ({marks})")
+            params.extend(str(v) for v in after)
+        direction = "DESC" if descending else "ASC"
+        cols = ", ".join(f'"{c}"' for c in names)
+        order = ", ".join(f'"{c}" {direction}' for c in order_by)
+        sql = f"SELECT {cols} FROM {self._table(file_type)}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order} LIMIT ?"
+        params.append(max(0, int(limit)))
+        return [dict(r) for r in self._conn().execute(sql, params).fetchall()]
+
+    def insert_row(self, file_type: COMMON.FileType, row: Dict[str, Any]) -> None:
+        self.insert_rows(file_type, [row])
+
+    def insert_rows(self, file_type: COMMON.FileType, rows: Sequence[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        cols = self.columns[file_type]
+        placeholders = ", ".join("?" for _ in cols)
+        sql = f"INSERT INTO {self._table(file_type)} ({', '.join(cols)}) VALUES ({placeholders})"
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(sql, [[_clean(r.get(c)) for c in cols] for r in rows])
+        self._touch_stamp(file_type)
+
+    def update_rows(self, file_type: COMMON.FileType, values: Dict[str, Any], **equals: Any) -> int:
+        self._check_columns(file_type, list(values.keys()) + list(equals.keys()))
+        assignments = ", ".join(f'"{col}" = ?' for col in values)
+        where, params = self._where(equals)
+        sql = f"UPDATE {self._table(file_type)} SET {assignments}{where}"
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(sql, [_clean(v) for v in values.values()] + params)
+        self._touch_stamp(file_type)
+        return int(cur.rowcount)
+
+    def upsert_row(self, file_type: COMMON.FileType, row: Dict[str, Any], key_columns: Sequence[str]) -> None:
+        cols = self.columns[file_type]
+        self._check_columns(file_type, key_columns)
+        updates = [c for c in cols if c not in key_columns]
+        placeholders = ", ".join("?" for _ in cols)
+        conflict = ", ".join(key_columns)
+        set_clause = ", ".join(f"{c} = excluded.{c}" for c in updates)
+        sql = (
+            f"INSERT INTO {self._table(file_type)} ({', '.join(cols)}) VALUES ({placeholders}) "
+            f"ON CONFLICT ({conflict}) DO UPDATE SET {set_clause}"
+        )
+        conn = self._conn()
+        with conn:
+            conn.execute(sql, [_clean(row.get(c)) for c in cols])
+        self._touch_stamp(file_type)
+
+    def delete_rows(self, file_type: COMMON.FileType, **equals: Any) -> int:
+        self._check_columns(file_type, equals.keys())
+        where, params = self._where(equals)
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(f"DELETE FROM {self._table(file_type)}{where}", params)
+        self._touch_stamp(file_type)
+        return int(cur.rowcount)
+
+    def read_rows_in(self, file_type: COMMON.FileType, column: str, values: Sequence[Any]) -> List[Dict[str, Any]]:
+        self._check_columns(file_type, [column])
+        values = list(values)
+        cols = ", ".join(f'"{c}"' for c in self.columns[file_type])
+        rows: List[Dict[str, Any]] = []
+        conn = self._conn()
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(values), 500):
+            chunk = values[i : i + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            sql = f'SELECT {cols} FROM {self._table(file_type)} WHERE "{column}" IN ({placeholders}) ORDER BY rowid'
+            rows.extend(dict(r) for r in conn.execute(sql, chunk).fetchall())
+        return rows
+
+    def delete_rows_in(self, file_type: COMMON.FileType, column: str, values: Sequence[Any]) -> int:
+        self._check_columns(file_type, [column])
+        values = list(values)
+        if not values:
+            return 0
+        deleted = 0
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(values), 500):
+                chunk = values[i : i + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                cur = conn.execute(f'DELETE FROM {self._table(file_type)} WHERE "{column}" IN ({placeholders})', chunk)
+                deleted += int(cur.rowcount)
+        self._touch_stamp(file_type)
+        return deleted
+
+    # ------------------------------------------------------------------ #
+    # Migration
+    # ------------------------------------------------------------------ #
+    def migrate_from_csv(self, file_type: COMMON.FileType, rows: List[Dict[str, Any]]) -> int:
+        """
+        Import legacy CSV rows once. Returns the number of rows imported
+        (0 if this table was already migrated).
+        """
+        marker = f"migrated_from_csv:{self._table(file_type)}"
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            done = conn.execute("SELECT value FROM storage_meta WHERE key = ?", (marker,)).fetchone()
+            if done is not None:
+                return 0
+            cols = self.columns[file_type]
+            placeholders = ", ".join("?" for _ in cols)
+            sql = f"INSERT OR REPLACE INTO {self._table(file_type)} ({', '.join(cols)}) VALUES ({placeholders})"
+            conn.executemany(sql, [[_clean(r.get(c)) for c in cols] for r in rows])
+            conn.execute("INSERT INTO storage_meta (key, value) VALUES (?, ?)", (marker, str(len(rows))))
+        self._touch_stamp(file_type)
+        return len(rows)
@@ -0,0 +1,390 @@
+"""Compiled templates for request payload interpolation.
+
+A payload (str/dict/list/scalar) is parsed once into a tree of nodes and the
+compiled plan is cached (LRU keyed by the payload's type and repr),
+so repeated skill steps skip regex scanning entirely. Rendering is a single
+pass over the tree against a TemplateScope built once per call.
+
+Resolution order is the same as the original four passes over the payload:
+  1) Variables ({{VAR}}; a string that is exactly one placeholder keeps the
+     variable's native type)
+  2) RESTAPI constants (a string that is exactly "$NAME")
+  3) Base64 transforms (base64_encode(...) / base64_decode(...))
+  4) jq transforms (jq_expression('<filter>', <json-literal | $CONST>))
+Values produced by a stage (a variable's value, a constant's value, a decoded
+base64 string) still go through the later stages, exactly as before.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import re
+import threading
+from ..constants import COMMON
+from . import fastjson
+from .bas64interpolation import encode_base64, decode_base64
+from .executioncontext import lookup_constant
+from . import jqinterpolation
+from .logger import debug_enabled, preview, setup_logging
+
+logger = setup_logging()
+
+__all__ = ["TemplateScope", "compile_template", "resolve_interpolations", "template_cache_info"]
+
+_BRACED_VARIABLE_RE = re.compile(COMMON.BRACED_VARIABLE_REGEX)
+_PLACEHOLDER_RE = re.compile(COMMON.INTERPOLATION_REGEX)
+_BASE64_ENCODE_RE = re.compile(COMMON.BASE64_ENCODE_REGEX)
+_BASE64_DECODE_RE = re.compile(COMMON.BASE64_DECODE_REGEX)
+_JQ_EXPRESSION_RE = re.compile(COMMON.JQ_EXPRESSION_REGEX)
+
+# Stages a value still has to go through
+_STAGE_CONSTANTS = 2
+_STAGE_BASE64 = 3
+_STAGE_JQ = 4
+
+
+class TemplateScope:
+    """
+    Variable lookups for one render, built once from environment rows.
+
+    Supported row shapes:
+    - {"variable": "NAME", "value": ...}
+    - {"NAME": ...}
+
+    `native` resolves a whole-string {{NAME}} to the first matching row's
+    value (native type kept); `merged` is the last-wins mapping used for
+    placeholders embedded in larger strings.
+    """
+
+    __slots__ = ("env_rows", "native", "merged")
+
+    def __init__(self, env_rows: Any) -> None:
+        self.env_rows = env_rows or []
+        self.native: Dict[Any, Any] = {}
+        self.merged: Dict[Any, Any] = {}
+        for row in self.env_rows:
+            if not isinstance(row, dict):
+                continue
+            variable = row.get("variable")
+            if isinstance(variable, str):
+                self.native.setdefault(variable, row.get("value"))
+            for key, value in row.items():
+                self.native.setdefault(key, value)
+            if "variable" in row and "value" in row and isinstance(variable, str):
+                self.merged[variable] = row.get("value")
+            else:
+                self.merged.update(row)
+
+
+# ---------------------------------------------------------------------- #
+# Dynamic (value-dependent) stages
+# ---------------------------------------------------------------------- #
+def _constant(name: str, default: Any) -> Any:
+    # Per-call state ($RESPONSE_BODY, ...) from the current execution context
+    return lookup_constant(name, default)
+
+
+def _coerce_jq_data(data_val: Any) -> Any:
+    # If still a string, try to parse JSON literal or strip outer quotes
+    if isinstance(data_val, str):
+        try:
+            if data_val and (data_val[0] in "{[\"'"):
+                if (data_val[0] in "\"'" and data_val[-1] == data_val[0]):
+                    data_val = data_val[1:-1]
+                else:
+                    data_val = fastjson.loads(data_val)
+        except Exception:
+            pass
+    return data_val
+
+
+def _run_jq(jq_filter: str, data_val: Any) -> Any:
+    if debug_enabled():
+        logger.debug("JQ before: filter=%r, data=%s", jq_filter, preview(data_val))
+    _res = jqinterpolation.jqinterpolate(expression=jq_filter, json_input=data_val)
+    if debug_enabled():
+        logger.debug("JQ after: result=%s", preview(_res))
+    if isinstance(_res, list) and len(_res) == 1:
+        return _res[0]
+    return _res
+
+
+def _jq_source(data_src: str) -> Any:
+    # Resolve RESTAPI constants (e.g., $RESPONSE_BODY) in the data argument
+    s_strip = data_src.strip()
+    if s_strip.startswith("$") and len(s_strip) > 1:
+        return _constant(s_strip[1:], data_src)
+    return data_src
+
+
+def _base64(kind: str, content: str) -> str:
+    if kind == "encode":
+        res = encode_base64(content)
+        if debug_enabled():
+            logger.debug("Base64 encode: %s -> %s", preview(content), preview(res))
+    else:
+        res = decode_base64(content)
+        if debug_enabled():
+            logger.debug("Base64 decode: %s -> %s", preview(content), preview(res))
+    return res
+
+
+def _match_base64(s_strip: str) -> Optional[Tuple[str, str]]:
+    for kind, regex in (("encode", _BASE64_ENCODE_RE), ("decode", _BASE64_DECODE_RE)):
+        m = regex.fullmatch(s_strip)
+        if m:
+            content = next((g for g in m.groups() if g is not None), "")
+            return kind, content.strip()
+    return None
+
+
+def _match_jq(s_strip: str) -> Optional[Tuple[str, str]]:
+    m = _JQ_EXPRESSION_RE.fullmatch(s_strip)
+    if not m:
+        return None
+    groups = m.groups()
+    return groups[1], groups[2].strip()
+
+
+def _resolve_string(s: str, stage: int) -> Any:
+    """
+    Run a produced string through the remaining stages (constants, base64, jq).
+    """
+    s_strip = s.strip()
+    if stage <= _STAGE_CONSTANTS and s_strip.startswith("$") and len(s_strip) > 1:
+        val = _constant(s_strip[1:], s)
+        if debug_enabled():
+            logger.debug("RESTAPI constant: %s -> %s", s, preview(val))
+        return _walk(val, _STAGE_BASE64)
+    if stage <= _STAGE_BASE64:
+        b64 = _match_base64(s_strip)
+        if b64 is not None:
+            return _walk(_base64(*b64), _STAGE_JQ)
+    jq_match = _match_jq(s_strip)
+    if jq_match is not None:
+        jq_filter, data_src = jq_match
+        return _run_jq(jq_filter, _coerce_jq_data(_jq_source(data_src)))
+    return s
+
+
+def _walk(value: Any, stage: int) -> Any:
+    if isinstance(value, str):
+        return _resolve_string(value, stage)
+    if isinstance(value, dict):
+        return {k: _walk(v, stage) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_walk(v, stage) for v in value]
+    return value
+
+
+# ---------------------------------------------------------------------- #
+# Nodes
+# ---------------------------------------------------------------------- #
+class _Literal:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def render(self, scope: TemplateScope) -> Any:
+        return self.value
+
+
+class _Dict:
+    __slots__ = ("items",)
+
+    def __init__(self, items: List[Tuple[Any, Any]]) -> None:
+        self.items = items
+
+    def render(self, scope: TemplateScope) -> Any:
+        return {k: node.render(scope) for k, node in self.items}
+
+
+class _List:
+    __slots__ = ("nodes",)
+
+    def __init__(self, nodes: List[Any]) -> None:
+        self.nodes = nodes
+
+    def render(self, scope: TemplateScope) -> Any:
+        return [node.render(scope) for node in self.nodes]
+
+
+class _Interpolated:
+    """A string with {{VAR}} placeholders; the result goes through the later stages."""
+
+    __slots__ = ("raw", "parts")
+
+    def __init__(self, raw: str) -> None:
+        self.raw = raw
+        # Alternating literal text and placeholder names: [text, name, text, name, ..., text]
+        self.parts: List[str] = _PLACEHOLDER_RE.split(raw)
+
+    def render(self, scope: TemplateScope) -> Any:
+        out: List[str] = []
+        for i, part in enumerate(self.parts):
+            if i % 2 == 0:
+                out.append(part)
+                continue
+            if part not in scope.merged:
+                logger.error("Interpolation variable '%s' not provided", part)
+                raise KeyError(f"Interpolation variable '{part}' not provided")
+            value = scope.merged[part]
+            out.append("" if value is None else str(value))
+        rendered = "".join(out)
+        if rendered != self.raw and debug_enabled():
+            logger.debug("Variable interpolation: %s -> %s", preview(self.raw), preview(rendered))
+        return _resolve_string(rendered, _STAGE_CONSTANTS)
+
+
+class _Variable:
+    """A string that is exactly one {{VAR}}: keep the variable's native value."""
+
+    __slots__ = ("name", "fallback")
+
+    def __init__(self, name: str, raw: str) -> None:
+        self.name = name
+        self.fallback = _Interpolated(raw)
+
+    def render(self, scope: TemplateScope) -> Any:
+        if self.name in scope.native:
+            native_val = scope.native[self.name]
+            if debug_enabled():
+                logger.debug("Variable interpolation (native): {{%s}} -> %s", self.name, preview(native_val))
+            return _walk(native_val, _STAGE_CONSTANTS)
+        return self.fallback.render(scope)
+
+
+class _Constant:
+    __slots__ = ("name", "raw")
+
+    def __init__(self, name: str, raw: str) -> None:
+        self.name = name
+        self.raw = raw
+
+    def render(self, scope: TemplateScope) -> Any:
+        val = _constant(self.name, self.raw)
+        if debug_enabled():
+            logger.debug("RESTAPI constant: %s -> %s", self.raw, preview(val))
+        return _walk(val, _STAGE_BASE64)
+
+
+class _Base64:
+    __slots__ = ("kind", "content")
+
+    def __init__(self, kind: str, content: str) -> None:
+        self.kind = kind
+        self.content = content
+
+    def render(self, scope: TemplateScope) -> Any:
+        return _walk(_base64(self.kind, self.content), _STAGE_JQ)
+
+
+class _Jq:
+    __slots__ = ("filter", "constant", "data")
+
+    def __init__(self, jq_filter: str, data_src: str) -> None:
+        self.filter = jq_filter
+        s_strip = data_src.strip()
+        # Literal data is parsed once here; constant references are looked up per render.
+        self.constant: Optional[Tuple[str, str]] = (s_strip[1:], data_src) if s_strip.startswith("$") and len(s_strip) > 1 else None
+        self.data = None if self.constant else _coerce_jq_data(data_src)
+
+    def render(self, scope: TemplateScope) -> Any:
+        if self.constant is not None:
+            data_val = _coerce_jq_data(_constant(*self.constant))
+        else:
+            data_val = self.data
+        return _run_jq(self.filter, data_val)
+
+
+def _compile_string(s: str) -> Any:
+    s_strip = s.strip()
+    if "{{" in s:
+        mvar = _BRACED_VARIABLE_RE.fullmatch(s_strip)
+        if mvar and (mvar.lastindex or 0) >= 1:
+            return _Variable(mvar.group(1), s)
+        if _PLACEHOLDER_RE.search(s):
+            return _Interpolated(s)
+    if s_strip.startswith("$") and len(s_strip) > 1:
+        return _Constant(s_strip[1:], s)
+    b64 = _match_base64(s_strip)
+    if b64 is not None:
+        return _Base64(*b64)
+    jq_match = _match_jq(s_strip)
+    if jq_match is not None:
+        return _Jq(*jq_match)
+    return _Literal(s)
+
+
+def _compile(obj: Any) -> Any:
+    if isinstance(obj, str):
+        return _compile_string(obj)
+    if isinstance(obj, dict):
+        return _Dict([(k, _compile(v)) for k, v in obj.items()])
+    if isinstance(obj, list):
+        return _List([_compile(v) for v in obj])
+    return _Literal(obj)
+
+
+# ---------------------------------------------------------------------- #
+# Plan cache
+# ---------------------------------------------------------------------- #
+_cache: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_hits = 0
+_cache_misses = 0
+
+
+def _cache_key(obj: Any) -> Optional[Tuple[str, str]]:
+    # repr() keeps key/value types apart (1 vs "1"), unlike a JSON dump.
+    if not isinstance(obj, (str, dict, list)):
+        return None
+    text = repr(obj)
+    if len(text) > COMMON.TEMPLATE_CACHE_MAX_KEY_CHARS:
+        return None
+    return type(obj).__name__, text
+
+
+def compile_template(obj: Any) -> Any:
+    """
+    Return the compiled plan for `obj`, from the cache when possible.
+    """
+    global _cache_hits, _cache_misses
+    key = _cache_key(obj) if COMMON.TEMPLATE_CACHE_SIZE > 0 else None
+    if key is not None:
+        with _cache_lock:
+            plan = _cache.get(key)
+            if plan is not None:
+                _cache.move_to_end(key)
+                _cache_hits += 1
+                return plan
+            _cache_misses += 1
+    plan = _compile(obj)
+    if key is not None:
+        with _cache_lock:
+            _cache[key] = plan
+            _cache.move_to_end(key)
+            while len(_cache) > COMMON.TEMPLATE_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return plan
+
+
+def template_cache_info() -> Dict[str, int]:
+    with _cache_lock:
+        return {"size": len(_cache), "maxsize": COMMON.TEMPLATE_CACHE_SIZE, "hits": _cache_hits, "misses": _cache_misses}
+
+
+def resolve_interpolations(obj: Any, env_rows: Any) -> Any:
+    """
+    Resolve variables, RESTAPI constants, base64 and jq transforms in `obj`.
+
+    `env_rows` is a list of environment rows or a TemplateScope built from
+    them (build the scope once when resolving several payloads per call).
+    """
+    scope = env_rows if isinstance(env_rows, TemplateScope) else TemplateScope(env_rows)
+    if debug_enabled():
+        logger.debug("Resolve start: %s", preview(obj))
+    result = compile_template(obj).render(scope)
+    if debug_enabled():
+        logger.debug("Resolved: %s", preview(result))
+    return result